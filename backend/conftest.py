@@ -0,0 +1,24 @@
+import pytest
+from django.core.cache import cache
+
+from meal.utils.order_utils import discard_pending_meal_order_sync
+
+
+@pytest.fixture(autouse=True)
+def clear_pending_meal_order_sync():
+    """
+    コミットされずに破棄された on_commit の同期キーが、
+    後のテストのコミット時に同期されないよう、各テストの前に破棄する。
+    """
+    discard_pending_meal_order_sync()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """
+    ロールバックされたテストデータから作った配膳表などが、
+    後のテストでキャッシュから返らないよう、各テストの前にキャッシュを空にする。
+    """
+    cache.clear()
+    yield
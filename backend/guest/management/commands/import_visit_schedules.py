@@ -0,0 +1,56 @@
+from io import TextIOWrapper
+
+from django.core.management.base import BaseCommand, CommandError
+
+from guest.utils.import_utils import import_visit_schedule_csv
+from utils.import_utils import IMPORT_BATCH_SIZE, IMPORT_ENCODINGS, check_encoding
+
+
+class Command(BaseCommand):
+    help = "来訪スケジュールの CSV を一定行数毎に一括登録・更新する（解釈できない行は行番号付きで報告する）"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSVファイルのパス（1行目は見出し）")
+        parser.add_argument(
+            "--encoding",
+            choices=IMPORT_ENCODINGS,
+            default="utf-8-sig",
+            help="文字コード（既定：utf-8-sig）",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=IMPORT_BATCH_SIZE,
+            help=f"1回の一括登録に含める行数（既定：{IMPORT_BATCH_SIZE}）",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size は1以上を指定してください")
+
+        try:
+            with open(options["path"], "rb") as raw:
+                # 途中のバッチまで登録されてから失敗しないよう、書き込む前に全体を確かめる
+                check_encoding(raw, options["encoding"])
+                result = import_visit_schedule_csv(
+                    TextIOWrapper(raw, encoding=options["encoding"], newline=""),
+                    batch_size=options["batch_size"],
+                )
+        except OSError as e:
+            raise CommandError(f"ファイルを開けません: {e}")
+        except UnicodeDecodeError:
+            raise CommandError("文字コードが正しくありません。--encoding を確認してください")
+
+        for error in result["errors"]:
+            self.stderr.write(f"{error['line']}行目: {' / '.join(error['errors'])}")
+        if result["error_count"] > len(result["errors"]):
+            self.stderr.write(
+                f"ほか{result['error_count'] - len(result['errors'])}件のエラーは省略しました。"
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{result['rows']}行を処理しました（作成 {result['created']} / 更新 {result['updated']} / "
+                f"変更なし {result['unchanged']} / エラー {result['error_count']}）。"
+            )
+        )
@@ -1,6 +1,8 @@
-﻿from django.db.models.signals import post_migrate
+﻿from django.db.models.signals import post_migrate, post_save, post_delete
 from django.dispatch import receiver
-from .models import VisitType
+from .models import Guest, VisitSchedule, VisitType
+from utils.change_stamp_utils import touch_change_stamp
+from utils.reference_data_utils import reference_registry
 
 
 @receiver(post_migrate)
@@ -26,3 +28,21 @@ def create_default_visit_types(sender, **kwargs):
                 "color": visit["color"]
             }
         )
+
+
+@receiver([post_save, post_delete], sender=VisitType)
+def invalidate_reference_data(sender, **kwargs):
+    """
+    来訪種別が変更されたら参照データキャッシュを破棄する。
+    """
+    reference_registry.invalidate(sender)
+
+
+@receiver([post_save, post_delete], sender=VisitSchedule)
+@receiver([post_save, post_delete], sender=Guest)
+@receiver([post_save, post_delete], sender=VisitType)
+def touch_collection_change_stamp(sender, **kwargs):
+    """
+    一覧の条件付き GET（ETag / Last-Modified）用に、コレクションの変更スタンプを更新する。
+    """
+    touch_change_stamp(sender)
@@ -136,3 +136,99 @@ class TestVisitScheduleViews:
         assert res.data["data"]["needs_breakfast"] is True
         assert res.data["data"]["needs_lunch"] is False
         assert res.data["data"]["needs_dinner"] is True
+
+
+@pytest.mark.django_db
+class TestVisitScheduleExportView:
+    """
+    来訪スケジュールのエクスポートAPIのテストクラス。
+    """
+
+    def setup_method(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser(
+            name=unique_name("admin"), password="admin123"
+        )
+        self.guest = Guest.objects.create(name="出力利用者", birthday="1950-01-01")
+        visit_type = VisitType.objects.create(code=unique_code("泊"), name="泊まり")
+        for day in (1, 2, 3):
+            VisitSchedule.objects.create(
+                guest=self.guest,
+                visit_type=visit_type,
+                date=date(2025, 4, day),
+                needs_lunch=True,
+                note="<特記>",
+            )
+
+    def test_export_xlsx(self):
+        """XLSX が有効な ZIP として流れ、期間で絞り込まれることのテスト"""
+        import io
+        import zipfile
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(
+            "/api/guest/schedules/export/",
+            {"file_format": "xlsx", "date_from": "2025-04-02", "date_to": "2025-04-03"},
+        )
+        assert response.status_code == 200
+        assert response.streaming
+
+        body = b"".join(response.streaming_content)
+        with zipfile.ZipFile(io.BytesIO(body)) as zf:
+            sheet = zf.read("xl/worksheets/sheet1.xml").decode("utf-8")
+        assert sheet.count("<row>") == 3
+        assert "2025-04-01" not in sheet
+        assert "出力利用者" in sheet
+        assert "&lt;特記&gt;" in sheet
+
+    def test_export_requires_admin(self):
+        """管理者以外はエクスポートできないことのテスト"""
+        response = self.client.get("/api/guest/schedules/export/")
+        assert response.status_code in (401, 403)
+
+
+@pytest.mark.django_db
+class TestVisitScheduleImportView:
+    """
+    来訪スケジュールの CSV 一括取り込みAPIのテストクラス。
+    """
+
+    def setup_method(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser(
+            name=unique_name("admin"), password="admin123"
+        )
+        self.guest = Guest.objects.create(name="取込利用者", birthday="1940-01-01")
+
+    def upload(self, body):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        self.client.force_authenticate(user=self.admin)
+        return self.client.post(
+            "/api/guest/schedules/import/",
+            {"file": SimpleUploadedFile("v.csv", body.encode("utf-8"), "text/csv")},
+            format="multipart",
+        )
+
+    def test_import_and_update(self):
+        """(利用者, 日付) で登録・更新され、不正な行だけがエラーになることのテスト"""
+        header = "日付,氏名,来訪種別,来所時間,帰宅時間,朝食,昼食,夕食,備考\n"
+        response = self.upload(
+            header
+            + "2025-04-01,取込利用者,通い,09:00,16:00,0,1,0,\n"
+            + "2025-04-02,取込利用者,泊,25:00,,1,1,1,\n"
+        )
+        assert response.status_code == 200
+        data = response.data["data"]
+        assert data["created"] == 1
+        assert data["errors"] == [{"line": 3, "errors": ["時刻の形式が不正です: 25:00"]}]
+
+        schedule = VisitSchedule.objects.get(guest=self.guest)
+        assert schedule.visit_type.code == "通い"
+        assert schedule.needs_lunch and not schedule.needs_dinner
+
+        response = self.upload(header + "2025-04-01,取込利用者,泊,,,1,1,1,外泊\n")
+        assert response.data["data"]["updated"] == 1
+        schedule.refresh_from_db()
+        assert schedule.visit_type.code == "泊"
+        assert schedule.note == "外泊"
@@ -7,6 +7,8 @@ from .views import (
     VisitScheduleListCreateView,
     VisitScheduleDetailView,
     ScheduleUploadView,
+    VisitScheduleExportView,
+    VisitScheduleImportView,
 )
 
 app_name = "guest"
@@ -46,6 +48,16 @@ urlpatterns = [
         VisitScheduleListCreateView.as_view(),
         name="schedule-list-create",  # GET: 一覧取得, POST: 登録
     ),
+    path(
+        "schedules/import/",
+        VisitScheduleImportView.as_view(),
+        name="schedule-import",  # POST: CSV 一括取り込み
+    ),
+    path(
+        "schedules/export/",
+        VisitScheduleExportView.as_view(),
+        name="schedule-export",  # GET: CSV / XLSX エクスポート
+    ),
     path(
         "schedules/<int:pk>/",
         VisitScheduleDetailView.as_view(),
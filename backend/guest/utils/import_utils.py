@@ -0,0 +1,70 @@
+from collections import defaultdict
+
+from guest.models import Guest, VisitType
+from guest.utils.schedule_utils import bulk_upsert_visit_schedules
+from utils.import_utils import (
+    IMPORT_BATCH_SIZE,
+    ImportRowError,
+    open_csv_stream,
+    parse_bool,
+    parse_date,
+    parse_fields,
+    parse_time,
+    pick,
+    resolve,
+    run_csv_import,
+)
+from utils.reference_data_utils import reference_registry
+
+
+def import_visit_schedule_csv(fileobj, batch_size=IMPORT_BATCH_SIZE):
+    """
+    来訪スケジュールの CSV を1行ずつ読み込み、batch_size 行毎に一括登録・更新する。
+
+    列（エクスポートと同じ見出し、または英語名）:
+        日付 / date、利用者ID / guest_id または 氏名 / guest、来訪種別 / visit_type（コードまたは名称）、
+        来所時間 / arrive_time、帰宅時間 / leave_time、朝食・昼食・夕食 / needs_*、備考 / note
+    任意列が無い場合は空（時刻なし・食事不要）として登録する。
+
+    Returns:
+        dict: rows / created / updated / unchanged / error_count / errors（行番号とメッセージ）
+    """
+    guest_ids = set()
+    guest_by_name = defaultdict(list)
+    for guest_id, name in Guest.objects.values_list("id", "name"):
+        guest_ids.add(guest_id)
+        guest_by_name[name].append(guest_id)
+    visit_types = reference_registry.snapshot(VisitType)
+
+    def parse_visit_type(value):
+        if not value:
+            return None
+        visit_type = visit_types.by_code.get(value) or visit_types.by_name.get(value)
+        if visit_type is None:
+            raise ImportRowError(f"来訪種別が存在しません: {value}")
+        return visit_type.id
+
+    def parse_row(row):
+        return parse_fields(
+            date=lambda: parse_date(pick(row, "日付", "date")),
+            guest_id=lambda: resolve(
+                pick(row, "利用者ID", "guest_id") or pick(row, "氏名", "guest"),
+                guest_ids,
+                guest_by_name,
+                "利用者",
+            ),
+            visit_type_id=lambda: parse_visit_type(pick(row, "来訪種別", "visit_type")),
+            arrive_time=lambda: parse_time(pick(row, "来所時間", "arrive_time")),
+            leave_time=lambda: parse_time(pick(row, "帰宅時間", "leave_time")),
+            needs_breakfast=lambda: parse_bool(pick(row, "朝食", "needs_breakfast")),
+            needs_lunch=lambda: parse_bool(pick(row, "昼食", "needs_lunch")),
+            needs_dinner=lambda: parse_bool(pick(row, "夕食", "needs_dinner")),
+            note=lambda: pick(row, "備考", "note") or None,
+        )
+
+    return run_csv_import(
+        open_csv_stream(fileobj),
+        parse_row,
+        lambda entries: bulk_upsert_visit_schedules(entries, batch_size=batch_size),
+        batch_size=batch_size,
+    )
@@ -5,6 +5,7 @@ import cv2
 from PIL import Image
 from yomitoku import DocumentAnalyzer
 from guest.models import Guest, VisitType, VisitSchedule
+from utils.reference_data_utils import reference_registry
 
 # OCR 出力文字と VisitType.name の対応辞書
 VISIT_TYPE_MAPPING = {
@@ -114,6 +115,7 @@ class ScheduleOCRProcessor:
         - 保存件数を返す
         """
         guest, _ = Guest.objects.get_or_create(name=self.guest_name)
+        visit_types = reference_registry.snapshot(VisitType).by_name
         created_count = 0
 
         for item in self.schedule:
@@ -121,9 +123,8 @@ class ScheduleOCRProcessor:
             visit_type_name = item["type"]
 
             print(f"\U0001f4c5 保存中: {date} - {visit_type_name}")
-            try:
-                visit_type = VisitType.objects.get(name=visit_type_name)
-            except VisitType.DoesNotExist:
+            visit_type = visit_types.get(visit_type_name)
+            if visit_type is None:
                 print(f"⚠️ VisitType 不存在: {visit_type_name}")
                 continue
 
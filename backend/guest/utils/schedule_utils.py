@@ -0,0 +1,75 @@
+from django.db import transaction
+
+from guest.models import VisitSchedule
+from utils.change_stamp_utils import touch_change_stamp
+from utils.model_utils import meal_needs_changed
+
+# (guest, date) 以外に一括登録で書き込む列
+VISIT_SCHEDULE_FIELDS = (
+    "visit_type_id",
+    "arrive_time",
+    "leave_time",
+    "needs_breakfast",
+    "needs_lunch",
+    "needs_dinner",
+    "note",
+)
+
+
+def bulk_upsert_visit_schedules(entries, batch_size=500):
+    """
+    来訪スケジュールを (guest, date) のユニークキーで一括登録・更新する。
+
+    既存行を1クエリで読み込んで差分を判定し、変更のある行だけを
+    1トランザクション内の INSERT ... ON CONFLICT DO UPDATE で書き込む。
+    bulk_create は保存シグナルを発行しないため、一覧の変更スタンプの更新と
+    食事注文の同期（meal_needs_changed）はここで行う。
+
+    Args:
+        entries (iterable(dict)): guest_id / date と VISIT_SCHEDULE_FIELDS の辞書。同じキーは後勝ち。
+        batch_size (int): 1回の INSERT 文に含める最大行数
+
+    Returns:
+        dict: created / updated / unchanged の件数
+    """
+    desired = {(e["guest_id"], e["date"]): e for e in entries}
+    summary = {"created": 0, "updated": 0, "unchanged": 0}
+    if not desired:
+        return summary
+
+    guest_ids = {guest_id for guest_id, _ in desired}
+    dates = [day for _, day in desired]
+
+    with transaction.atomic():
+        existing = {
+            (row[0], row[1]): row[2:]
+            for row in VisitSchedule.objects.filter(
+                guest_id__in=guest_ids, date__range=(min(dates), max(dates))
+            ).values_list("guest_id", "date", *VISIT_SCHEDULE_FIELDS)
+        }
+
+        to_write = []
+        for key, entry in desired.items():
+            values = tuple(entry[field] for field in VISIT_SCHEDULE_FIELDS)
+            current = existing.get(key)
+            if current == values:
+                summary["unchanged"] += 1
+                continue
+            summary["updated" if current is not None else "created"] += 1
+            to_write.append(VisitSchedule(**entry))
+
+        VisitSchedule.objects.bulk_create(
+            to_write,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=["guest", "date"],
+            update_fields=[field.removesuffix("_id") for field in VISIT_SCHEDULE_FIELDS],
+        )
+        if to_write:
+            touch_change_stamp(VisitSchedule)
+            meal_needs_changed.send(
+                sender=VisitSchedule,
+                keys=[(row.guest_id, row.date) for row in to_write],
+            )
+
+    return summary
@@ -5,8 +5,18 @@ from rest_framework.permissions import IsAdminUser, IsAuthenticatedOrReadOnly
 from drf_spectacular.utils import extend_schema, OpenApiResponse
 
 import tempfile
+from io import TextIOWrapper
 from utils.api_response_utils import api_response
+from utils.change_stamp_utils import conditional_on_change_stamps
+from utils.import_utils import CsvImportSerializer, check_encoding
+from utils.export_utils import (
+    EXPORT_CHUNK_SIZE,
+    ExportQuerySerializer,
+    filter_date_range,
+    streaming_export_response,
+)
 from guest.utils.ocr_utils import ScheduleOCRProcessor
+from guest.utils.import_utils import import_visit_schedule_csv
 
 from .models import Guest, VisitType, VisitSchedule
 from .serializers import (
@@ -224,8 +234,12 @@ class VisitScheduleListCreateView(APIView):
         operation_id="VisitScheduleList",
         summary="スケジュール一覧の取得",
         tags=["利用者管理"],
-        responses={200: OpenApiResponse(description="スケジュール一覧取得成功")},
+        responses={
+            200: OpenApiResponse(description="スケジュール一覧取得成功"),
+            304: OpenApiResponse(description="前回取得時から変更なし（If-None-Match / If-Modified-Since）"),
+        },
     )
+    @conditional_on_change_stamps(VisitSchedule, Guest, VisitType)
     def get(self, request):
         qs = self.model.objects.all()
         serializer = self.serializer_class(qs, many=True)
@@ -354,3 +368,110 @@ class ScheduleUploadView(APIView):
                 "month": result["month"],
             },
         )
+
+
+class VisitScheduleExportView(APIView):
+    """
+    来訪スケジュールのエクスポート（CSV / XLSX をストリーミングで返す）
+    """
+
+    permission_classes = [IsAdminUser]
+    HEADER = [
+        "日付",
+        "利用者ID",
+        "氏名",
+        "来訪種別",
+        "来所時間",
+        "帰宅時間",
+        "朝食",
+        "昼食",
+        "夕食",
+        "備考",
+    ]
+
+    @extend_schema(
+        operation_id="VisitScheduleExport",
+        summary="来訪スケジュールのエクスポート",
+        description="期間（date_from〜date_to）の来訪スケジュールを1行ずつ読み出し、CSV / XLSX として逐次返す。",
+        tags=["利用者管理"],
+        parameters=[ExportQuerySerializer],
+        responses={
+            200: OpenApiResponse(description="ファイル（CSV / XLSX）"),
+            400: OpenApiResponse(description="クエリパラメータエラー"),
+        },
+    )
+    def get(self, request):
+        query = ExportQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return api_response(
+                code=400, message="バリデーションエラー", data=query.errors
+            )
+        params = query.validated_data
+
+        qs = filter_date_range(
+            VisitSchedule.objects.all(), params.get("date_from"), params.get("date_to")
+        )
+        rows = (
+            qs.order_by("date", "guest_id")
+            .values_list(
+                "date",
+                "guest_id",
+                "guest__name",
+                "visit_type__code",
+                "arrive_time",
+                "leave_time",
+                "needs_breakfast",
+                "needs_lunch",
+                "needs_dinner",
+                "note",
+            )
+            .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        )
+        return streaming_export_response(
+            "visit_schedules", self.HEADER, rows, params["file_format"]
+        )
+
+
+class VisitScheduleImportView(APIView):
+    """
+    来訪スケジュールの CSV 一括取り込み
+    """
+
+    permission_classes = [IsAdminUser]
+    serializer_class = CsvImportSerializer
+
+    @extend_schema(
+        operation_id="VisitScheduleImport",
+        summary="来訪スケジュールの CSV 一括取り込み",
+        description="CSVを1行ずつ読み込み、(利用者, 日付) のユニークキーで一定行数毎に一括登録・更新する。解釈できない行は行番号付きのエラーとして返し、他の行の登録は続ける。",
+        tags=["利用者管理"],
+        request={"multipart/form-data": CsvImportSerializer},
+        responses={
+            200: OpenApiResponse(description="取り込み完了（行毎のエラーを含む）"),
+            400: OpenApiResponse(description="バリデーションエラー"),
+        },
+    )
+    def post(self, request):
+        ser = self.serializer_class(data=request.data)
+        if not ser.is_valid():
+            return api_response(code=400, message="バリデーションエラー", data=ser.errors)
+        params = ser.validated_data
+
+        upload = params["file"].file
+        try:
+            # 途中のバッチまで登録されてから失敗しないよう、書き込む前に全体を確かめる
+            check_encoding(upload, params["encoding"])
+        except UnicodeDecodeError:
+            return api_response(
+                code=400, message="文字コードが正しくありません。encoding を確認してください。"
+            )
+
+        result = import_visit_schedule_csv(
+            TextIOWrapper(upload, encoding=params["encoding"], newline=""),
+            batch_size=params["batch_size"],
+        )
+
+        return api_response(
+            message=f"{result['rows'] - result['error_count']}件を取り込みました（エラー{result['error_count']}件）。",
+            data=result,
+        )
@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import MealType, MealOrder
+from .models import MealType, MealOrder, MealOrderDailyCount, MealOrderGenerationState
 
 admin.site.register(MealType)
 admin.site.register(MealOrder)
+admin.site.register(MealOrderDailyCount)
+admin.site.register(MealOrderGenerationState)
@@ -0,0 +1,75 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from meal.utils.pregenerate_utils import pregenerate_meal_orders, start_pregeneration_scheduler
+
+
+def parse_date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"日付はYYYY-MM-DD形式で指定してください: {value}")
+
+
+class Command(BaseCommand):
+    help = "今日から数日先までの食事注文を、スケジュールが変わった日だけ並列に事前生成する"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", help="開始日（YYYY-MM-DD。省略時は今日）")
+        parser.add_argument("--days", type=int, help="日数（省略時は設定値）")
+        parser.add_argument("--workers", type=int, help="並列数（省略時は設定値）")
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="スケジュールが変わっていない日も生成し直す",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="終了せず、一定間隔で今日からの期間を生成し続ける",
+        )
+        parser.add_argument("--interval", type=int, help="--loop の実行間隔（分。省略時は設定値）")
+
+    def handle(self, *args, **options):
+        if options["days"] is not None and options["days"] < 1:
+            raise CommandError("日数は1以上で指定してください")
+        if options["workers"] is not None and options["workers"] < 1:
+            raise CommandError("並列数は1以上で指定してください")
+        params = {
+            "days": options["days"],
+            "workers": options["workers"],
+            "force": options["force"],
+        }
+
+        if options["loop"]:
+            if options["start"]:
+                raise CommandError("--loop と --start は同時に指定できません")
+            thread, stop_event = start_pregeneration_scheduler(options["interval"], **params)
+            self.stdout.write("食事注文の事前生成を開始しました（Ctrl+C で終了）。")
+            try:
+                while thread.is_alive():
+                    thread.join(timeout=1)
+            except KeyboardInterrupt:
+                stop_event.set()
+                thread.join()
+            return
+
+        start = parse_date(options["start"]) if options["start"] else None
+        results = pregenerate_meal_orders(start_date=start, **params)
+        for r in results:
+            if r.get("error"):
+                self.stderr.write(f"{r['date']}: 失敗しました")
+            elif r["skipped"]:
+                self.stdout.write(f"{r['date']}: 変更なし（{r['duration_ms']}ms）")
+            else:
+                self.stdout.write(
+                    f"{r['date']}: 作成{r['created']}件 更新{r['updated']}件 "
+                    f"削除{r['deleted']}件（{r['duration_ms']}ms）"
+                )
+        if any(r.get("error") for r in results):
+            raise CommandError("生成に失敗した日があります。")
+        generated = sum(1 for r in results if not r["skipped"])
+        self.stdout.write(
+            self.style.SUCCESS(f"{len(results)}日中{generated}日の食事注文を生成しました。")
+        )
@@ -0,0 +1,45 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from meal.utils.rollup_utils import rebuild_meal_daily_counts, verify_meal_daily_counts
+
+
+def parse_date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"日付はYYYY-MM-DD形式で指定してください: {value}")
+
+
+class Command(BaseCommand):
+    help = "食事注文の日別件数（MealOrderDailyCount）を食事注文から作り直す・検証する"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", required=True, help="開始日（YYYY-MM-DD）")
+        parser.add_argument("--end", required=True, help="終了日（YYYY-MM-DD）")
+        parser.add_argument(
+            "--verify-only",
+            action="store_true",
+            help="作り直さずに保存済みの日別件数を検証する",
+        )
+
+    def handle(self, *args, **options):
+        start = parse_date(options["start"])
+        end = parse_date(options["end"])
+        if start > end:
+            raise CommandError("終了日は開始日以降の日付を指定してください")
+
+        if not options["verify_only"]:
+            count = rebuild_meal_daily_counts(start, end)
+            self.stdout.write(f"{count}件の日別件数を作成しました。")
+
+        mismatches = verify_meal_daily_counts(start, end)
+        for m in mismatches:
+            self.stderr.write(
+                f"不一致: date={m['date']} meal_type={m['meal_type_id']} kind={m['kind']} "
+                f"stored={m['stored']} expected={m['expected']}"
+            )
+        if mismatches:
+            raise CommandError(f"{len(mismatches)}件の不一致があります。")
+        self.stdout.write(self.style.SUCCESS("日別件数の検証に成功しました。"))
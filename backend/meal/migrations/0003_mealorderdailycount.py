@@ -0,0 +1,65 @@
+# Generated by Django 4.2.30 on 2026-10-17 15:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Case, CharField, Count, Value, When
+
+
+def backfill_daily_counts(apps, schema_editor):
+    """
+    既存の食事注文から日別件数を作成する。
+    """
+    MealOrder = apps.get_model("meal", "MealOrder")
+    MealOrderDailyCount = apps.get_model("meal", "MealOrderDailyCount")
+
+    rows = (
+        MealOrder.objects.annotate(
+            kind=Case(
+                When(guest__isnull=False, then=Value("guest")),
+                default=Value("staff"),
+                output_field=CharField(),
+            )
+        )
+        .values("date", "meal_type_id", "kind")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    MealOrderDailyCount.objects.bulk_create(
+        [
+            MealOrderDailyCount(
+                date=row["date"],
+                meal_type_id=row["meal_type_id"],
+                kind=row["kind"],
+                count=row["count"],
+            )
+            for row in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meal', '0002_force_nullable_staff_guest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MealOrderDailyCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='日付')),
+                ('kind', models.CharField(choices=[('guest', '利用者'), ('staff', 'スタッフ')], max_length=10, verbose_name='対象者種別')),
+                ('count', models.IntegerField(default=0, verbose_name='件数')),
+                ('meal_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='meal.mealtype', verbose_name='食事の種類')),
+            ],
+            options={
+                'verbose_name': '食事注文の日別件数',
+                'verbose_name_plural': '食事注文の日別件数',
+                'ordering': ['date', 'meal_type', 'kind'],
+                'unique_together': {('date', 'meal_type', 'kind')},
+            },
+        ),
+        migrations.RunPython(backfill_daily_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 4.2.30 on 2026-10-17 16:07
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+# 日別件数の作り直しは 0003 の初期投入と同じ処理
+backfill_daily_counts = import_module(
+    "meal.migrations.0003_mealorderdailycount"
+).backfill_daily_counts
+
+
+def deduplicate_meal_orders(apps, schema_editor):
+    """
+    ユニーク制約・チェック制約を追加する前に、既存の注文を制約に合うよう整理する。
+
+    - 利用者・スタッフの両方が入った注文は利用者の注文とする（日別件数の種別判定と同じ）
+    - どちらも入っていない注文は削除する
+    - 同じ (日付, 食事種類, 対象者) の重複は、手入力・注文ありの注文を優先して1件だけ残す
+    変更があった場合は日別件数を作り直す。
+    """
+    MealOrder = apps.get_model("meal", "MealOrder")
+    MealOrderDailyCount = apps.get_model("meal", "MealOrderDailyCount")
+
+    changed = MealOrder.objects.filter(guest__isnull=False, staff__isnull=False).update(
+        staff=None
+    )
+    changed += MealOrder.objects.filter(guest__isnull=True, staff__isnull=True).delete()[0]
+
+    to_delete = []
+    for person in ("guest", "staff"):
+        seen = set()
+        rows = (
+            MealOrder.objects.filter(**{f"{person}__isnull": False})
+            .order_by("date", "meal_type_id", f"{person}_id", "auto_generated", "-ordered", "id")
+            .values_list("id", "date", "meal_type_id", f"{person}_id")
+            .iterator(chunk_size=2000)
+        )
+        for order_id, *key in rows:
+            key = tuple(key)
+            if key in seen:
+                to_delete.append(order_id)
+            else:
+                seen.add(key)
+    for i in range(0, len(to_delete), 500):
+        MealOrder.objects.filter(id__in=to_delete[i : i + 500]).delete()
+    changed += len(to_delete)
+
+    if changed:
+        MealOrderDailyCount.objects.all().delete()
+        backfill_daily_counts(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meal', '0003_mealorderdailycount'),
+    ]
+
+    operations = [
+        migrations.RunPython(deduplicate_meal_orders, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='mealorder',
+            unique_together=set(),
+        ),
+        migrations.AddIndex(
+            model_name='mealorder',
+            index=models.Index(fields=['date', 'meal_type'], name='meal_order_date_type_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='mealorder',
+            constraint=models.UniqueConstraint(condition=models.Q(('guest__isnull', False)), fields=('date', 'meal_type', 'guest'), name='meal_order_unique_guest'),
+        ),
+        migrations.AddConstraint(
+            model_name='mealorder',
+            constraint=models.UniqueConstraint(condition=models.Q(('staff__isnull', False)), fields=('date', 'meal_type', 'staff'), name='meal_order_unique_staff'),
+        ),
+        migrations.AddConstraint(
+            model_name='mealorder',
+            constraint=models.CheckConstraint(check=models.Q(models.Q(('guest__isnull', False), ('staff__isnull', True)), models.Q(('guest__isnull', True), ('staff__isnull', False)), _connector='OR'), name='meal_order_guest_xor_staff'),
+        ),
+    ]
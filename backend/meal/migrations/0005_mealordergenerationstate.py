@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-17 16:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meal', '0004_unique_person_constraints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MealOrderGenerationState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True, verbose_name='日付')),
+                ('fingerprint', models.CharField(max_length=64, verbose_name='スケジュールの指紋')),
+                ('generated_at', models.DateTimeField(auto_now=True, verbose_name='生成日時')),
+                ('duration_ms', models.IntegerField(default=0, verbose_name='所要時間（ミリ秒）')),
+            ],
+            options={
+                'verbose_name': '食事注文の事前生成記録',
+                'verbose_name_plural': '食事注文の事前生成記録',
+                'ordering': ['date'],
+            },
+        ),
+    ]
@@ -64,7 +64,27 @@ class MealOrder(models.Model):
         return get_weekday_jp(self.date)
 
     class Meta:
-        unique_together = ("date", "meal_type", "guest", "staff")  # 1日1人1食の重複禁止
+        # 1日1人1食の重複禁止。guest / staff の片方は常に NULL のため、
+        # 対象者種別毎の条件付きユニーク制約にする（NULL を含む複合ユニークは効かない）
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "meal_type", "guest"],
+                condition=models.Q(guest__isnull=False),
+                name="meal_order_unique_guest",
+            ),
+            models.UniqueConstraint(
+                fields=["date", "meal_type", "staff"],
+                condition=models.Q(staff__isnull=False),
+                name="meal_order_unique_staff",
+            ),
+            models.CheckConstraint(
+                check=models.Q(guest__isnull=False, staff__isnull=True)
+                | models.Q(guest__isnull=True, staff__isnull=False),
+                name="meal_order_guest_xor_staff",
+            ),
+        ]
+        # 条件付きユニーク制約の索引は対象者種別を絞らない日付範囲の検索に使えないため、別に持つ
+        indexes = [models.Index(fields=["date", "meal_type"], name="meal_order_date_type_idx")]
         verbose_name = "食事の注文"
         verbose_name_plural = "食事の注文"
 
@@ -74,3 +94,53 @@ class MealOrder(models.Model):
         """
         target = self.guest or self.staff
         return f"{self.date} - {target.name} - {self.meal_type.name} - {'○' if self.ordered else '×'}"
+
+
+class MealOrderDailyCount(models.Model):
+    """
+    日付 × 食事種類 × 対象者種別（利用者 / スタッフ）毎の食事注文件数（集計テーブル）
+    - 食事注文の保存・削除時と一括生成時に差分で更新される
+    - 厨房・請求向けの長期間の集計は、注文を数え直さずにこの表を読む
+    """
+
+    KIND_CHOICES = [
+        ("guest", "利用者"),
+        ("staff", "スタッフ"),
+    ]
+
+    date = models.DateField(verbose_name="日付")
+    meal_type = models.ForeignKey(
+        MealType, on_delete=models.CASCADE, verbose_name="食事の種類"
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, verbose_name="対象者種別")
+    count = models.IntegerField(default=0, verbose_name="件数")
+
+    class Meta:
+        unique_together = ("date", "meal_type", "kind")
+        ordering = ["date", "meal_type", "kind"]
+        verbose_name = "食事注文の日別件数"
+        verbose_name_plural = "食事注文の日別件数"
+
+    def __str__(self):
+        return f"{self.date} - {self.meal_type.name} - {self.get_kind_display()}: {self.count}"
+
+
+class MealOrderGenerationState(models.Model):
+    """
+    食事注文の事前生成（pregenerate_meal_orders）の日毎の実行記録
+    - 前回生成時の勤務・来所スケジュールの指紋（fingerprint）を保持し、
+      変わっていない日は次回の生成を省く
+    """
+
+    date = models.DateField(unique=True, verbose_name="日付")
+    fingerprint = models.CharField(max_length=64, verbose_name="スケジュールの指紋")
+    generated_at = models.DateTimeField(auto_now=True, verbose_name="生成日時")
+    duration_ms = models.IntegerField(default=0, verbose_name="所要時間（ミリ秒）")
+
+    class Meta:
+        ordering = ["date"]
+        verbose_name = "食事注文の事前生成記録"
+        verbose_name_plural = "食事注文の事前生成記録"
+
+    def __str__(self):
+        return f"{self.date} - {self.generated_at:%Y-%m-%d %H:%M}"
@@ -1,11 +1,14 @@
 ﻿from rest_framework import serializers
 import datetime
 
-from .models import MealType, MealOrder
+from .models import MealType, MealOrder, MealOrderDailyCount
 from guest.models import Guest
 from staff.models import Staff
 
+from meal.utils.batch_utils import MAX_BATCH_ITEMS
+from meal.utils.manifest_utils import MAX_MANIFEST_DAYS
 from utils.date_utils import get_weekday_jp
+from utils.export_utils import EXPORT_FORMATS
 
 
 class MealTypeSerializer(serializers.ModelSerializer):
@@ -149,7 +152,146 @@ class StaffMealOrderSerializer(serializers.ModelSerializer):
 class MealOrderGenerateSerializer(serializers.Serializer):
     """
     MealOrderAutoGenerateView 用のリクエストシリアライザー。
-    指定日付（date）のバリデーションを行う。
+    指定日付（date）または期間（start_date / end_date）のバリデーションを行う。
     """
 
-    date = serializers.DateField(help_text="対象日（例：2025-04-28）")
+    MAX_DAYS = 93
+
+    date = serializers.DateField(required=False, help_text="対象日（例：2025-04-28）")
+    start_date = serializers.DateField(required=False, help_text="開始日")
+    end_date = serializers.DateField(required=False, help_text="終了日（含む）")
+
+    def validate(self, attrs):
+        """date か start_date / end_date のどちらかを指定し、期間は最大日数以内であること"""
+        if attrs.get("date"):
+            attrs["start_date"] = attrs["end_date"] = attrs["date"]
+            return attrs
+
+        start_date = attrs.get("start_date")
+        end_date = attrs.get("end_date")
+        if not start_date or not end_date:
+            raise serializers.ValidationError(
+                {"date": ["date または start_date と end_date を指定してください。"]}
+            )
+        if start_date > end_date:
+            raise serializers.ValidationError(
+                {"end_date": ["終了日は開始日以降の日付を指定してください。"]}
+            )
+        if (end_date - start_date).days + 1 > self.MAX_DAYS:
+            raise serializers.ValidationError(
+                {"end_date": [f"期間は最大{self.MAX_DAYS}日までです。"]}
+            )
+        return attrs
+
+
+class MealManifestQuerySerializer(serializers.Serializer):
+    """
+    MealManifestView 用のクエリパラメータを検証するシリアライザー。
+    指定日付（date）または期間（start_date / end_date）と出力形式を受け取る。
+    """
+
+    date = serializers.DateField(required=False, help_text="対象日（例：2025-04-28）")
+    start_date = serializers.DateField(required=False, help_text="開始日")
+    end_date = serializers.DateField(required=False, help_text="終了日（含む）")
+    file_format = serializers.ChoiceField(
+        choices=["json", *EXPORT_FORMATS],
+        default="json",
+        help_text="出力形式（json / 印刷用の csv / xlsx）",
+    )
+
+    def validate(self, attrs):
+        """date か start_date / end_date のどちらかを指定し、期間は最大日数以内であること"""
+        if attrs.get("date"):
+            attrs["start_date"] = attrs["end_date"] = attrs["date"]
+            return attrs
+
+        start_date = attrs.get("start_date")
+        end_date = attrs.get("end_date")
+        if not start_date or not end_date:
+            raise serializers.ValidationError(
+                {"date": ["date または start_date と end_date を指定してください。"]}
+            )
+        if start_date > end_date:
+            raise serializers.ValidationError(
+                {"end_date": ["終了日は開始日以降の日付を指定してください。"]}
+            )
+        if (end_date - start_date).days + 1 > MAX_MANIFEST_DAYS:
+            raise serializers.ValidationError(
+                {"end_date": [f"期間は最大{MAX_MANIFEST_DAYS}日までです。"]}
+            )
+        return attrs
+
+
+class MealOrderListQuerySerializer(serializers.Serializer):
+    """
+    食事注文一覧取得時のクエリパラメータ（絞り込み・ページング）を検証するシリアライザー
+    """
+
+    date = serializers.DateField(required=False, help_text="対象日")
+    date_from = serializers.DateField(required=False, help_text="開始日（以上）")
+    date_to = serializers.DateField(required=False, help_text="終了日（以下）")
+    meal_type_id = serializers.IntegerField(required=False, help_text="食事種類ID")
+    kind = serializers.ChoiceField(
+        choices=MealOrderDailyCount.KIND_CHOICES,
+        required=False,
+        help_text="対象者種別（guest / staff）",
+    )
+    ordered = serializers.BooleanField(
+        required=False, allow_null=True, default=None, help_text="注文あり / なし"
+    )
+    cursor = serializers.CharField(required=False, help_text="次ページ用カーソル")
+    limit = serializers.IntegerField(
+        required=False, min_value=1, help_text="1ページの件数（最大500）"
+    )
+
+    def validate(self, attrs):
+        """date は date_from / date_to と同時に指定できない。開始日・終了日の前後関係をチェック"""
+        if attrs.get("date"):
+            if attrs.get("date_from") or attrs.get("date_to"):
+                raise serializers.ValidationError(
+                    {"date": ["date と date_from / date_to は同時に指定できません。"]}
+                )
+            attrs["date_from"] = attrs["date_to"] = attrs.pop("date")
+        date_from = attrs.get("date_from")
+        date_to = attrs.get("date_to")
+        if date_from and date_to and date_from > date_to:
+            raise serializers.ValidationError(
+                {"date_to": ["終了日は開始日以降の日付を指定してください。"]}
+            )
+        return attrs
+
+
+class MealOrderBatchItemSerializer(serializers.Serializer):
+    """
+    食事注文の一括登録・更新の1項目。
+    id を指定すると更新、省略すると登録になる。存在・重複・過去日付のチェックは一括処理側でまとめて行う。
+    一括で登録・更新した注文は手入力扱い（auto_generated=False）になる。
+    """
+
+    id = serializers.IntegerField(required=False, help_text="更新する注文のID")
+    date = serializers.DateField(help_text="日付")
+    meal_type_id = serializers.IntegerField(help_text="食事種類ID")
+    guest_id = serializers.IntegerField(required=False, allow_null=True, help_text="利用者ID")
+    staff_id = serializers.IntegerField(required=False, allow_null=True, help_text="スタッフID")
+    ordered = serializers.BooleanField(required=False, help_text="注文あり")
+    note = serializers.CharField(
+        required=False, allow_blank=True, allow_null=True, help_text="備考"
+    )
+
+    def validate(self, attrs):
+        """利用者かスタッフのどちらか一方を指定すること"""
+        if bool(attrs.get("guest_id")) == bool(attrs.get("staff_id")):
+            raise serializers.ValidationError(
+                "guest_id と staff_id のどちらか一方を指定してください。"
+            )
+        return attrs
+
+
+class MealOrderBatchSerializer(serializers.Serializer):
+    """
+    MealOrderBatchView 用のリクエストシリアライザー
+    """
+
+    orders = MealOrderBatchItemSerializer(
+        many=True, allow_empty=False, max_length=MAX_BATCH_ITEMS, help_text="食事注文の一覧"
+    )
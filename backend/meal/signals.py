@@ -1,8 +1,19 @@
 # meal/signals.py
 
-from django.db.models.signals import post_migrate
+from django.db.models.signals import post_migrate, pre_save, post_save, post_delete
 from django.dispatch import receiver
-from .models import MealType
+from guest.models import VisitSchedule
+from staff.models import WorkSchedule
+from .models import MealOrder, MealType
+from .utils.manifest_utils import touch_manifest_dates
+from .utils.order_utils import queue_meal_order_sync
+from .utils.rollup_utils import MealCountDelta, order_kind
+from utils.change_stamp_utils import touch_change_stamp
+from utils.model_utils import meal_needs_changed
+from utils.reference_data_utils import reference_registry
+
+# 食事注文の対象者となるスケジュールモデル → MealOrder のフィールド名
+SCHEDULE_OWNERS = {WorkSchedule: "staff", VisitSchedule: "guest"}
 
 
 @receiver(post_migrate)
@@ -28,3 +39,143 @@ def create_default_meal_types(sender, **kwargs):
         )
         if created:
             print(f"[Init] MealType '{meal['display_name']}' を作成しました。")
+
+
+@receiver([post_save, post_delete], sender=MealType)
+def invalidate_reference_data(sender, **kwargs):
+    """
+    食事種類が変更されたら参照データキャッシュを破棄する。
+    """
+    reference_registry.invalidate(sender)
+
+
+@receiver([post_save, post_delete], sender=MealOrder)
+@receiver([post_save, post_delete], sender=MealType)
+def touch_collection_change_stamp(sender, **kwargs):
+    """
+    一覧の条件付き GET（ETag / Last-Modified）用に、コレクションの変更スタンプを更新する。
+    """
+    touch_change_stamp(sender)
+
+
+@receiver(pre_save, sender=WorkSchedule)
+@receiver(pre_save, sender=VisitSchedule)
+def remember_previous_meal_key(sender, instance, raw=False, **kwargs):
+    """
+    更新前の (対象者, 日付) を保持しておき、対象者・日付が変わった場合に元の注文も同期する。
+    """
+    instance._previous_meal_key = None
+    if raw or instance.pk is None:
+        return
+    owner = SCHEDULE_OWNERS[sender]
+    instance._previous_meal_key = (
+        sender.objects.filter(pk=instance.pk).values_list(f"{owner}_id", "date").first()
+    )
+
+
+@receiver([post_save, post_delete], sender=WorkSchedule)
+@receiver([post_save, post_delete], sender=VisitSchedule)
+def sync_meal_orders_on_schedule_change(sender, instance, raw=False, **kwargs):
+    """
+    スケジュールの登録・更新・削除を、その (対象者, 日付) の食事注文に反映する。
+    同期はコミット後にまとめて行う（手入力の注文は変更しない）。
+    """
+    if raw:
+        return
+    owner = SCHEDULE_OWNERS[sender]
+    keys = [(getattr(instance, f"{owner}_id"), instance.date)]
+    previous = getattr(instance, "_previous_meal_key", None)
+    if previous is not None:
+        keys.append(previous)
+    queue_meal_order_sync(owner, keys)
+
+
+@receiver(meal_needs_changed)
+def sync_meal_orders_on_bulk_change(sender, keys, **kwargs):
+    """
+    一括登録などシグナルを出さない書き込みの後に送られる meal_needs_changed を食事注文に反映する。
+    """
+    owner = SCHEDULE_OWNERS.get(sender)
+    if owner is not None and keys:
+        queue_meal_order_sync(owner, keys)
+
+
+@receiver(pre_save, sender=MealOrder)
+def remember_previous_order(sender, instance, raw=False, **kwargs):
+    """
+    更新前の日付・食事種類・対象者を保持しておき、日別件数の差分計算に使う。
+    """
+    instance._previous_count_key = None
+    if raw or instance.pk is None:
+        return
+    instance._previous_count_key = (
+        sender.objects.filter(pk=instance.pk)
+        .values_list("date", "meal_type_id", "guest_id")
+        .first()
+    )
+
+
+@receiver(post_save, sender=MealOrder)
+def update_daily_count_on_save(sender, instance, raw=False, **kwargs):
+    """
+    食事注文の登録・更新を日別件数に差分で反映する。
+    """
+    if raw:
+        return
+    delta = MealCountDelta()
+    previous = getattr(instance, "_previous_count_key", None)
+    if previous is not None:
+        day, type_id, guest_id = previous
+        delta.add(day, type_id, order_kind(guest_id), sign=-1)
+    delta.add(instance.date, instance.meal_type_id, order_kind(instance.guest_id))
+    delta.apply()
+
+
+@receiver(post_delete, sender=MealOrder)
+def update_daily_count_on_delete(sender, instance, origin=None, **kwargs):
+    """
+    食事注文の削除を日別件数に差分で反映する。
+    食事種類の削除に伴う削除では、日別件数の行も同時に削除されるため何もしない。
+    """
+    if isinstance(origin, MealType):
+        return
+    delta = MealCountDelta()
+    delta.add(instance.date, instance.meal_type_id, order_kind(instance.guest_id), sign=-1)
+    delta.apply()
+
+
+@receiver([post_save, post_delete], sender=MealOrder)
+def invalidate_manifest_on_order_change(sender, instance, raw=False, **kwargs):
+    """
+    食事注文の登録・更新・削除で、その日（日付が変わった場合は元の日も）の配膳表キャッシュを無効にする。
+    """
+    if raw:
+        return
+    days = [instance.date]
+    previous = getattr(instance, "_previous_count_key", None)
+    if previous is not None:
+        days.append(previous[0])
+    touch_manifest_dates(days)
+
+
+@receiver([post_save, post_delete], sender=WorkSchedule)
+@receiver([post_save, post_delete], sender=VisitSchedule)
+def invalidate_manifest_on_schedule_change(sender, instance, raw=False, **kwargs):
+    """
+    配膳表はスケジュールの meal_note も載せるため、スケジュールの変更でもその日の配膳表キャッシュを無効にする。
+    """
+    if raw:
+        return
+    days = [instance.date]
+    previous = getattr(instance, "_previous_meal_key", None)
+    if previous is not None:
+        days.append(previous[1])
+    touch_manifest_dates(days)
+
+
+@receiver(meal_needs_changed)
+def invalidate_manifest_on_bulk_change(sender, keys, **kwargs):
+    """
+    一括登録などシグナルを出さない書き込みで meal_note が変わった日の配膳表キャッシュを無効にする。
+    """
+    touch_manifest_dates(day for _, day in keys)
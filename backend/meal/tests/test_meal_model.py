@@ -1,5 +1,6 @@
 ﻿import pytest
 from datetime import date
+from django.db import transaction
 from django.db.utils import IntegrityError
 
 from meal.models import MealType, MealOrder
@@ -82,19 +83,101 @@ class TestMealModels:
         )
         assert order.weekday_jp in ["月", "火", "水", "木", "金", "土", "日"]
 
-    # def test_unique_constraint(self):
-    #     """
-    #     guest + date + meal_type の組み合わせが重複した場合にエラーが発生するか
-    #     """
-    #     MealOrder.objects.create(
-    #         date=self.today,
-    #         meal_type=self.breakfast,
-    #         guest=self.guest,
-    #     )
-
-    #     with pytest.raises(IntegrityError):
-    #         MealOrder.objects.create(
-    #             date=self.today,
-    #             meal_type=self.breakfast,
-    #             guest=self.guest,
-    #         )
+    def test_unique_constraint(self):
+        """
+        guest + date + meal_type の組み合わせが重複した場合にエラーが発生するか
+        """
+        MealOrder.objects.create(
+            date=self.today,
+            meal_type=self.breakfast,
+            guest=self.guest,
+        )
+
+        with pytest.raises(IntegrityError), transaction.atomic():
+            MealOrder.objects.create(
+                date=self.today,
+                meal_type=self.breakfast,
+                guest=self.guest,
+            )
+
+    def test_guest_or_staff_constraint(self):
+        """
+        利用者・スタッフのどちらか一方だけが指定されていない場合にエラーが発生するか
+        """
+        with pytest.raises(IntegrityError), transaction.atomic():
+            MealOrder.objects.create(date=self.today, meal_type=self.breakfast)
+
+        with pytest.raises(IntegrityError), transaction.atomic():
+            MealOrder.objects.create(
+                date=self.today,
+                meal_type=self.lunch,
+                guest=self.guest,
+                staff=self.staff,
+            )
+
+
+@pytest.mark.django_db
+class TestReferenceRegistry:
+    """
+    参照データキャッシュ（reference_registry）のテストクラス。
+    """
+
+    def test_snapshot_is_reused_until_invalidated(self, django_assert_num_queries):
+        """変更がない間は共有の版番号を確認するだけで、保存シグナルで最新化されることのテスト"""
+        from utils.reference_data_utils import reference_registry
+
+        reference_registry.snapshot(MealType)
+        with django_assert_num_queries(1):
+            assert reference_registry.get_by_code(MealType, "朝").display_name == "朝食"
+
+        MealType.objects.create(name="間", display_name="間食")
+        assert reference_registry.get_by_code(MealType, "間").display_name == "間食"
+
+        MealType.objects.filter(name="間").first().delete()
+        assert reference_registry.get_by_code(MealType, "間") is None
+
+    def test_rolled_back_change_is_not_cached(
+        self, django_assert_num_queries, django_capture_on_commit_callbacks
+    ):
+        """ロールバックされた変更がキャッシュに入らず、版番号も更新されないことのテスト"""
+        from utils.reference_data_utils import reference_registry
+
+        from utils.change_stamp_utils import stamp_cache
+        from utils.reference_data_utils import VERSION_KEY
+
+        reference_registry.snapshot(MealType)
+        key = VERSION_KEY.format(label=MealType._meta.label)
+        version = stamp_cache.get(key)
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                MealType.objects.create(name="間", display_name="間食")
+                # 変更したトランザクションの中では変更後の行が見える
+                assert reference_registry.get_by_code(MealType, "間") is not None
+                raise RuntimeError
+        # ロールバックした行は見えず、版番号も更新されない
+        with django_assert_num_queries(1):
+            assert reference_registry.get_by_code(MealType, "間") is None
+        assert stamp_cache.get(key) == version
+
+        with django_capture_on_commit_callbacks(execute=True):
+            MealType.objects.filter(name="朝").update(display_name="朝ごはん")
+            reference_registry.invalidate(MealType)
+        assert reference_registry.get_by_code(MealType, "間") is None
+        assert reference_registry.get_by_code(MealType, "朝").display_name == "朝ごはん"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_rolled_back_change_is_not_seen_by_next_transaction():
+    """ロールバック後の次のトランザクションで、ロールバックした行が見えないことのテスト"""
+    from utils.reference_data_utils import reference_registry
+
+    reference_registry.snapshot(MealType)
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            MealType.objects.create(name="間", display_name="間食")
+            assert reference_registry.get_by_code(MealType, "間") is not None
+            raise RuntimeError
+
+    with transaction.atomic():
+        assert reference_registry.get_by_code(MealType, "間") is None
+        assert reference_registry.get_by_code(MealType, "朝").display_name == "朝食"
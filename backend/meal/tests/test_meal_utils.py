@@ -0,0 +1,508 @@
+import pytest
+from django.core.cache import cache
+from django.db import transaction
+from datetime import date, timedelta
+from django.contrib.auth import get_user_model
+
+from guest.models import Guest, VisitSchedule
+from meal.models import MealOrder, MealOrderDailyCount, MealOrderGenerationState, MealType
+from meal.utils import order_utils
+from meal.utils.manifest_utils import get_meal_manifest
+from meal.utils.pregenerate_utils import pregenerate_meal_orders
+from meal.utils.order_utils import generate_meal_orders_for_range, insert_meal_orders
+from meal.utils.rollup_utils import (
+    MealCountDelta,
+    rebuild_meal_daily_counts,
+    verify_meal_daily_counts,
+)
+from meal.utils.stats_utils import count_meal_orders
+from utils.reference_data_utils import reference_registry
+from guest.utils.schedule_utils import bulk_upsert_visit_schedules
+from staff.models import Role, ShiftType, Staff, WorkSchedule
+
+
+@pytest.mark.django_db
+class TestGenerateMealOrdersForRange:
+    """
+    期間指定の食事注文一括生成のテストクラス。
+    """
+
+    def setup_method(self):
+        role, _ = Role.objects.get_or_create(name="介護士")
+        shift = ShiftType.objects.get(code="日1")
+        self.start = date(2025, 6, 1)
+        self.end = date(2025, 6, 3)
+        self.staffs = [
+            Staff.objects.create(
+                name=f"食事{i}",
+                role=role,
+                user=get_user_model().objects.create_user(name=f"meal_user{i}"),
+            )
+            for i in range(3)
+        ]
+        for staff in self.staffs:
+            for offset in range(3):
+                WorkSchedule.objects.create(
+                    staff=staff,
+                    shift=shift,
+                    date=self.start + timedelta(days=offset),
+                    needs_lunch=True,
+                )
+        self.guest = Guest.objects.create(name="食事利用者")
+        self.visit = VisitSchedule.objects.create(
+            guest=self.guest,
+            date=self.start,
+            needs_breakfast=True,
+            needs_lunch=True,
+            needs_dinner=True,
+        )
+        self.lunch = MealType.objects.get(name="昼")
+
+    def test_generate_and_rerun(self, django_assert_max_num_queries):
+        """スタッフ数に依存しないクエリ数で生成され、再実行しても変わらないことのテスト"""
+        # 参照データ（食事種類）の版の確認と読み込みを含む
+        with django_assert_max_num_queries(13):
+            result = generate_meal_orders_for_range(self.start, self.end)
+
+        assert result["total"]["created"] == 3 * 3 + 3
+        assert [d["created"] for d in result["days"]] == [6, 3, 3]
+        assert MealOrder.objects.filter(guest=self.guest).count() == 3
+
+        result = generate_meal_orders_for_range(self.start, self.end)
+        assert result["total"]["created"] == 0
+        assert result["total"]["unchanged"] == 12
+
+    def test_apply_difference(self):
+        """不要になった自動生成の注文は削除し、手入力の注文は残すことのテスト"""
+        generate_meal_orders_for_range(self.start, self.end)
+
+        self.visit.needs_dinner = False
+        self.visit.save()
+        manual = MealOrder.objects.create(
+            date=self.end,
+            meal_type=MealType.objects.get(name="夕"),
+            staff=self.staffs[0],
+            auto_generated=False,
+        )
+        cancelled = MealOrder.objects.get(
+            date=self.start, meal_type=self.lunch, staff=self.staffs[1]
+        )
+        cancelled.ordered = False
+        cancelled.save()
+
+        result = generate_meal_orders_for_range(self.start, self.end)
+        assert result["days"][0]["deleted"] == 1
+        assert result["days"][0]["updated"] == 1
+        assert MealOrder.objects.filter(guest=self.guest).count() == 2
+        assert MealOrder.objects.filter(pk=manual.pk).exists()
+        cancelled.refresh_from_db()
+        assert cancelled.ordered is True
+
+
+@pytest.mark.django_db
+class TestMealOrderSync:
+    """
+    スケジュール変更からの食事注文の同期のテストクラス。
+    """
+
+    def setup_method(self):
+        role, _ = Role.objects.get_or_create(name="介護士")
+        self.shift = ShiftType.objects.get(code="日1")
+        self.staff = Staff.objects.create(
+            name="同期花子",
+            role=role,
+            user=get_user_model().objects.create_user(name="sync_user"),
+        )
+        self.guest = Guest.objects.create(name="同期利用者")
+        self.day = date(2025, 6, 10)
+        self.lunch = MealType.objects.get(name="昼")
+        self.dinner = MealType.objects.get(name="夕")
+
+    def orders(self, **filters):
+        return set(
+            MealOrder.objects.filter(date=self.day, **filters).values_list(
+                "meal_type__name", "auto_generated"
+            )
+        )
+
+    def test_save_and_delete(self, django_capture_on_commit_callbacks):
+        """登録・更新・削除で、その日の注文だけが作り直されることのテスト"""
+        with django_capture_on_commit_callbacks(execute=True):
+            schedule = WorkSchedule.objects.create(
+                staff=self.staff, shift=self.shift, date=self.day, needs_lunch=True
+            )
+        assert self.orders(staff=self.staff) == {("昼", True)}
+
+        with django_capture_on_commit_callbacks(execute=True):
+            schedule.needs_lunch = False
+            schedule.needs_dinner = True
+            schedule.save()
+        assert self.orders(staff=self.staff) == {("夕", True)}
+
+        with django_capture_on_commit_callbacks(execute=True):
+            schedule.delete()
+        assert self.orders(staff=self.staff) == set()
+
+    def test_manual_orders_are_kept(self, django_capture_on_commit_callbacks):
+        """手入力の注文は上書き・削除されないことのテスト"""
+        manual = MealOrder.objects.create(
+            date=self.day,
+            meal_type=self.lunch,
+            staff=self.staff,
+            ordered=False,
+            auto_generated=False,
+        )
+        MealOrder.objects.create(
+            date=self.day, meal_type=self.dinner, staff=self.staff, auto_generated=False
+        )
+
+        with django_capture_on_commit_callbacks(execute=True):
+            WorkSchedule.objects.create(
+                staff=self.staff, shift=self.shift, date=self.day, needs_lunch=True
+            )
+
+        assert self.orders(staff=self.staff) == {("昼", False), ("夕", False)}
+        manual.refresh_from_db()
+        assert manual.ordered is False
+
+    def test_changes_in_transaction_are_coalesced(
+        self, django_capture_on_commit_callbacks, monkeypatch
+    ):
+        """トランザクション内の複数の変更と一括登録が、コミット後の1回の同期にまとまることのテスト"""
+        calls = []
+        sync = order_utils.sync_meal_orders
+        monkeypatch.setattr(
+            order_utils, "sync_meal_orders", lambda keys: calls.append(keys) or sync(keys)
+        )
+
+        with django_capture_on_commit_callbacks(execute=True):
+            with transaction.atomic():
+                for offset in range(3):
+                    WorkSchedule.objects.create(
+                        staff=self.staff,
+                        shift=self.shift,
+                        date=self.day + timedelta(days=offset),
+                        needs_lunch=True,
+                    )
+                bulk_upsert_visit_schedules(
+                    [
+                        {
+                            "guest_id": self.guest.id,
+                            "date": self.day,
+                            "visit_type_id": None,
+                            "arrive_time": None,
+                            "leave_time": None,
+                            "needs_breakfast": True,
+                            "needs_lunch": False,
+                            "needs_dinner": False,
+                            "note": None,
+                        }
+                    ]
+                )
+
+        assert len(calls) == 1
+        assert len(calls[0]) == 4
+        assert MealOrder.objects.filter(staff=self.staff, meal_type=self.lunch).count() == 3
+        assert self.orders(guest=self.guest) == {("朝", True)}
+
+
+@pytest.mark.django_db
+class TestCountMealOrders:
+    """
+    複数期間の食事注文集計のテストクラス。
+    """
+
+    def setup_method(self):
+        self.guest = Guest.objects.create(name="集計利用者")
+        role, _ = Role.objects.get_or_create(name="介護士")
+        self.staff = Staff.objects.create(
+            name="集計花子",
+            role=role,
+            user=get_user_model().objects.create_user(name="stats_user"),
+        )
+        self.lunch = MealType.objects.get(name="昼")
+        self.dinner = MealType.objects.get(name="夕")
+        # 2025-06-02（月）〜 2025-06-04（水）
+        for offset in range(3):
+            day = date(2025, 6, 2) + timedelta(days=offset)
+            MealOrder.objects.create(date=day, meal_type=self.lunch, guest=self.guest)
+            MealOrder.objects.create(date=day, meal_type=self.lunch, staff=self.staff)
+        MealOrder.objects.create(date=date(2025, 6, 2), meal_type=self.dinner, guest=self.guest)
+
+    def test_many_periods_in_one_query(self, django_assert_num_queries):
+        """期間の数に関わらず1クエリで集計され、重なった期間もそれぞれ数えることのテスト"""
+        reference_registry.snapshot(MealType)
+        periods = [(date(2025, 6, 2), date(2025, 6, 3)), (date(2025, 6, 3), date(2025, 6, 4))]
+        periods += [(date(2025, m, 1), date(2025, m, 28)) for m in range(1, 13)]
+
+        with django_assert_num_queries(1 + 1):  # 集計 + 参照データの版の確認
+            results = count_meal_orders(periods)
+
+        assert results[0]["guest"] == {"昼食": 2, "夕食": 1}
+        assert results[0]["staff"] == {"昼食": 2}
+        assert results[0]["total"] == {"昼食": 4, "夕食": 1}
+        assert results[1]["total"] == {"昼食": 4}
+        assert results[7]["total"] == {"昼食": 6, "夕食": 1}
+        assert results[2]["total"] == {}
+
+    def test_breakdown(self):
+        """日付毎・曜日毎の内訳が返ることのテスト"""
+        period = [(date(2025, 6, 1), date(2025, 6, 30))]
+
+        by_day = count_meal_orders(period, breakdown="day")[0]["breakdown"]
+        assert [row["date"] for row in by_day] == [
+            date(2025, 6, 2),
+            date(2025, 6, 3),
+            date(2025, 6, 4),
+        ]
+        assert by_day[0]["guest"] == {"昼食": 1, "夕食": 1}
+
+        by_weekday = count_meal_orders(period, breakdown="weekday")[0]["breakdown"]
+        assert [row["weekday"] for row in by_weekday] == ["月", "火", "水"]
+        assert by_weekday[0]["total"] == {"昼食": 2, "夕食": 1}
+
+        with pytest.raises(ValueError):
+            count_meal_orders(period, breakdown="month")
+
+
+@pytest.mark.django_db
+class TestInsertMealOrders:
+    """
+    ON CONFLICT による食事注文の作成のテストクラス。
+    """
+
+    def test_skips_existing(self):
+        """既にある (日付, 食事種類, 対象者) は作成せず、作成した分だけを返すことのテスト"""
+        guest = Guest.objects.create(name="衝突利用者")
+        lunch = MealType.objects.get(name="昼")
+        dinner = MealType.objects.get(name="夕")
+        day = date(2025, 9, 1)
+        MealOrder.objects.create(guest=guest, meal_type=lunch, date=day, auto_generated=False)
+
+        created = insert_meal_orders(
+            [(day, lunch.id, "guest", guest.id), (day, dinner.id, "guest", guest.id)]
+        )
+
+        assert created == [(day, dinner.id, "guest", guest.id)]
+        assert MealOrder.objects.filter(guest=guest).count() == 2
+        assert MealOrder.objects.get(guest=guest, meal_type=lunch).auto_generated is False
+
+
+@pytest.mark.django_db
+class TestMealOrderDailyCount:
+    """
+    食事注文の日別件数（集計テーブル）のテストクラス。
+    """
+
+    def setup_method(self):
+        self.guest = Guest.objects.create(name="日別利用者")
+        self.lunch = MealType.objects.get(name="昼")
+        self.dinner = MealType.objects.get(name="夕")
+        self.day = date(2025, 7, 1)
+
+    def counts(self):
+        return {
+            (row.date, row.meal_type_id, row.kind): row.count
+            for row in MealOrderDailyCount.objects.filter(count__gt=0)
+        }
+
+    def test_kept_current_by_signals(self):
+        """注文の登録・更新・削除で日別件数が差分更新されることのテスト"""
+        order = MealOrder.objects.create(date=self.day, meal_type=self.lunch, guest=self.guest)
+        assert self.counts() == {(self.day, self.lunch.id, "guest"): 1}
+
+        order.meal_type = self.dinner
+        order.save()
+        assert self.counts() == {(self.day, self.dinner.id, "guest"): 1}
+
+        order.delete()
+        assert self.counts() == {}
+        assert verify_meal_daily_counts(self.day, self.day) == []
+
+    def test_kept_current_by_generator(self):
+        """一括生成（bulk_create）の分も日別件数に反映されることのテスト"""
+        VisitSchedule.objects.create(
+            guest=self.guest, date=self.day, needs_lunch=True, needs_dinner=True
+        )
+        generate_meal_orders_for_range(self.day, self.day)
+        assert self.counts() == {
+            (self.day, self.lunch.id, "guest"): 1,
+            (self.day, self.dinner.id, "guest"): 1,
+        }
+        assert verify_meal_daily_counts(self.day, self.day) == []
+
+    def test_delta_is_added_in_database(self, django_assert_num_queries):
+        """差分は既存行を読まずに1クエリで加算され、先に作られた行の件数を上書きしないことのテスト"""
+        key = (self.day, self.lunch.id, "guest")
+        first, second = MealCountDelta(), MealCountDelta()
+        first.add(*key)
+        second.add(*key)
+        second.add(*key)
+
+        # 両方が行の無い状態から差分を作り、順に反映する（同時に動いたトランザクションに相当）
+        with django_assert_num_queries(1):
+            first.apply()
+        second.apply()
+        assert self.counts() == {key: 3}
+
+        third = MealCountDelta()
+        third.add(*key, sign=-1)
+        third.apply()
+        assert self.counts() == {key: 2}
+
+    def test_rebuild(self):
+        """ずれた日別件数を検証で検出し、作り直せることのテスト"""
+        MealOrder.objects.create(date=self.day, meal_type=self.lunch, guest=self.guest)
+        MealOrderDailyCount.objects.update(count=5)
+
+        mismatches = verify_meal_daily_counts(self.day, self.day)
+        assert [(m["stored"], m["expected"]) for m in mismatches] == [(5, 1)]
+
+        assert rebuild_meal_daily_counts(self.day, self.day) == 1
+        assert verify_meal_daily_counts(self.day, self.day) == []
+
+
+@pytest.mark.django_db
+class TestMealManifest:
+    """
+    配膳表の作成とキャッシュのテストクラス。
+    """
+
+    def setup_method(self):
+        role, _ = Role.objects.get_or_create(name="介護士")
+        self.day = date(2025, 8, 1)
+        self.lunch = MealType.objects.get(name="昼")
+        self.guest = Guest.objects.create(name="配膳利用者")
+        self.staff = Staff.objects.create(
+            name="配膳スタッフ",
+            role=role,
+            user=get_user_model().objects.create_user(name="manifest_user"),
+        )
+        self.visit = VisitSchedule.objects.create(
+            guest=self.guest, date=self.day, needs_lunch=True, meal_note="刻み食"
+        )
+        WorkSchedule.objects.create(
+            staff=self.staff,
+            shift=ShiftType.objects.get(code="日1"),
+            date=self.day,
+            needs_lunch=True,
+        )
+        generate_meal_orders_for_range(self.day, self.day)
+
+    def lunch_of(self, manifest):
+        return next(m for m in manifest[0]["meals"] if m["meal_type"] == "昼")
+
+    def test_manifest(self, django_assert_num_queries):
+        """食事毎に氏名と食事の備考がまとまり、1クエリで作成されることのテスト"""
+        # 日付毎の版・変更スタンプを発行しておき、以降は作成の1クエリと版の確認だけになる
+        get_meal_manifest(self.day, self.day)
+        cache.clear()
+        with django_assert_num_queries(1 + 3):  # 作成 + 日付の版・変更スタンプ・参照データの版
+            manifest = get_meal_manifest(self.day, self.day)
+
+        lunch = self.lunch_of(manifest)
+        assert lunch["counts"] == {"guest": 1, "staff": 1, "total": 2}
+        assert lunch["guest"] == [
+            {"id": self.guest.id, "name": "配膳利用者", "meal_note": "刻み食", "note": ""}
+        ]
+        assert [d["name"] for d in lunch["staff"]] == ["配膳スタッフ"]
+
+    def test_cached_until_changed(
+        self, django_assert_num_queries, django_capture_on_commit_callbacks
+    ):
+        """キャッシュされ、その日の予定・注文が変わると作り直されることのテスト"""
+        get_meal_manifest(self.day, self.day)
+        with django_assert_num_queries(2):  # 日付の版と変更スタンプの確認だけ
+            get_meal_manifest(self.day, self.day)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            self.visit.meal_note = "ミキサー食"
+            self.visit.save()
+        lunch = self.lunch_of(get_meal_manifest(self.day, self.day))
+        assert lunch["guest"][0]["meal_note"] == "ミキサー食"
+
+        with django_capture_on_commit_callbacks(execute=True):
+            order = MealOrder.objects.get(staff=self.staff)
+            order.note = "持ち帰り"
+            order.save()
+        lunch = self.lunch_of(get_meal_manifest(self.day, self.day))
+        assert lunch["staff"][0]["note"] == "持ち帰り"
+
+    def test_too_long(self):
+        """最大日数を超える期間はエラーになることのテスト"""
+        with pytest.raises(ValueError):
+            get_meal_manifest(self.day, self.day + timedelta(days=7))
+
+
+@pytest.mark.django_db
+class TestPregenerateMealOrders:
+    """
+    食事注文の事前生成のテストクラス。
+    """
+
+    def setup_method(self):
+        self.start = date(2025, 10, 1)
+        self.guests = [Guest.objects.create(name=f"事前生成{i}") for i in range(2)]
+        self.visits = [
+            VisitSchedule.objects.create(
+                guest=guest, date=self.start + timedelta(days=i), needs_lunch=True
+            )
+            for i, guest in enumerate(self.guests)
+        ]
+
+    def test_skips_unchanged_days(self):
+        """スケジュールが変わっていない日は生成を省くことのテスト"""
+        results = pregenerate_meal_orders(self.start, days=3, workers=1)
+        assert [r["skipped"] for r in results] == [False, False, False]
+        assert [r["created"] for r in results] == [1, 1, 0]
+        assert MealOrderGenerationState.objects.count() == 3
+
+        results = pregenerate_meal_orders(self.start, days=3, workers=1)
+        assert [r["skipped"] for r in results] == [True, True, True]
+
+        self.visits[1].needs_dinner = True
+        self.visits[1].save()
+        results = pregenerate_meal_orders(self.start, days=3, workers=1)
+        assert [r["skipped"] for r in results] == [True, False, True]
+        assert results[1]["created"] == 1
+
+        results = pregenerate_meal_orders(self.start, days=3, workers=1, force=True)
+        assert [r["skipped"] for r in results] == [False, False, False]
+        assert MealOrder.objects.count() == 3
+
+    def test_manual_cancellation_survives(self):
+        """手入力で取り消した注文が、事前生成で元に戻されないことのテスト"""
+        pregenerate_meal_orders(self.start, days=1, workers=1)
+        order = MealOrder.objects.get(guest=self.guests[0], date=self.start)
+        order.ordered = False
+        order.auto_generated = False
+        order.save()
+
+        results = pregenerate_meal_orders(self.start, days=1, workers=1, force=True)
+
+        assert results[0]["updated"] == 0
+        assert results[0]["deleted"] == 0
+        order.refresh_from_db()
+        assert order.ordered is False
+        assert order.auto_generated is False
+
+
+@pytest.mark.django_db(transaction=True)
+def test_pregenerate_in_worker_threads():
+    """
+    並列数を指定して生成できることのテスト。
+    SQLite では書き込みがロックでぶつかるため、呼び出し元のスレッドで順に処理される。
+    """
+    start = date(2025, 11, 1)
+    for i in range(4):
+        guest = Guest.objects.create(name=f"並列生成{i}")
+        VisitSchedule.objects.create(
+            guest=guest, date=start + timedelta(days=i), needs_breakfast=True, needs_lunch=True
+        )
+
+    results = pregenerate_meal_orders(start, days=4, workers=2)
+
+    assert [r["date"] for r in results] == [start + timedelta(days=i) for i in range(4)]
+    assert not any(r.get("error") for r in results)
+    assert MealOrder.objects.filter(date__gte=start).count() == 8
+    assert verify_meal_daily_counts(start, start + timedelta(days=3)) == []
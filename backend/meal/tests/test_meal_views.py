@@ -8,7 +8,7 @@ from django.urls import reverse
 from user.models import User
 from guest.models import Guest, VisitSchedule, VisitType
 from staff.models import Staff, WorkSchedule, Role, ShiftType
-from meal.models import MealType, MealOrder
+from meal.models import MealType, MealOrder, MealOrderDailyCount
 
 
 @pytest.mark.django_db
@@ -98,7 +98,8 @@ class TestMealViews:
         self.client.force_authenticate(user=self.user)
         res = self.client.get("/api/meal/meal-orders/")
         assert res.status_code == 200
-        assert isinstance(res.data["data"], list)
+        assert isinstance(res.data["data"]["results"], list)
+        assert res.data["data"]["count"] == 1
 
     def test_create_meal_order(self):
         """
@@ -355,6 +356,26 @@ class TestMealOrderCountPeriodsView:
         assert res.data["message"] == "集計成功"
         assert len(res.data["data"]) == 1  # 有効な1期間分だけ集計される
 
+    def test_count_periods_breakdown(self):
+        """
+        正常系テスト：breakdown を指定すると内訳が返り、不正な値は400になること。
+        """
+        today = date.today()
+        url = reverse("meal:mealorder-count-periods")
+        payload = {
+            "periods": [{"start_date": today.isoformat(), "end_date": today.isoformat()}],
+            "breakdown": "day",
+        }
+
+        res = self.client.post(url, payload, format="json")
+        assert res.status_code == 200
+        assert res.data["data"][0]["guest"] == {"昼食": 1, "夕食": 1}
+        assert res.data["data"][0]["breakdown"][0]["date"] == today
+
+        payload["breakdown"] = "month"
+        res = self.client.post(url, payload, format="json")
+        assert res.status_code == 400
+
 
 @pytest.mark.django_db
 class TestMealOrderAutoGenerateView:
@@ -468,3 +489,343 @@ class TestMealOrderAutoGenerateView:
         assert data["guest"] == {"朝食": 2, "昼食": 1, "夕食": 1}
         assert data["staff"] == {"昼食": 1, "夕食": 1}
         assert data["total"] == {"朝食": 2, "昼食": 2, "夕食": 2}
+
+    def test_meal_order_generation_for_range(self):
+        """期間指定で生成し、日付毎の件数が返ることのテスト"""
+        url = reverse("meal:meal-order-auto-generate")
+        response = self.client.post(
+            url,
+            {"start_date": "2025-04-27", "end_date": "2025-04-29"},
+            format="json",
+        )
+
+        assert response.status_code == 200
+        summary = response.data["data"]["summary"]
+        assert [d["created"] for d in summary["days"]] == [0, 6, 0]
+        assert summary["total"]["created"] == 6
+
+        response = self.client.post(
+            url, {"start_date": "2025-04-29", "end_date": "2025-04-27"}, format="json"
+        )
+        assert response.status_code == 400
+
+
+@pytest.mark.django_db
+class TestMealOrderExportView:
+    """
+    食事注文のエクスポートAPIのテストクラス。
+    """
+
+    def setup_method(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser(name="export_admin", password="admin123")
+        guest = Guest.objects.create(name="出力利用者", birthday="1950-01-01")
+        meal_type = MealType.objects.create(name="出力食", display_name="出力食")
+        for day in (1, 2):
+            MealOrder.objects.create(guest=guest, meal_type=meal_type, date=date(2025, 4, day))
+
+    def test_export_csv(self, django_assert_max_num_queries):
+        """CSV が見出し付きで流れ、行単位で出力されることのテスト"""
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get("/api/meal/meal-orders/export/")
+        assert response.status_code == 200
+        assert response["Content-Type"].startswith("text/csv")
+
+        with django_assert_max_num_queries(1):
+            body = b"".join(response.streaming_content).decode("utf-8-sig")
+        lines = body.strip().splitlines()
+        assert lines[0].startswith("日付,食事")
+        assert len(lines) == 3
+        assert lines[1].startswith("2025-04-01,出力食,")
+
+    def test_invalid_format(self):
+        """未対応の形式は400になることのテスト"""
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(
+            "/api/meal/meal-orders/export/", {"file_format": "pdf"}
+        )
+        assert response.status_code == 400
+
+
+@pytest.mark.django_db
+class TestMealOrderConditionalGet:
+    """
+    食事注文一覧の条件付き GET のテストクラス。
+    """
+
+    def test_if_modified_since(self):
+        """If-Modified-Since が最終更新時刻以降なら304になることのテスト"""
+        client = APIClient()
+        response = client.get("/api/meal/meal-orders/")
+        assert response.status_code == 200
+
+        response = client.get(
+            "/api/meal/meal-orders/", HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        assert response.status_code == 304
+
+
+@pytest.mark.django_db
+class TestMealManifestView:
+    """
+    配膳表APIのテストクラス。
+    """
+
+    def setup_method(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(name="kitchen", password="pass")
+        guest = Guest.objects.create(name="配膳表利用者")
+        meal_type = MealType.objects.get(name="夕")
+        MealOrder.objects.create(
+            guest=guest, meal_type=meal_type, date=date(2025, 4, 1), note="減塩"
+        )
+
+    def test_json(self):
+        """指定日の配膳表がJSONで返ることのテスト"""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get("/api/meal/meal-orders/manifest/", {"date": "2025-04-01"})
+        assert response.status_code == 200
+        dinner = next(
+            m for m in response.data["data"][0]["meals"] if m["meal_type"] == "夕"
+        )
+        assert [(d["name"], d["note"]) for d in dinner["guest"]] == [("配膳表利用者", "減塩")]
+
+    def test_csv(self):
+        """印刷用の CSV で返ることのテスト"""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(
+            "/api/meal/meal-orders/manifest/",
+            {"start_date": "2025-04-01", "end_date": "2025-04-02", "file_format": "csv"},
+        )
+        assert response.status_code == 200
+        body = b"".join(response.streaming_content).decode("utf-8-sig")
+        lines = body.strip().splitlines()
+        assert lines[0].startswith("日付,曜日,食事")
+        assert len(lines) == 2
+        assert "配膳表利用者" in lines[1]
+
+    def test_invalid(self):
+        """日付の指定が無い場合や認証が無い場合のテスト"""
+        response = self.client.get("/api/meal/meal-orders/manifest/", {"date": "2025-04-01"})
+        assert response.status_code in (401, 403)
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get("/api/meal/meal-orders/manifest/")
+        assert response.status_code == 400
+
+
+@pytest.mark.django_db
+class TestMealOrderListFilter:
+    """
+    食事注文一覧の絞り込み・ページングのテストクラス。
+    """
+
+    def setup_method(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(name="list_user", password="pass")
+        self.lunch = MealType.objects.get(name="昼")
+        self.dinner = MealType.objects.get(name="夕")
+        role, _ = Role.objects.get_or_create(name="介護士")
+        staff = Staff.objects.create(
+            name="一覧スタッフ",
+            role=role,
+            user=User.objects.create_user(name="list_staff", password="pass"),
+        )
+        guests = [Guest.objects.create(name=f"一覧利用者{i}") for i in range(3)]
+        for day in (1, 2):
+            for guest in guests:
+                MealOrder.objects.create(
+                    guest=guest, meal_type=self.lunch, date=date(2025, 5, day)
+                )
+            MealOrder.objects.create(
+                staff=staff, meal_type=self.dinner, date=date(2025, 5, day), ordered=False
+            )
+
+    def test_filter_and_count(self):
+        """絞り込み条件に合う件数と結果が返ることのテスト"""
+        self.client.force_authenticate(user=self.user)
+        url = "/api/meal/meal-orders/"
+
+        data = self.client.get(url, {"date": "2025-05-01"}).data["data"]
+        assert data["count"] == 4
+        assert {row["date"] for row in data["results"]} == {"2025-05-01"}
+
+        data = self.client.get(url, {"kind": "staff"}).data["data"]
+        assert data["count"] == 2
+
+        data = self.client.get(
+            url, {"date_from": "2025-05-01", "date_to": "2025-05-02", "ordered": "false"}
+        ).data["data"]
+        assert data["count"] == 2
+
+        data = self.client.get(url, {"meal_type_id": self.lunch.id}).data["data"]
+        assert data["count"] == 6
+
+    def test_pagination(self, django_assert_max_num_queries):
+        """カーソルで全件を重複なく辿れ、クエリ数がページ内の件数に依存しないことのテスト"""
+        self.client.force_authenticate(user=self.user)
+        url = "/api/meal/meal-orders/"
+        self.client.get(url)  # 変更スタンプを発行しておく
+
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 3}
+            if cursor:
+                params["cursor"] = cursor
+            # 変更スタンプの確認 + 一覧 + 件数
+            with django_assert_max_num_queries(3):
+                data = self.client.get(url, params).data["data"]
+            assert data["count"] == 8
+            seen += [row["id"] for row in data["results"]]
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+        assert len(seen) == len(set(seen)) == 8
+
+    def test_invalid_params(self):
+        """不正なパラメータは400になることのテスト"""
+        self.client.force_authenticate(user=self.user)
+        url = "/api/meal/meal-orders/"
+        assert self.client.get(url, {"cursor": "broken"}).status_code == 400
+        assert self.client.get(url, {"kind": "other"}).status_code == 400
+        assert (
+            self.client.get(url, {"date": "2025-05-01", "date_from": "2025-05-01"}).status_code
+            == 400
+        )
+
+
+@pytest.mark.django_db
+class TestMealOrderBatchView:
+    """
+    食事注文の一括登録・更新APIのテストクラス。
+    """
+
+    url = "/api/meal/meal-orders/batch/"
+
+    def setup_method(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser(name="batch_admin", password="pass")
+        self.client.force_authenticate(user=self.admin)
+        self.lunch = MealType.objects.get(name="昼")
+        self.dinner = MealType.objects.get(name="夕")
+        self.guests = [Guest.objects.create(name=f"一括利用者{i}") for i in range(20)]
+        self.day = date.today() + timedelta(days=1)
+        self.existing = MealOrder.objects.create(
+            guest=self.guests[0], meal_type=self.lunch, date=self.day, auto_generated=False
+        )
+
+    def test_create_and_update(self, django_assert_max_num_queries):
+        """まとめて登録・更新でき、クエリ数が件数に依存しないことのテスト"""
+        orders = [
+            {"date": str(self.day), "meal_type_id": self.lunch.id, "guest_id": guest.id}
+            for guest in self.guests[1:]
+        ]
+        orders.append(
+            {
+                "id": self.existing.id,
+                "date": str(self.day),
+                "meal_type_id": self.dinner.id,
+                "guest_id": self.guests[0].id,
+                "note": "おかゆ",
+            }
+        )
+        # 参照データ（食事種類）の版の確認と読み込みを含む
+        with django_assert_max_num_queries(16):
+            response = self.client.post(self.url, {"orders": orders}, format="json")
+
+        assert response.status_code == 200
+        results = response.data["data"]["results"]
+        assert [r["status"] for r in results] == ["created"] * 19 + ["updated"]
+        assert MealOrder.objects.filter(date=self.day, meal_type=self.lunch).count() == 19
+        self.existing.refresh_from_db()
+        assert (self.existing.meal_type, self.existing.note) == (self.dinner, "おかゆ")
+        assert MealOrderDailyCount.objects.get(
+            date=self.day, meal_type=self.lunch, kind="guest"
+        ).count == 19
+
+    def test_duplicates(self):
+        """既存・一括内の重複は既存と同じメッセージで返り、何も登録されないことのテスト"""
+        orders = [
+            {"date": str(self.day), "meal_type_id": self.lunch.id, "guest_id": self.guests[0].id},
+            {"date": str(self.day), "meal_type_id": self.dinner.id, "guest_id": self.guests[1].id},
+            {"date": str(self.day), "meal_type_id": self.dinner.id, "guest_id": self.guests[1].id},
+            {"date": str(self.day), "meal_type_id": self.lunch.id, "guest_id": 999999},
+        ]
+        response = self.client.post(self.url, {"orders": orders}, format="json")
+
+        assert response.status_code == 400
+        results = response.data["data"]["results"]
+        assert [r["status"] for r in results] == ["error", "created", "error", "error"]
+        assert results[0]["errors"]["non_field_errors"] == ["既にこのゲストの注文が存在します。"]
+        assert results[2]["errors"]["non_field_errors"] == ["既にこのゲストの注文が存在します。"]
+        assert "guest_id" in results[3]["errors"]
+        assert MealOrder.objects.count() == 1
+
+    def test_past_date(self):
+        """利用者・スタッフとも過去の日付はエラーになり、何も登録されないことのテスト"""
+        staff = Staff.objects.create(user=self.admin, name="一括スタッフ")
+        yesterday = str(date.today() - timedelta(days=1))
+        orders = [
+            {"date": yesterday, "meal_type_id": self.lunch.id, "guest_id": self.guests[1].id},
+            {"date": yesterday, "meal_type_id": self.lunch.id, "staff_id": staff.id},
+        ]
+        response = self.client.post(self.url, {"orders": orders}, format="json")
+
+        assert response.status_code == 400
+        results = response.data["data"]["results"]
+        assert [r["errors"]["date"] for r in results] == [["過去の日付は選択できません。"]] * 2
+        assert MealOrder.objects.count() == 1
+
+    def test_saved_as_manual(self):
+        """一括で登録・更新した注文は手入力扱い（auto_generated=False）になることのテスト"""
+        self.existing.auto_generated = True
+        self.existing.save()
+        orders = [
+            {"date": str(self.day), "meal_type_id": self.lunch.id, "guest_id": self.guests[1].id},
+            {
+                "id": self.existing.id,
+                "date": str(self.day),
+                "meal_type_id": self.lunch.id,
+                "guest_id": self.guests[0].id,
+                "ordered": False,
+                "auto_generated": True,
+            },
+        ]
+        response = self.client.post(self.url, {"orders": orders}, format="json")
+
+        assert response.status_code == 200
+        assert not MealOrder.objects.filter(auto_generated=True).exists()
+
+    def test_survives_auto_generation(self):
+        """一括で「注文なし」にした注文が、自動生成APIで上書きされないことのテスト"""
+        VisitSchedule.objects.create(
+            guest=self.guests[0], date=self.day, needs_breakfast=False, needs_lunch=True
+        )
+        order = {
+            "id": self.existing.id,
+            "date": str(self.day),
+            "meal_type_id": self.lunch.id,
+            "guest_id": self.guests[0].id,
+            "ordered": False,
+        }
+        response = self.client.post(self.url, {"orders": [order]}, format="json")
+        assert response.status_code == 200
+
+        response = self.client.post(
+            reverse("meal:meal-order-auto-generate"), {"date": str(self.day)}, format="json"
+        )
+
+        assert response.status_code == 200
+        self.existing.refresh_from_db()
+        assert (self.existing.ordered, self.existing.auto_generated) == (False, False)
+        assert MealOrder.objects.filter(guest=self.guests[0], date=self.day).count() == 1
+
+    def test_invalid_item(self):
+        """利用者・スタッフの指定が無い項目は400になることのテスト"""
+        response = self.client.post(
+            self.url,
+            {"orders": [{"date": str(self.day), "meal_type_id": self.lunch.id}]},
+            format="json",
+        )
+        assert response.status_code == 400
@@ -7,6 +7,9 @@ from .views import (
     MealOrderCountView,
     MealOrderAutoGenerateView,
     MealOrderCountPeriodsView,
+    MealOrderExportView,
+    MealManifestView,
+    MealOrderBatchView,
 )
 
 app_name = "meal"
@@ -40,6 +43,18 @@ urlpatterns = [
         MealOrderDetailView.as_view(),
         name="meal-order-detail",  # GET: 詳細取得, PUT: 更新, DELETE: 削除
     ),
+    # 食事注文の一括登録・更新
+    path(
+        "meal-orders/batch/",
+        MealOrderBatchView.as_view(),
+        name="meal-order-batch",  # POST: 一括登録・更新
+    ),
+    # 食事注文のエクスポート（CSV / XLSX）
+    path(
+        "meal-orders/export/",
+        MealOrderExportView.as_view(),
+        name="meal-order-export",  # GET: CSV / XLSX エクスポート
+    ),
     # 注文件数カウントAPI
     path(
         "meal-orders/count/",
@@ -58,4 +73,10 @@ urlpatterns = [
         MealOrderCountPeriodsView.as_view(),
         name="mealorder-count-periods",
     ),
+    # 厨房向けの配膳表（JSON / 印刷用 CSV / XLSX）
+    path(
+        "meal-orders/manifest/",
+        MealManifestView.as_view(),
+        name="meal-order-manifest",  # GET: 指定日の配膳表
+    ),
 ]
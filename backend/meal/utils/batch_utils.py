@@ -0,0 +1,189 @@
+import datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from rest_framework import serializers
+
+from guest.models import Guest
+from meal.models import MealOrder, MealType
+from meal.utils.manifest_utils import touch_manifest_dates
+from meal.utils.rollup_utils import MealCountDelta, order_kind
+from staff.models import Staff
+from utils.change_stamp_utils import touch_change_stamp
+from utils.reference_data_utils import reference_registry
+
+# 1回の一括登録で受け付ける最大件数
+MAX_BATCH_ITEMS = 500
+
+# 一括登録で書き込む列（id 以外）。対象者以外の省略した列は、登録時は既定値、更新時は元の値のまま。
+# auto_generated は手入力の注文として常に False にする
+BATCH_FIELDS = (
+    "date",
+    "meal_type_id",
+    "guest_id",
+    "staff_id",
+    "ordered",
+    "auto_generated",
+    "note",
+)
+
+# 既存のシリアライザーと同じエラーメッセージ
+DUPLICATE_MESSAGES = {
+    "guest": "既にこのゲストの注文が存在します。",
+    "staff": "既にこのスタッフの注文が存在します。",
+}
+PAST_DATE_MESSAGE = "過去の日付は選択できません。"
+NOT_FOUND_MESSAGE = "指定された食事注文が存在しません。"
+CONFLICT_MESSAGE = "他の注文と重複しています。"
+
+
+class MealOrderBatchError(Exception):
+    """一括登録・更新の検証でエラーのある項目が見つかった場合に送出される例外"""
+
+    def __init__(self, results):
+        self.results = results
+        error_count = sum(1 for r in results if r["status"] == "error")
+        super().__init__(f"{error_count}件の食事注文にエラーがあります。")
+
+
+def _does_not_exist(pk):
+    # PrimaryKeyRelatedField と同じメッセージ
+    message = serializers.PrimaryKeyRelatedField.default_error_messages["does_not_exist"]
+    return [str(message).format(pk_value=pk)]
+
+
+def _order_key(date, meal_type_id, guest_id, staff_id):
+    """重複判定のキー (日付, 食事種類ID, 対象者種別, 対象者ID)"""
+    return (date, meal_type_id, order_kind(guest_id), guest_id or staff_id)
+
+
+def save_meal_order_batch(items, today=None):
+    """
+    複数の食事注文を、項目毎の検証の後に1トランザクションでまとめて登録・更新する。
+
+    存在チェックと重複チェックは、対象の食事種類・利用者・スタッフ・既存注文を
+    それぞれ1クエリで読み込んだ集合に対して行い、項目毎のクエリは発行しない。
+    id を持つ項目は更新（bulk_update）、持たない項目は登録（bulk_create）とする。
+    利用者・スタッフとも過去の日付は受け付けない。登録・更新した注文は手入力扱い
+    （auto_generated=False）とし、自動生成で上書きされないようにする。
+    1件でもエラーがあれば何も書き込まない。
+
+    bulk_create / bulk_update は保存シグナルを発行しないため、
+    日別件数・一覧の変更スタンプ・配膳表の版の更新はここで行う。
+
+    Args:
+        items (list(dict)): id（更新時）/ date / meal_type_id / guest_id または staff_id
+            / ordered / note
+        today (date, optional): 過去日付の判定に使う今日の日付
+
+    Returns:
+        list(dict): 項目毎の index / status（"created" / "updated"）/ id
+
+    Raises:
+        MealOrderBatchError: エラーのある項目がある場合（results に項目毎の status / errors）
+    """
+    today = today or datetime.date.today()
+    if not items:
+        return []
+
+    meal_types = reference_registry.snapshot(MealType).by_id
+    guest_ids = {item["guest_id"] for item in items if item.get("guest_id")}
+    staff_ids = {item["staff_id"] for item in items if item.get("staff_id")}
+    order_ids = {item["id"] for item in items if item.get("id")}
+    dates = [item["date"] for item in items]
+
+    with transaction.atomic():
+        known_guests = set(Guest.objects.filter(id__in=guest_ids).values_list("id", flat=True))
+        known_staff = set(Staff.objects.filter(id__in=staff_ids).values_list("id", flat=True))
+        targets = MealOrder.objects.select_for_update().in_bulk(order_ids)
+
+        # 既存注文のキー → 注文ID（更新対象の注文の元のキーは、この一括処理で空くものとして除く）
+        taken = {}
+        person_q = Q(guest_id__in=guest_ids) | Q(staff_id__in=staff_ids)
+        for order_id, *fields in MealOrder.objects.filter(
+            person_q, date__gte=min(dates), date__lte=max(dates)
+        ).values_list("id", "date", "meal_type_id", "guest_id", "staff_id"):
+            if order_id not in order_ids:
+                taken[_order_key(*fields)] = order_id
+
+        results = []
+        to_create, to_update = [], []
+        delta = MealCountDelta()
+        touched_days = set()
+        for index, item in enumerate(items):
+            kind = "guest" if item.get("guest_id") else "staff"
+            person_id = item.get(f"{kind}_id")
+            errors = {}
+            if item["meal_type_id"] not in meal_types:
+                errors["meal_type_id"] = _does_not_exist(item["meal_type_id"])
+            if person_id not in (known_guests if kind == "guest" else known_staff):
+                errors[f"{kind}_id"] = _does_not_exist(person_id)
+            if item["date"] < today:
+                errors["date"] = [PAST_DATE_MESSAGE]
+            order = None
+            if item.get("id"):
+                order = targets.get(item["id"])
+                if order is None:
+                    errors["id"] = [NOT_FOUND_MESSAGE]
+
+            key = _order_key(
+                item["date"], item["meal_type_id"], item.get("guest_id"), item.get("staff_id")
+            )
+            if not errors:
+                if key in taken:
+                    errors["non_field_errors"] = [DUPLICATE_MESSAGES[kind]]
+                else:
+                    taken[key] = item.get("id") or index
+
+            if errors:
+                results.append(
+                    {"index": index, "status": "error", "id": item.get("id"), "errors": errors}
+                )
+                continue
+
+            values = {field: item[field] for field in BATCH_FIELDS if field in item}
+            values.update(
+                guest_id=item.get("guest_id"), staff_id=item.get("staff_id"), auto_generated=False
+            )
+            if order is None:
+                order = MealOrder(**values)
+                to_create.append(order)
+                results.append({"index": index, "status": "created", "id": None})
+            else:
+                delta.add(order.date, order.meal_type_id, order_kind(order.guest_id), sign=-1)
+                touched_days.add(order.date)
+                for field, value in values.items():
+                    setattr(order, field, value)
+                to_update.append(order)
+                results.append({"index": index, "status": "updated", "id": order.id})
+            delta.add(order.date, order.meal_type_id, order_kind(order.guest_id))
+            touched_days.add(order.date)
+
+        if any(r["status"] == "error" for r in results):
+            raise MealOrderBatchError(results)
+
+        try:
+            # 更新で空いたキーに登録できるよう、更新を先に行う
+            with transaction.atomic():
+                MealOrder.objects.bulk_update(
+                    to_update, [field.removesuffix("_id") for field in BATCH_FIELDS]
+                )
+                MealOrder.objects.bulk_create(to_create)
+        except IntegrityError:
+            # 同じ一括処理内でキーを入れ替えた場合など、集合で検出できない競合
+            raise MealOrderBatchError(
+                [
+                    {**r, "status": "error", "errors": {"non_field_errors": [CONFLICT_MESSAGE]}}
+                    for r in results
+                ]
+            )
+
+        delta.apply()
+        touch_change_stamp(MealOrder)
+        touch_manifest_dates(touched_days)
+
+    created = iter(to_create)
+    for result in results:
+        if result["status"] == "created":
+            result["id"] = next(created).id
+    return results
@@ -0,0 +1,175 @@
+import hashlib
+import uuid
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from guest.models import Guest, VisitSchedule
+from meal.models import MealOrder, MealType
+from meal.utils.rollup_utils import order_kind
+from staff.models import Staff, WorkSchedule
+from utils.change_stamp_utils import get_change_stamps, stamp_cache
+from utils.date_utils import get_weekday_jp
+from utils.reference_data_utils import reference_registry
+
+# 1回で取得できる最大日数（数日先までの献立準備を想定）
+MAX_MANIFEST_DAYS = 7
+
+# 日付毎の版（その日の注文・予定が変わる度に更新する）
+DAY_VERSION_KEY = "mealmanifest:day:{date}"
+MANIFEST_KEY = "mealmanifest:{start}:{end}:{digest}"
+MANIFEST_TIMEOUT = 60 * 60 * 24
+
+# 印刷用（CSV / XLSX）の見出し
+MANIFEST_HEADER = ["日付", "曜日", "食事", "区分", "ID", "氏名", "食事に関する備考", "備考"]
+
+KIND_LABELS = {"guest": "利用者", "staff": "スタッフ"}
+
+
+def touch_manifest_dates(days):
+    """
+    指定日の配膳表キャッシュを無効にする（日付毎の版を更新する）。
+
+    コミット前に更新すると、他のリクエストが変更前の内容を新しい版で
+    キャッシュしてしまうため、コミット後に書き込む。
+    """
+    to_date = MealOrder._meta.get_field("date").to_python
+    keys = {DAY_VERSION_KEY.format(date=to_date(day)) for day in days}
+    if keys:
+        transaction.on_commit(
+            lambda: stamp_cache.set_many({key: uuid.uuid4().hex for key in keys}, None)
+        )
+
+
+def _day_versions(days):
+    """日付毎の版を1回のキャッシュアクセスで取得する（無い日は新しく発行する）"""
+    keys = [DAY_VERSION_KEY.format(date=day) for day in days]
+    versions = stamp_cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            version = uuid.uuid4().hex
+            if not stamp_cache.add(key, version, None):
+                version = stamp_cache.get(key)
+            versions[key] = version
+    return [versions[key] for key in keys]
+
+
+def build_meal_manifest(start_date, end_date):
+    """
+    start_date〜end_date（終了日を含む）の配膳表を1クエリで作成する。
+
+    注文ありの食事注文に、利用者・スタッフの氏名と、元になった来所・勤務スケジュールの
+    meal_note（食事に関する備考）をサブクエリで付けて読み込み、
+    日付 → 食事種類 → 利用者 / スタッフ の順にまとめる。
+
+    Returns:
+        list(dict): 日付毎の date / weekday / meals。
+            meals は食事種類毎の meal_type / display_name / counts / guest / staff
+    """
+    meal_types = sorted(
+        reference_registry.snapshot(MealType).objects, key=lambda m: m.id
+    )
+    schedule_note = {
+        "guest": VisitSchedule.objects.filter(
+            guest_id=OuterRef("guest_id"), date=OuterRef("date")
+        ).values("meal_note")[:1],
+        "staff": WorkSchedule.objects.filter(
+            staff_id=OuterRef("staff_id"), date=OuterRef("date")
+        ).values("meal_note")[:1],
+    }
+    rows = (
+        MealOrder.objects.filter(date__gte=start_date, date__lte=end_date, ordered=True)
+        .annotate(
+            person_name=Coalesce(F("guest__name"), F("staff__name")),
+            meal_note=Coalesce(
+                Subquery(schedule_note["guest"]), Subquery(schedule_note["staff"])
+            ),
+        )
+        .order_by("date", "meal_type_id", "person_name", "id")
+        .values_list(
+            "date", "meal_type_id", "guest_id", "staff_id", "person_name", "meal_note", "note"
+        )
+    )
+
+    days = {}
+    for offset in range((end_date - start_date).days + 1):
+        day = start_date + timedelta(days=offset)
+        days[day] = {
+            meal_type.id: {
+                "meal_type": meal_type.name,
+                "display_name": meal_type.display_name,
+                "counts": {"guest": 0, "staff": 0, "total": 0},
+                "guest": [],
+                "staff": [],
+            }
+            for meal_type in meal_types
+        }
+
+    for day, type_id, guest_id, staff_id, name, meal_note, note in rows:
+        meal = days[day].get(type_id)
+        if meal is None:
+            continue
+        kind = order_kind(guest_id)
+        meal[kind].append(
+            {
+                "id": guest_id or staff_id,
+                "name": name,
+                "meal_note": meal_note or "",
+                "note": note or "",
+            }
+        )
+        meal["counts"][kind] += 1
+        meal["counts"]["total"] += 1
+
+    return [
+        {"date": day, "weekday": get_weekday_jp(day), "meals": list(meals.values())}
+        for day, meals in days.items()
+    ]
+
+
+def get_meal_manifest(start_date, end_date):
+    """
+    配膳表をキャッシュから返す（無ければ作成してキャッシュする）。
+
+    キャッシュキーには期間内の日付毎の版と、氏名・表示名を引く
+    利用者・スタッフ・食事種類の変更スタンプを含めるため、
+    どれかが変わると次の取得で作り直される。
+    """
+    if end_date < start_date:
+        raise ValueError("終了日は開始日以降の日付を指定してください")
+    if (end_date - start_date).days + 1 > MAX_MANIFEST_DAYS:
+        raise ValueError(f"期間は最大{MAX_MANIFEST_DAYS}日までです")
+
+    days = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+    tokens = _day_versions(days) + [
+        token for token, _ in get_change_stamps(Guest, Staff, MealType)
+    ]
+    digest = hashlib.md5("|".join(tokens).encode()).hexdigest()
+    key = MANIFEST_KEY.format(start=start_date, end=end_date, digest=digest)
+
+    manifest = cache.get(key)
+    if manifest is None:
+        manifest = build_meal_manifest(start_date, end_date)
+        cache.set(key, manifest, MANIFEST_TIMEOUT)
+    return manifest
+
+
+def iter_manifest_rows(manifest):
+    """配膳表を印刷用（CSV / XLSX）の行に展開する"""
+    for day in manifest:
+        for meal in day["meals"]:
+            for kind in ("guest", "staff"):
+                for diner in meal[kind]:
+                    yield (
+                        day["date"],
+                        day["weekday"],
+                        meal["display_name"],
+                        KIND_LABELS[kind],
+                        diner["id"],
+                        diner["name"],
+                        diner["meal_note"],
+                        diner["note"],
+                    )
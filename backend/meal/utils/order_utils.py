@@ -1,73 +1,362 @@
-﻿from datetime import date
+﻿import threading
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.db import connection, transaction
+from django.db.models import Q
+
 from guest.models import VisitSchedule
 from staff.models import WorkSchedule
 from meal.models import MealType, MealOrder
+from meal.utils.manifest_utils import touch_manifest_dates
+from meal.utils.rollup_utils import MealCountDelta
+from utils.change_stamp_utils import touch_change_stamp
+from utils.reference_data_utils import reference_registry
+
+# 食事の要否フラグと食事種類コードの対応
+MEAL_FLAGS = (
+    ("needs_breakfast", "朝"),
+    ("needs_lunch", "昼"),
+    ("needs_dinner", "夕"),
+)
+
+# 注文の対象者（MealOrder のフィールド名 → 予定のモデル）
+ORDER_SOURCES = (
+    ("staff", WorkSchedule),
+    ("guest", VisitSchedule),
+)
+
+# 1回の INSERT / UPDATE / DELETE に含める最大行数
+ORDER_BATCH_SIZE = 500
+
+SUMMARY_KEYS = ("created", "updated", "deleted", "unchanged")
+
+
+def _person_filter(owner, person_ids):
+    return {} if person_ids is None else {f"{owner}_id__in": person_ids[owner]}
+
+
+def desired_meal_orders(start_date, end_date, person_ids=None):
+    """
+    勤務・来所スケジュールから、期間内にあるべき自動生成の食事注文を求める。
+    スケジュールは対象者毎に1クエリ（計2クエリ）で読み込み、関連オブジェクトは読まない。
+
+    Args:
+        person_ids (dict, optional): "staff" / "guest" → 対象者IDの集合（省略時は全員）
+
+    Returns:
+        set(tuple): (日付, 食事種類ID, "staff" / "guest", 対象者ID)
+    """
+    meal_types = reference_registry.snapshot(MealType).by_code
+    type_ids = [meal_types[code].id for _, code in MEAL_FLAGS]
+    flags = [flag for flag, _ in MEAL_FLAGS]
+    needs_any = Q()
+    for flag in flags:
+        needs_any |= Q(**{flag: True})
+
+    desired = set()
+    for owner, model in ORDER_SOURCES:
+        if person_ids is not None and not person_ids.get(owner):
+            continue
+        rows = model.objects.filter(
+            needs_any,
+            date__gte=start_date,
+            date__lte=end_date,
+            **_person_filter(owner, person_ids),
+        ).values_list("date", f"{owner}_id", *flags)
+        for day, person_id, *needs in rows:
+            for need, type_id in zip(needs, type_ids):
+                if need:
+                    desired.add((day, type_id, owner, person_id))
+    return desired
+
+
+def existing_meal_orders(start_date, end_date, person_ids=None):
+    """
+    期間内の既存の食事注文を、行ロックを掛けて読み込む（呼び出し側でトランザクションを張ること）。
+
+    Returns:
+        list(tuple): (注文ID, (日付, 食事種類ID, "staff" / "guest", 対象者ID), ordered, auto_generated)
+    """
+    qs = MealOrder.objects.select_for_update().filter(
+        date__gte=start_date, date__lte=end_date
+    )
+    if person_ids is not None:
+        person_q = Q(pk__in=[])
+        for owner, _ in ORDER_SOURCES:
+            if person_ids.get(owner):
+                person_q |= Q(**_person_filter(owner, person_ids))
+        qs = qs.filter(person_q)
+
+    rows = []
+    for order_id, day, type_id, staff_id, guest_id, ordered, auto in qs.values_list(
+        "id", "date", "meal_type_id", "staff_id", "guest_id", "ordered", "auto_generated"
+    ):
+        owner, person_id = ("staff", staff_id) if staff_id else ("guest", guest_id)
+        rows.append((order_id, (day, type_id, owner, person_id), ordered, auto))
+    return rows
+
+
+def insert_meal_orders(keys):
+    """
+    自動生成の注文を INSERT ... ON CONFLICT DO NOTHING でまとめて作成する。
+
+    対象者種別毎の条件付きユニーク制約（meal_order_unique_guest / meal_order_unique_staff）を
+    衝突先に指定するため、同時に動いた同期・生成が先に作った注文とぶつかってもエラーにならず、
+    実際に作成した行だけを RETURNING で受け取る。
+    SQLite / PostgreSQL 以外では bulk_create で作成する。
+
+    Args:
+        keys (iterable): (日付, 食事種類ID, "staff" / "guest", 対象者ID)
+
+    Returns:
+        list(tuple): 実際に作成した (日付, 食事種類ID, "staff" / "guest", 対象者ID)
+    """
+    keys = list(keys)
+    if not keys:
+        return []
+    if connection.vendor not in ("sqlite", "postgresql"):
+        MealOrder.objects.bulk_create(
+            [
+                MealOrder(
+                    date=day,
+                    meal_type_id=type_id,
+                    ordered=True,
+                    auto_generated=True,
+                    **{f"{owner}_id": person_id},
+                )
+                for day, type_id, owner, person_id in keys
+            ],
+            batch_size=ORDER_BATCH_SIZE,
+        )
+        return keys
+
+    qn = connection.ops.quote_name
+    adapt = connection.ops.adapt_datefield_value
+    to_date = MealOrder._meta.get_field("date").to_python
+    opts = MealOrder._meta
+    table = qn(opts.db_table)
+    col = {
+        name: qn(opts.get_field(name).column)
+        for name in ("date", "meal_type", "guest", "staff", "ordered", "auto_generated")
+    }
+
+    inserted = []
+    with connection.cursor() as cursor:
+        for owner, _ in ORDER_SOURCES:
+            rows = [key for key in keys if key[2] == owner]
+            for i in range(0, len(rows), ORDER_BATCH_SIZE):
+                batch = rows[i : i + ORDER_BATCH_SIZE]
+                cursor.execute(
+                    f"INSERT INTO {table} ({col['date']}, {col['meal_type']}, {col[owner]}, "
+                    f"{col['ordered']}, {col['auto_generated']}) VALUES "
+                    + ", ".join(["(%s, %s, %s, %s, %s)"] * len(batch))
+                    + f" ON CONFLICT ({col['date']}, {col['meal_type']}, {col[owner]})"
+                    f" WHERE {col[owner]} IS NOT NULL DO NOTHING"
+                    f" RETURNING {col['date']}, {col['meal_type']}, {col[owner]}",
+                    [
+                        value
+                        for day, type_id, _, person_id in batch
+                        for value in (adapt(day), type_id, person_id, True, True)
+                    ],
+                )
+                inserted += [
+                    (to_date(day), type_id, owner, person_id)
+                    for day, type_id, person_id in cursor.fetchall()
+                ]
+    return inserted
+
+
+def apply_meal_order_diff(desired, existing, overwrite_manual=True):
+    """
+    あるべき注文の集合と既存注文を突き合わせ、差分だけを一括で反映する。
+
+    - 無い注文は INSERT ... ON CONFLICT DO NOTHING で作成する（insert_meal_orders）
+    - 不要になった自動生成の注文と、同じ人・同じ食事の重複分は削除する（手入力の注文は削除しない）
+    - overwrite_manual=True の場合、「注文なし」や手入力の注文を自動生成・注文ありに更新する。
+      False の場合、手入力の注文（auto_generated=False）には一切触れない
+
+    Returns:
+        dict: 日付 → created / updated / deleted / unchanged の件数
+    """
+    days = defaultdict(lambda: dict.fromkeys(SUMMARY_KEYS, 0))
+    seen = set()
+    to_update, to_delete = [], []
+    for order_id, key, ordered, auto in existing:
+        day = key[0]
+        if not auto and not overwrite_manual:
+            seen.add(key)
+            continue
+        if key in desired and key not in seen:
+            seen.add(key)
+            if ordered and auto:
+                days[day]["unchanged"] += 1
+            else:
+                to_update.append(order_id)
+                days[day]["updated"] += 1
+        elif auto:
+            to_delete.append(order_id)
+            days[day]["deleted"] += 1
+
+    to_create = desired - seen
+    created = insert_meal_orders(to_create)
+    # 他の処理が先に作っていた注文は作成されないため、変更なしとして数える
+    for day, *_ in created:
+        days[day]["created"] += 1
+    for day, *_ in to_create.difference(created):
+        days[day]["unchanged"] += 1
+
+    # INSERT は保存シグナルを発行しないため、日別件数はここで反映する
+    # （削除は QuerySet.delete() が削除シグナルを発行するため、シグナル側で反映される）
+    delta = MealCountDelta()
+    for day, type_id, owner, _ in created:
+        delta.add(day, type_id, owner)
+    delta.apply()
+    for i in range(0, len(to_update), ORDER_BATCH_SIZE):
+        MealOrder.objects.filter(id__in=to_update[i : i + ORDER_BATCH_SIZE]).update(
+            ordered=True, auto_generated=True
+        )
+    for i in range(0, len(to_delete), ORDER_BATCH_SIZE):
+        MealOrder.objects.filter(id__in=to_delete[i : i + ORDER_BATCH_SIZE]).delete()
+
+    if created or to_update or to_delete:
+        # INSERT / update() はシグナルを発行しないため、ここで変更スタンプと配膳表の版を更新する
+        touch_change_stamp(MealOrder)
+        touch_manifest_dates(
+            day for day, counts in days.items() if counts["created"] or counts["updated"]
+        )
+    return days
+
+
+def generate_meal_orders_for_range(start_date, end_date, overwrite_manual=True):
+    """
+    指定期間（終了日を含む）の食事注文を、勤務・来所スケジュールの
+    needs_breakfast / needs_lunch / needs_dinner に合わせて一括で作成・更新・削除する。
+
+    あるべき注文の集合をメモリ上で求め、期間内の既存注文と突き合わせて
+    差分だけを bulk_create / update / delete で反映する（何度実行しても同じ結果になる）。
+    既存の注文が「注文なし」や手入力の場合は、従来の update_or_create と同じく
+    自動生成・注文ありに更新する。
+
+    Args:
+        start_date (date): 開始日
+        end_date (date): 終了日（この日を含む）
+        overwrite_manual (bool): False の場合、手入力の注文（auto_generated=False）は
+            上書き・削除しない（sync_meal_orders と同じ扱い）
+
+    Returns:
+        dict: start / end、日付毎の件数（days）、合計（total）。
+            件数は created / updated / deleted / unchanged
+    """
+    desired = desired_meal_orders(start_date, end_date)
+    with transaction.atomic():
+        days = apply_meal_order_diff(
+            desired,
+            existing_meal_orders(start_date, end_date),
+            overwrite_manual=overwrite_manual,
+        )
+
+    total = dict.fromkeys(SUMMARY_KEYS, 0)
+    results = []
+    for offset in range((end_date - start_date).days + 1):
+        day = start_date + timedelta(days=offset)
+        counts = days.get(day, dict.fromkeys(SUMMARY_KEYS, 0))
+        for key in SUMMARY_KEYS:
+            total[key] += counts[key]
+        results.append({"date": day, **counts})
+
+    return {"start": start_date, "end": end_date, "days": results, "total": total}
+
+
+def sync_meal_orders(keys):
+    """
+    指定した (対象者, 日付) の食事注文だけを、現在のスケジュールに合わせて作り直す。
+    手入力の注文（auto_generated=False）は上書き・削除しない。
+
+    Args:
+        keys (iterable): ("staff" / "guest", 対象者ID, 日付) のタプル列
+
+    Returns:
+        dict: created / updated / deleted / unchanged の件数
+    """
+    keys = set(keys)
+    total = dict.fromkeys(SUMMARY_KEYS, 0)
+    if not keys:
+        return total
+
+    person_ids = defaultdict(set)
+    for owner, person_id, _ in keys:
+        person_ids[owner].add(person_id)
+    dates = [day for _, _, day in keys]
+    start_date, end_date = min(dates), max(dates)
+
+    def in_keys(key):
+        day, _, owner, person_id = key
+        return (owner, person_id, day) in keys
+
+    desired = {
+        key for key in desired_meal_orders(start_date, end_date, person_ids) if in_keys(key)
+    }
+    with transaction.atomic():
+        existing = [
+            row
+            for row in existing_meal_orders(start_date, end_date, person_ids)
+            if in_keys(row[1])
+        ]
+        days = apply_meal_order_diff(desired, existing, overwrite_manual=False)
+
+    for counts in days.values():
+        for key in SUMMARY_KEYS:
+            total[key] += counts[key]
+    return total
+
+
+# 同じトランザクション内の変更をまとめて同期するための、スレッド毎の保留キー
+_pending = threading.local()
+
+
+def _flush_meal_order_sync():
+    keys = getattr(_pending, "keys", None)
+    _pending.keys = set()
+    if keys:
+        sync_meal_orders(keys)
+
+
+def discard_pending_meal_order_sync():
+    """保留中の同期キーを破棄する（テスト用）"""
+    _pending.keys = set()
+
+
+def queue_meal_order_sync(owner, keys):
+    """
+    (対象者ID, 日付) の食事注文の同期を、トランザクションのコミット後にまとめて行うよう予約する。
+
+    同じトランザクション内で何度呼んでも、コミット後の1回の sync_meal_orders にまとまる。
+    ロールバックされた場合に残ったキーは次のコミット時に同期される
+    （現在のスケジュールから計算し直すため、余分に同期しても結果は変わらない）。
+
+    Args:
+        owner (str): "staff" または "guest"
+        keys (iterable): (対象者ID, 日付) のタプル列
+    """
+    pending = getattr(_pending, "keys", None)
+    if pending is None:
+        pending = _pending.keys = set()
+    to_date = MealOrder._meta.get_field("date").to_python
+    pending.update((owner, person_id, to_date(day)) for person_id, day in keys)
+    # 同期に失敗してもコミット済みのスケジュール変更は取り消せないため、例外はログに残して続行する
+    transaction.on_commit(_flush_meal_order_sync, robust=True)
 
 
 def generate_meal_orders_for_day(target_date: date):
     """
-    新ロジック：指定された日付に対して、勤務・来所スケジュールから
+    指定された日付に対して、勤務・来所スケジュールから
     needs_breakfast / needs_lunch / needs_dinner をもとに MealOrder を生成する。
 
     Parameters:
         target_date (date): 注文を生成する対象日付
-    """
 
-    # 食事タイプの取得（name="朝" "昼" "夕"）
-    meal_type_map = {mt.name: mt for mt in MealType.objects.all()}
-
-    # ========================
-    # スタッフ分の注文生成
-    # ========================
-    staff_schedules = WorkSchedule.objects.filter(date=target_date)
-
-    for schedule in staff_schedules:
-        if schedule.needs_breakfast:
-            MealOrder.objects.update_or_create(
-                date=target_date,
-                meal_type=meal_type_map["朝"],
-                staff=schedule.staff,
-                defaults={"auto_generated": True, "ordered": True},
-            )
-        if schedule.needs_lunch:
-            MealOrder.objects.update_or_create(
-                date=target_date,
-                meal_type=meal_type_map["昼"],
-                staff=schedule.staff,
-                defaults={"auto_generated": True, "ordered": True},
-            )
-        if schedule.needs_dinner:
-            MealOrder.objects.update_or_create(
-                date=target_date,
-                meal_type=meal_type_map["夕"],
-                staff=schedule.staff,
-                defaults={"auto_generated": True, "ordered": True},
-            )
-
-    # ========================
-    # 利用者分の注文生成
-    # ========================
-    guest_schedules = VisitSchedule.objects.filter(date=target_date)
-
-    for schedule in guest_schedules:
-        if schedule.needs_breakfast:
-            MealOrder.objects.update_or_create(
-                date=target_date,
-                meal_type=meal_type_map["朝"],
-                guest=schedule.guest,
-                defaults={"auto_generated": True, "ordered": True},
-            )
-        if schedule.needs_lunch:
-            MealOrder.objects.update_or_create(
-                date=target_date,
-                meal_type=meal_type_map["昼"],
-                guest=schedule.guest,
-                defaults={"auto_generated": True, "ordered": True},
-            )
-        if schedule.needs_dinner:
-            MealOrder.objects.update_or_create(
-                date=target_date,
-                meal_type=meal_type_map["夕"],
-                guest=schedule.guest,
-                defaults={"auto_generated": True, "ordered": True},
-            )
+    Returns:
+        dict: generate_meal_orders_for_range と同じ集計
+    """
+    return generate_meal_orders_for_range(target_date, target_date)
@@ -0,0 +1,184 @@
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import connection
+
+from meal.models import MealOrderGenerationState, MealType
+from meal.utils.order_utils import MEAL_FLAGS, ORDER_SOURCES, generate_meal_orders_for_range
+from utils.reference_data_utils import reference_registry
+
+logger = logging.getLogger(__name__)
+
+# 事前生成の既定値（settings.MEAL_PREGENERATION で上書きできる）
+DEFAULT_PREGENERATION = {
+    "days": 7,  # 今日から何日先までの注文を作っておくか
+    "workers": 4,  # 並列に処理するスレッド数
+    "interval_minutes": 60,  # 常駐スケジューラーの実行間隔
+}
+
+
+def get_pregeneration_settings():
+    """設定を反映した事前生成の設定辞書を返す"""
+    config = dict(DEFAULT_PREGENERATION)
+    config.update(getattr(settings, "MEAL_PREGENERATION", {}))
+    return config
+
+
+def schedule_fingerprint(target_date):
+    """
+    指定日の食事注文の元になる勤務・来所スケジュールの指紋を求める（対象者毎に1クエリ）。
+
+    食事の要否フラグと対象者の組、および食事種類の対応を並べてハッシュにするため、
+    要否が変わらない限り（備考やシフトの変更では）指紋は変わらない。
+    """
+    meal_types = reference_registry.snapshot(MealType).by_code
+    flags = [flag for flag, _ in MEAL_FLAGS]
+    digest = hashlib.sha256()
+    digest.update(repr([meal_types[code].id for _, code in MEAL_FLAGS]).encode())
+    for owner, model in ORDER_SOURCES:
+        rows = (
+            model.objects.filter(date=target_date)
+            .order_by(f"{owner}_id")
+            .values_list(f"{owner}_id", *flags)
+        )
+        digest.update(owner.encode())
+        for row in rows:
+            digest.update(repr(row).encode())
+    return digest.hexdigest()
+
+
+def pregenerate_day(target_date, force=False):
+    """
+    1日分の食事注文を、スケジュールの指紋が前回から変わっている場合だけ生成する。
+    スケジュール変更からの同期と同じく、手入力の注文（auto_generated=False）は上書き・削除しない。
+
+    Returns:
+        dict: date / skipped / created / updated / deleted / duration_ms
+    """
+    started = time.monotonic()
+    fingerprint = schedule_fingerprint(target_date)
+    state = MealOrderGenerationState.objects.filter(date=target_date).first()
+    if not force and state is not None and state.fingerprint == fingerprint:
+        duration_ms = int((time.monotonic() - started) * 1000)
+        logger.info("食事注文の事前生成 %s: 変更なし（%dms）", target_date, duration_ms)
+        return {"date": target_date, "skipped": True, "duration_ms": duration_ms}
+
+    total = generate_meal_orders_for_range(
+        target_date, target_date, overwrite_manual=False
+    )["total"]
+    duration_ms = int((time.monotonic() - started) * 1000)
+    MealOrderGenerationState.objects.update_or_create(
+        date=target_date,
+        defaults={"fingerprint": fingerprint, "duration_ms": duration_ms},
+    )
+    logger.info(
+        "食事注文の事前生成 %s: 作成%d件 更新%d件 削除%d件（%dms）",
+        target_date,
+        total["created"],
+        total["updated"],
+        total["deleted"],
+        duration_ms,
+    )
+    return {
+        "date": target_date,
+        "skipped": False,
+        "created": total["created"],
+        "updated": total["updated"],
+        "deleted": total["deleted"],
+        "duration_ms": duration_ms,
+    }
+
+
+def _pregenerate_day_in_worker(target_date, force):
+    """ワーカースレッド用。スレッド毎に開いた DB 接続を終了時に閉じる"""
+    try:
+        return pregenerate_day(target_date, force)
+    except Exception:
+        logger.exception("食事注文の事前生成 %s: 失敗しました", target_date)
+        return {"date": target_date, "skipped": False, "error": True, "duration_ms": 0}
+    finally:
+        connection.close()
+
+
+def pregenerate_meal_orders(start_date=None, days=None, workers=None, force=False):
+    """
+    start_date（省略時は今日）から days 日分の食事注文を事前に生成する。
+
+    日毎に独立したトランザクションで処理するため、workers > 1 の場合は
+    ワーカースレッドで並列に処理する（Django の DB 接続はスレッド毎に別になる）。
+    同じ注文がぶつかっても、条件付きユニーク制約と ON CONFLICT で重複は作られない。
+    SQLite は同時に1つの書き込みしかできず、並列に書くとテーブルロックで失敗するため、
+    workers の指定に関わらず呼び出し元のスレッドで順に処理する。
+
+    Args:
+        start_date (date, optional): 開始日
+        days (int, optional): 日数（省略時は設定値）
+        workers (int, optional): 並列数（省略時は設定値。1 なら呼び出し元のスレッドで順に処理）
+        force (bool): 指紋が変わっていない日も生成し直す
+
+    Returns:
+        list(dict): 日付順の pregenerate_day の結果
+    """
+    config = get_pregeneration_settings()
+    start_date = start_date or date.today()
+    days = config["days"] if days is None else days
+    workers = config["workers"] if workers is None else workers
+    if connection.vendor == "sqlite":
+        workers = 1
+    targets = [start_date + timedelta(days=i) for i in range(days)]
+
+    started = time.monotonic()
+    if workers <= 1:
+        results = [pregenerate_day(day, force) for day in targets]
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="meal-pregen") as pool:
+            results = list(pool.map(lambda day: _pregenerate_day_in_worker(day, force), targets))
+
+    logger.info(
+        "食事注文の事前生成 %s〜%s: %d日中%d日を生成（%dms）",
+        targets[0] if targets else start_date,
+        targets[-1] if targets else start_date,
+        len(results),
+        sum(1 for r in results if not r["skipped"]),
+        int((time.monotonic() - started) * 1000),
+    )
+    return results
+
+
+def start_pregeneration_scheduler(interval_minutes=None, stop_event=None, **options):
+    """
+    一定間隔で pregenerate_meal_orders を実行する常駐スレッドを開始する。
+
+    Web サーバーの各ワーカーで動かすと重複して実行されるため、
+    pregenerate_meal_orders コマンドの --loop など、1プロセスだけで呼び出すこと。
+
+    Args:
+        interval_minutes (int, optional): 実行間隔（省略時は設定値）
+        stop_event (threading.Event, optional): set() されると次の待機で終了する
+        options: pregenerate_meal_orders に渡す引数（days / workers / force）
+
+    Returns:
+        tuple(threading.Thread, threading.Event): 開始したスレッドと停止用のイベント
+    """
+    interval = (interval_minutes or get_pregeneration_settings()["interval_minutes"]) * 60
+    stop_event = stop_event or threading.Event()
+
+    def run():
+        try:
+            while not stop_event.is_set():
+                try:
+                    pregenerate_meal_orders(**options)
+                except Exception:
+                    logger.exception("食事注文の事前生成に失敗しました")
+                stop_event.wait(interval)
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=run, name="meal-pregen-scheduler", daemon=True)
+    thread.start()
+    return thread, stop_event
@@ -0,0 +1,144 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, CharField, Count, Sum, Value, When
+
+from meal.models import MealOrder, MealOrderDailyCount
+from utils.model_utils import bulk_increment
+
+
+def order_kind(guest_id):
+    """注文の対象者種別（利用者 / スタッフ）"""
+    return "guest" if guest_id else "staff"
+
+
+class MealCountDelta:
+    """
+    (日付, 食事種類, 対象者種別) 毎の件数の差分を貯めておき、まとめて日別件数に反映するためのクラス。
+    """
+
+    def __init__(self):
+        self.deltas = defaultdict(int)
+
+    def add(self, day, meal_type_id, kind, sign=1):
+        """注文1件分を sign（+1: 追加, -1: 削除）倍して加算する"""
+        day = MealOrder._meta.get_field("date").to_python(day)
+        self.deltas[(day, meal_type_id, kind)] += sign
+
+    def apply(self):
+        """
+        貯めた差分を日別件数テーブルに反映する。
+
+        1回の INSERT ... ON CONFLICT DO UPDATE SET count = count + EXCLUDED.count で
+        データベース側で加算するため、同じ (日付, 食事種類) にまだ行が無い状態で
+        同時に反映しても件数は失われない。
+        """
+        bulk_increment(
+            MealOrderDailyCount,
+            ["date", "meal_type", "kind"],
+            {key: {"count": delta} for key, delta in self.deltas.items() if delta},
+        )
+        self.deltas.clear()
+
+
+def count_orders_by_day(start_date, end_date):
+    """
+    注文を数え直し、(日付, 食事種類ID, 対象者種別) → 件数 を返す（1クエリ）。
+    """
+    rows = (
+        MealOrder.objects.filter(date__gte=start_date, date__lte=end_date)
+        .annotate(
+            kind=Case(
+                When(guest__isnull=False, then=Value("guest")),
+                default=Value("staff"),
+                output_field=CharField(),
+            )
+        )
+        .values("date", "meal_type_id", "kind")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    return {(row["date"], row["meal_type_id"], row["kind"]): row["count"] for row in rows}
+
+
+def rebuild_meal_daily_counts(start_date, end_date):
+    """
+    start_date〜end_date（終了日を含む）の日別件数を注文から作り直す。
+
+    Returns:
+        int: 作成した日別件数の行数
+    """
+    with transaction.atomic():
+        MealOrderDailyCount.objects.filter(
+            date__gte=start_date, date__lte=end_date
+        ).delete()
+        rows = [
+            MealOrderDailyCount(date=day, meal_type_id=type_id, kind=kind, count=count)
+            for (day, type_id, kind), count in count_orders_by_day(
+                start_date, end_date
+            ).items()
+        ]
+        MealOrderDailyCount.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def verify_meal_daily_counts(start_date, end_date):
+    """
+    保存済みの日別件数と、注文からの数え直しの結果を比較する。
+
+    Returns:
+        list(dict): 不一致の一覧（date, meal_type_id, kind, stored, expected）
+    """
+    expected = count_orders_by_day(start_date, end_date)
+    stored = {
+        (row["date"], row["meal_type_id"], row["kind"]): row["count"]
+        for row in MealOrderDailyCount.objects.filter(
+            date__gte=start_date, date__lte=end_date
+        ).values("date", "meal_type_id", "kind", "count")
+    }
+    mismatches = []
+    for key in sorted(expected.keys() | stored.keys()):
+        want = expected.get(key, 0)
+        have = stored.get(key, 0)
+        if want != have:
+            day, type_id, kind = key
+            mismatches.append(
+                {
+                    "date": day,
+                    "meal_type_id": type_id,
+                    "kind": kind,
+                    "stored": have,
+                    "expected": want,
+                }
+            )
+    return mismatches
+
+
+def count_meal_order_list(params):
+    """
+    食事注文一覧の絞り込み条件に合う注文の件数を、1回の集計クエリで求める。
+
+    日別件数は「注文あり / なし」を区別しないため、ordered で絞り込まない場合は
+    日数 × 食事種類 × 対象者種別 の行を足し合わせ、絞り込む場合だけ注文を数える。
+
+    Args:
+        params (dict): date_from / date_to / meal_type_id / kind / ordered（いずれも省略可）
+    """
+    filters = {}
+    if params.get("date_from"):
+        filters["date__gte"] = params["date_from"]
+    if params.get("date_to"):
+        filters["date__lte"] = params["date_to"]
+    if params.get("meal_type_id") is not None:
+        filters["meal_type_id"] = params["meal_type_id"]
+
+    if params.get("ordered") is None:
+        if params.get("kind"):
+            filters["kind"] = params["kind"]
+        total = MealOrderDailyCount.objects.filter(**filters).aggregate(total=Sum("count"))
+        return total["total"] or 0
+
+    filters["ordered"] = params["ordered"]
+    if params.get("kind"):
+        filters["guest__isnull"] = params["kind"] != "guest"
+    return MealOrder.objects.filter(**filters).count()
@@ -0,0 +1,105 @@
+from collections import defaultdict
+
+from django.db.models import Q, Sum
+from django.db.models.functions import ExtractIsoWeekDay
+
+from meal.models import MealOrderDailyCount, MealType
+from utils.date_utils import get_weekday_jp
+from utils.reference_data_utils import reference_registry
+
+# 内訳の単位（日付毎 / 曜日毎）
+BREAKDOWNS = ("day", "weekday")
+
+# 1回の集計で指定できる期間の数（期間毎に集計列が1つ増える）
+MAX_PERIODS = 60
+
+WEEKDAYS_JP = ["月", "火", "水", "木", "金", "土", "日"]
+
+
+def _count_by_kind(counts, type_map):
+    """(対象者種別, 食事種類ID) → 件数 を guest / staff / total の表示名 → 件数 にする"""
+    result = {"guest": {}, "staff": {}, "total": {}}
+    for (kind, type_id), count in counts.items():
+        if not count:
+            continue
+        name = type_map.get(type_id, "不明")
+        result[kind][name] = result[kind].get(name, 0) + count
+        result["total"][name] = result["total"].get(name, 0) + count
+    return result
+
+
+def count_meal_orders(periods, breakdown=None):
+    """
+    複数期間の食事注文件数を、利用者・スタッフ別および合計で1クエリで集計する。
+
+    注文そのものではなく日別件数（MealOrderDailyCount）を読むため、
+    1年分でも 日数 × 食事種類 × 対象者種別 の行を足し合わせるだけで済む。
+    期間の範囲で絞り込んだ行を (食事種類, 対象者種別[, 日付 / 曜日]) で GROUP BY し、
+    期間毎の件数を SUM(...) FILTER (WHERE date BETWEEN ...) の列として同時に求める
+    （FILTER 非対応の DB では Django が CASE 式に書き換える）。
+    期間が重なっていても、それぞれの期間で数える。
+
+    Args:
+        periods (list(tuple)): (開始日, 終了日) のリスト（終了日を含む）
+        breakdown (str, optional): "day"（日付毎）または "weekday"（曜日毎）の内訳を付ける
+
+    Returns:
+        list(dict): 期間毎の period（start / end）、guest / staff / total（食事種類の表示名 → 件数）。
+            breakdown 指定時は、同じ形の内訳を breakdown に持つ
+    """
+    if breakdown is not None and breakdown not in BREAKDOWNS:
+        raise ValueError(f"breakdownは {BREAKDOWNS} のいずれかです")
+    if len(periods) > MAX_PERIODS:
+        raise ValueError(f"期間は最大{MAX_PERIODS}件までです")
+    if not periods:
+        return []
+
+    type_map = {m.id: m.display_name for m in reference_registry.snapshot(MealType).objects}
+
+    in_any_period = Q()
+    columns = {}
+    for i, (start_date, end_date) in enumerate(periods):
+        in_period = Q(date__gte=start_date, date__lte=end_date)
+        in_any_period |= in_period
+        columns[f"p{i}"] = Sum("count", filter=in_period)
+
+    group_by = ["meal_type_id", "kind"]
+    qs = MealOrderDailyCount.objects.filter(in_any_period)
+    if breakdown == "day":
+        group_by.append("date")
+    elif breakdown == "weekday":
+        qs = qs.annotate(weekday=ExtractIsoWeekDay("date"))
+        group_by.append("weekday")
+    rows = qs.values(*group_by).annotate(**columns).order_by()
+
+    # 期間毎・内訳毎に (対象者種別, 食事種類ID) → 件数 を貯める
+    totals = [defaultdict(int) for _ in periods]
+    details = [defaultdict(lambda: defaultdict(int)) for _ in periods]
+    for row in rows:
+        key = (row["kind"], row["meal_type_id"])
+        for i in range(len(periods)):
+            count = row[f"p{i}"]
+            if not count:
+                continue
+            totals[i][key] += count
+            if breakdown == "day":
+                details[i][row["date"]][key] += count
+            elif breakdown == "weekday":
+                details[i][row["weekday"] - 1][key] += count
+
+    results = []
+    for i, (start_date, end_date) in enumerate(periods):
+        result = {"period": {"start": start_date, "end": end_date}}
+        result.update(_count_by_kind(totals[i], type_map))
+        if breakdown == "day":
+            result["breakdown"] = [
+                {"date": day, "weekday": get_weekday_jp(day), **_count_by_kind(counts, type_map)}
+                for day, counts in sorted(details[i].items())
+            ]
+        elif breakdown == "weekday":
+            result["breakdown"] = [
+                {"weekday": WEEKDAYS_JP[weekday], **_count_by_kind(counts, type_map)}
+                for weekday, counts in sorted(details[i].items())
+            ]
+        results.append(result)
+    return results
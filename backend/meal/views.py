@@ -1,21 +1,37 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import IsAdminUser, IsAuthenticatedOrReadOnly
+from rest_framework.permissions import IsAdminUser, IsAuthenticated, IsAuthenticatedOrReadOnly
 from drf_spectacular.utils import extend_schema, OpenApiResponse
 from rest_framework.decorators import api_view
-from django.db.models import Count
 from datetime import datetime
 
 from .models import MealType, MealOrder
+from guest.models import Guest
+from staff.models import Staff
 from .serializers import (
     MealTypeSerializer,
     GuestMealOrderSerializer,
     StaffMealOrderSerializer,
     MealOrderGenerateSerializer,
+    MealManifestQuerySerializer,
+    MealOrderListQuerySerializer,
+    MealOrderBatchSerializer,
 )
 from utils.api_response_utils import api_response
-from meal.utils.order_utils import generate_meal_orders_for_day
+from utils.pagination_utils import InvalidPageParam, keyset_paginate, parse_limit
+from utils.change_stamp_utils import conditional_on_change_stamps
+from utils.export_utils import (
+    EXPORT_CHUNK_SIZE,
+    ExportQuerySerializer,
+    filter_date_range,
+    streaming_export_response,
+)
+from meal.utils.batch_utils import MealOrderBatchError, save_meal_order_batch
+from meal.utils.manifest_utils import MANIFEST_HEADER, get_meal_manifest, iter_manifest_rows
+from meal.utils.order_utils import generate_meal_orders_for_range
+from meal.utils.rollup_utils import count_meal_order_list
+from meal.utils.stats_utils import BREAKDOWNS, MAX_PERIODS, count_meal_orders
 
 # ========================================
 # 食事の種類（MealType）API
@@ -135,17 +151,71 @@ class MealOrderListCreateView(APIView):
             return StaffMealOrderSerializer
         return GuestMealOrderSerializer
 
+    def get_queryset(self, params):
+        """
+        クエリパラメータで絞り込んだ食事注文を返す。
+        食事種類・利用者・スタッフは JOIN で同時に取得する。
+        """
+        qs = self.model.objects.select_related("meal_type", "guest", "staff")
+        if "date_from" in params:
+            qs = qs.filter(date__gte=params["date_from"])
+        if "date_to" in params:
+            qs = qs.filter(date__lte=params["date_to"])
+        if "meal_type_id" in params:
+            qs = qs.filter(meal_type_id=params["meal_type_id"])
+        if params.get("kind") == "guest":
+            qs = qs.filter(guest__isnull=False)
+        elif params.get("kind") == "staff":
+            qs = qs.filter(guest__isnull=True)
+        if params.get("ordered") is not None:
+            qs = qs.filter(ordered=params["ordered"])
+        return qs
+
     @extend_schema(
         operation_id="MealOrderList",
-        summary="食事注文一覧の取得",
+        summary="食事注文の一覧取得",
+        description="日付・期間・食事種類・対象者種別・注文あり / なしで絞り込み、(日付, ID) 順のカーソルでページングする。count は絞り込み後の全件数。",
         tags=["食事管理"],
-        responses={200: OpenApiResponse(description="食事注文一覧取得成功")},
+        parameters=[MealOrderListQuerySerializer],
+        responses={
+            200: OpenApiResponse(description="食事注文一覧取得成功"),
+            304: OpenApiResponse(description="前回取得時から変更なし（If-None-Match / If-Modified-Since）"),
+            400: OpenApiResponse(description="クエリパラメータエラー"),
+        },
+    )
+    @conditional_on_change_stamps(
+        MealOrder,
+        MealType,
+        Guest,
+        Staff,
+        vary=lambda view, request: view.get_serializer_class(request).__name__,
     )
     def get(self, request):
-        orders = self.model.objects.all()
+        query = MealOrderListQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return api_response(
+                code=400, message="バリデーションエラー", data=query.errors
+            )
+        params = query.validated_data
+
+        try:
+            rows, next_cursor = keyset_paginate(
+                self.get_queryset(params),
+                cursor=params.get("cursor"),
+                limit=parse_limit(params.get("limit")),
+            )
+        except InvalidPageParam as e:
+            return api_response(code=400, message=str(e))
+
         serializer_class = self.get_serializer_class(request)
-        serializer = serializer_class(orders, many=True)
-        return api_response(data=serializer.data)
+        serializer = serializer_class(rows, many=True)
+        return api_response(
+            data={
+                "results": serializer.data,
+                "count": count_meal_order_list(params),
+                "next_cursor": next_cursor,
+            }
+        )
 
     @extend_schema(
         operation_id="MealOrderCreate",
@@ -235,6 +305,42 @@ class MealOrderDetailView(APIView):
         return api_response(code=204, message="削除成功")
 
 
+class MealOrderBatchView(APIView):
+    """
+    食事注文の一括登録・更新
+    """
+
+    permission_classes = [IsAdminUser]
+    serializer_class = MealOrderBatchSerializer
+
+    @extend_schema(
+        operation_id="MealOrderBatch",
+        summary="食事注文の一括登録・更新",
+        description="複数の食事注文をまとめて登録（id なし）・更新（id あり）する。登録・更新した注文は手入力扱い（auto_generated=False）になる。存在・重複・過去日付のチェックは一括で読み込んだ集合に対して行い、1件でもエラーがあれば何も登録せず、項目毎の結果を返す。",
+        tags=["食事管理"],
+        request=MealOrderBatchSerializer,
+        responses={
+            200: OpenApiResponse(description="登録・更新成功（項目毎の結果）"),
+            400: OpenApiResponse(description="バリデーションエラー（項目毎の結果）"),
+        },
+    )
+    def post(self, request):
+        ser = self.serializer_class(data=request.data)
+        if not ser.is_valid():
+            return api_response(code=400, message="バリデーションエラー", data=ser.errors)
+
+        try:
+            results = save_meal_order_batch(ser.validated_data["orders"])
+        except MealOrderBatchError as e:
+            return api_response(code=400, message=str(e), data={"results": e.results})
+
+        created = sum(1 for r in results if r["status"] == "created")
+        return api_response(
+            message=f"{created}件を登録、{len(results) - created}件を更新しました。",
+            data={"results": results},
+        )
+
+
 # ========================================
 # 特殊操作API（集計、生成）
 # ========================================
@@ -253,31 +359,15 @@ class MealOrderCountView(APIView):
         date = request.query_params.get("date")
         if not date:
             return api_response(code=400, message="dateは必須です")
+        try:
+            date = datetime.strptime(date, "%Y-%m-%d").date()
+        except ValueError:
+            return api_response(code=400, message="dateはYYYY-MM-DD形式で指定してください")
 
-        meal_types = MealType.objects.values("id", "name", "display_name")
-        type_map = {m["id"]: m["display_name"] for m in meal_types}
-
-        guest_counts = (
-            MealOrder.objects.filter(date=date, guest__isnull=False)
-            .values("meal_type")
-            .annotate(count=Count("id"))
-        )
-        staff_counts = (
-            MealOrder.objects.filter(date=date, staff__isnull=False)
-            .values("meal_type")
-            .annotate(count=Count("id"))
-        )
-
-        guest_result = {type_map[g["meal_type"]]: g["count"] for g in guest_counts}
-        staff_result = {type_map[s["meal_type"]]: s["count"] for s in staff_counts}
-
-        total_result = {}
-        for name in set(guest_result.keys()) | set(staff_result.keys()):
-            total_result[name] = guest_result.get(name, 0) + staff_result.get(name, 0)
-
+        counts = count_meal_orders([(date, date)])[0]
         return api_response(
             message="カウント成功",
-            data={"guest": guest_result, "staff": staff_result, "total": total_result},
+            data={key: counts[key] for key in ("guest", "staff", "total")},
         )
 
 
@@ -292,7 +382,7 @@ class MealOrderCountPeriodsView(APIView):
     @extend_schema(
         operation_id="MealOrderCountPeriods",
         summary="複数期間の食事注文集計",
-        description="指定された複数の期間に対して、利用者・スタッフ別および合計の食事注文件数を集計します。",
+        description="指定された複数の期間に対して、利用者・スタッフ別および合計の食事注文件数を1クエリで集計します。breakdown に day / weekday を指定すると、日付毎・曜日毎の内訳も返します。",
         tags=["食事管理"],
         request={
             "application/json": {
@@ -300,7 +390,8 @@ class MealOrderCountPeriodsView(APIView):
                     "periods": [
                         {"start_date": "2025-04-01", "end_date": "2025-04-07"},
                         {"start_date": "2025-04-15", "end_date": "2025-04-21"},
-                    ]
+                    ],
+                    "breakdown": "weekday",
                 }
             }
         },
@@ -314,12 +405,13 @@ class MealOrderCountPeriodsView(APIView):
                 code=400, message="periodsは必須で、リスト形式で指定してください"
             )
 
-        # 食事種類マスタを取得（ID→表示名のマッピング）
-        meal_types = MealType.objects.values("id", "name", "display_name")
-        type_map = {m["id"]: m["display_name"] for m in meal_types}
-
-        results = []
+        breakdown = request.data.get("breakdown")
+        if breakdown is not None and breakdown not in BREAKDOWNS:
+            return api_response(
+                code=400, message=f"breakdownは {', '.join(BREAKDOWNS)} のいずれかです"
+            )
 
+        valid_periods = []
         for period in periods:
             start_date = period.get("start_date")
             end_date = period.get("end_date")
@@ -333,50 +425,13 @@ class MealOrderCountPeriodsView(APIView):
             except ValueError:
                 continue  # 日付形式エラーはスキップ
 
-            # 利用者別集計
-            guest_counts = (
-                MealOrder.objects.filter(
-                    date__range=(start_date, end_date), guest__isnull=False
-                )
-                .values("meal_type")
-                .annotate(count=Count("id"))
-            )
-
-            # スタッフ別集計
-            staff_counts = (
-                MealOrder.objects.filter(
-                    date__range=(start_date, end_date), staff__isnull=False
-                )
-                .values("meal_type")
-                .annotate(count=Count("id"))
-            )
-
-            guest_result = {
-                type_map.get(g["meal_type"], "不明"): g["count"] for g in guest_counts
-            }
-            staff_result = {
-                type_map.get(s["meal_type"], "不明"): s["count"] for s in staff_counts
-            }
+            valid_periods.append((start_date, end_date))
 
-            # 合計を作成
-            total_result = {}
-            for name in set(guest_result.keys()) | set(staff_result.keys()):
-                total_result[name] = guest_result.get(name, 0) + staff_result.get(
-                    name, 0
-                )
-
-            results.append(
-                {
-                    "period": {
-                        "start": start_date.strftime("%Y-%m-%d"),
-                        "end": end_date.strftime("%Y-%m-%d"),
-                    },
-                    "guest": guest_result,
-                    "staff": staff_result,
-                    "total": total_result,
-                }
-            )
+        if len(valid_periods) > MAX_PERIODS:
+            return api_response(code=400, message=f"期間は最大{MAX_PERIODS}件までです")
 
+        # 全期間を1クエリで集計
+        results = count_meal_orders(valid_periods, breakdown=breakdown)
         return api_response(message="集計成功", data=results)
 
 
@@ -386,7 +441,7 @@ class MealOrderAutoGenerateView(APIView):
     @extend_schema(
         operation_id="MealOrderAutoGenerate",
         summary="食事注文の自動生成と件数集計",
-        description="指定された日付の食事注文を自動生成し、その日の食事種類ごとの件数を返す。",
+        description="指定された日付（date）または期間（start_date〜end_date）の食事注文を一括で自動生成し（手入力の注文は上書きしない）、日付毎の作成・更新・削除件数と、期間内の食事種類ごとの件数を返す。",
         tags=["食事管理"],
         request=MealOrderGenerateSerializer,
         responses={200: OpenApiResponse(description="自動生成と件数集計成功")},
@@ -398,39 +453,123 @@ class MealOrderAutoGenerateView(APIView):
                 code=400, message="バリデーションエラー", data=serializer.errors
             )
 
-        parsed_date = serializer.validated_data["date"]
+        start_date = serializer.validated_data["start_date"]
+        end_date = serializer.validated_data["end_date"]
 
-        # 自動生成
-        generate_meal_orders_for_day(parsed_date)
+        # 自動生成（手入力の注文は、スケジュール変更時の同期・事前生成と同じく上書きしない）
+        summary = generate_meal_orders_for_range(start_date, end_date, overwrite_manual=False)
 
-        # 食事種類の表示名マップを作成
-        meal_types = MealType.objects.values("id", "name", "display_name")
-        type_map = {m["id"]: m["display_name"] for m in meal_types}
+        counts = count_meal_orders([(start_date, end_date)])[0]
 
-        # ゲストとスタッフの食事注文件数をカウント
-        guest_counts = (
-            MealOrder.objects.filter(date=parsed_date, guest__isnull=False)
-            .values("meal_type")
-            .annotate(count=Count("id"))
+        period = str(start_date) if start_date == end_date else f"{start_date}〜{end_date}"
+        return api_response(
+            message=f"{period} の食事注文を自動生成しました。",
+            data={
+                "guest": counts["guest"],
+                "staff": counts["staff"],
+                "total": counts["total"],
+                "summary": summary,
+            },
         )
-        staff_counts = (
-            MealOrder.objects.filter(date=parsed_date, staff__isnull=False)
-            .values("meal_type")
-            .annotate(count=Count("id"))
+
+
+class MealOrderExportView(APIView):
+    """
+    食事注文のエクスポート（CSV / XLSX をストリーミングで返す）
+    """
+
+    permission_classes = [IsAdminUser]
+    HEADER = [
+        "日付",
+        "食事",
+        "利用者ID",
+        "利用者名",
+        "スタッフID",
+        "スタッフ名",
+        "注文あり",
+        "自動生成",
+        "備考",
+    ]
+
+    @extend_schema(
+        operation_id="MealOrderExport",
+        summary="食事注文のエクスポート",
+        description="期間（date_from〜date_to）の食事注文を1行ずつ読み出し、CSV / XLSX として逐次返す。",
+        tags=["食事管理"],
+        parameters=[ExportQuerySerializer],
+        responses={
+            200: OpenApiResponse(description="ファイル（CSV / XLSX）"),
+            400: OpenApiResponse(description="クエリパラメータエラー"),
+        },
+    )
+    def get(self, request):
+        query = ExportQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return api_response(
+                code=400, message="バリデーションエラー", data=query.errors
+            )
+        params = query.validated_data
+
+        qs = filter_date_range(
+            MealOrder.objects.all(), params.get("date_from"), params.get("date_to")
+        )
+        rows = (
+            qs.order_by("date", "id")
+            .values_list(
+                "date",
+                "meal_type__name",
+                "guest_id",
+                "guest__name",
+                "staff_id",
+                "staff__name",
+                "ordered",
+                "auto_generated",
+                "note",
+            )
+            .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        )
+        return streaming_export_response(
+            "meal_orders", self.HEADER, rows, params["file_format"]
         )
 
-        guest_result = {
-            type_map.get(g["meal_type"], "不明"): g["count"] for g in guest_counts
-        }
-        staff_result = {
-            type_map.get(s["meal_type"], "不明"): s["count"] for s in staff_counts
-        }
 
-        total_result = {}
-        for name in set(guest_result.keys()) | set(staff_result.keys()):
-            total_result[name] = guest_result.get(name, 0) + staff_result.get(name, 0)
+# ========================================
+# 厨房向けの配膳表API
+# ========================================
 
-        return api_response(
-            message=f"{parsed_date} の食事注文を自動生成しました。",
-            data={"guest": guest_result, "staff": staff_result, "total": total_result},
+
+class MealManifestView(APIView):
+    """
+    指定日（または数日間）の配膳表（食事毎の利用者・スタッフの氏名と備考の一覧）
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        operation_id="MealManifest",
+        summary="配膳表の取得",
+        description="指定日（または最大7日間）の注文ありの食事注文を食事種類毎にまとめ、利用者・スタッフの氏名と、スケジュールの食事に関する備考・注文の備考を返す。結果はキャッシュされ、その日の注文・スケジュールが変わると作り直される。file_format に csv / xlsx を指定すると印刷用のファイルを返す。",
+        tags=["食事管理"],
+        parameters=[MealManifestQuerySerializer],
+        responses={
+            200: OpenApiResponse(description="配膳表（JSON / CSV / XLSX）"),
+            400: OpenApiResponse(description="クエリパラメータエラー"),
+        },
+    )
+    def get(self, request):
+        query = MealManifestQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return api_response(
+                code=400, message="バリデーションエラー", data=query.errors
+            )
+        params = query.validated_data
+
+        manifest = get_meal_manifest(params["start_date"], params["end_date"])
+        if params["file_format"] == "json":
+            return api_response(data=manifest)
+        return streaming_export_response(
+            f"meal_manifest_{params['start_date']:%Y%m%d}",
+            MANIFEST_HEADER,
+            iter_manifest_rows(manifest),
+            params["file_format"],
         )
@@ -138,6 +138,61 @@ STATIC_URL = "static/"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# =========================================
+# キャッシュ設定
+# =========================================
+
+# default: 作成済みの配膳表など、版番号をキーに含めて保持する内容のキャッシュ（プロセス毎でよい）
+# stamps: 参照データ・配膳表の版番号と一覧の変更スタンプ（ETag / Last-Modified）。
+#   管理コマンドなど別プロセスの書き込みもサーバーに伝わるよう、DB のテーブルで共有する
+#   （テーブルは staff のマイグレーションで作成される）
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "stamps": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "shared_change_stamps",
+        "TIMEOUT": None,
+        # 日付毎の配膳表の版が溜まっても、有効な版が間引かれないようにする
+        "OPTIONS": {"MAX_ENTRIES": 100000},
+    },
+}
+
+# =========================================
+# シフト展開パターン設定
+# =========================================
+
+# 起点シフトコード → 連続して割り当てるシフトコード列（既定の 夜→明→休 に追加・上書き）
+SHIFT_EXPANSION_PATTERNS = {
+    "夜": ["夜", "明", "休"],
+}
+
+# =========================================
+# 勤務ルール設定
+# =========================================
+
+# 勤務ルール検証の設定（staff.utils.rule_utils.DEFAULT_SHIFT_RULES を上書き）
+SHIFT_RULES = {
+    "min_rest_minutes": 11 * 60,  # 勤務間の最低休息時間（分）
+    "max_consecutive_days": 6,  # 最大連続勤務日数
+    "max_period_work_minutes": 177 * 60,  # 集計期間あたりの実働時間上限（分）
+}
+
+# 集計期間の設定（期間表 staff.ShiftPeriod を作る際の既定値）
+SHIFT_PERIOD = {
+    "start_day": 15,  # 期間の開始日（締め日の翌日。1〜28）
+    "months_behind": 12,  # migrate 時に作成しておく過去の期間数
+    "months_ahead": 24,  # migrate 時に作成しておく先の期間数
+}
+
+# 食事注文の事前生成（pregenerate_meal_orders コマンド）の設定
+MEAL_PREGENERATION = {
+    "days": 7,  # 今日から何日先までの注文を作っておくか
+    "workers": 4,  # 並列に処理するスレッド数（SQLite では常に 1）
+    "interval_minutes": 60,  # --loop 時の実行間隔（分）
+}
+
 # =========================================
 # カスタムユーザーモデル設定
 # =========================================
@@ -1,11 +1,22 @@
 from django.contrib import admin
-from .models import Role, Staff, ShiftType, WorkSchedule
+from .models import (
+    Role,
+    Staff,
+    ShiftType,
+    WorkSchedule,
+    StaffPeriodSummary,
+    ShiftPeriod,
+    RosterDraft,
+)
 
 
 admin.site.register(Role)
 admin.site.register(Staff)
 admin.site.register(WorkSchedule)
 admin.site.register(ShiftType)
+admin.site.register(StaffPeriodSummary)
+admin.site.register(ShiftPeriod)
+admin.site.register(RosterDraft)
 
 
 class ShiftTypeAdmin(admin.ModelAdmin):
@@ -19,8 +30,7 @@ class ShiftTypeAdmin(admin.ModelAdmin):
     )
 
     def get_work_hours(self, obj):
-        # 時間（timedelta）を float に変換（例：8.75時間）
-        duration = obj.get_work_duration()
-        return round(duration.total_seconds() / 3600, 2)
+        # 保存済みの実働分を時間に換算（例：8.75時間）
+        return round(obj.work_minutes / 60, 2)
 
     get_work_hours.short_description = "勤務時間（h）"
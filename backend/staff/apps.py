@@ -11,3 +11,8 @@ class StaffConfig(AppConfig):
         # post_migrate シグナル（マイグレーション後に実行される処理）を登録する。
         # これにより、DBマイグレーション完了後に初期データ（職種やシフト）を自動作成できる。
         from . import signals
+        from .utils.period_utils import resolve_period_range
+        from utils.date_utils import register_period_resolver
+
+        # 集計期間は期間表（ShiftPeriod）を優先して引く
+        register_period_resolver(resolve_period_range)
@@ -0,0 +1,29 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from staff.utils.period_utils import generate_shift_periods
+
+
+def parse_date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"日付はYYYY-MM-DD形式で指定してください: {value}")
+
+
+class Command(BaseCommand):
+    help = "集計期間の期間表（ShiftPeriod）に、指定範囲を覆う期間を継ぎ足す"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", required=True, help="開始日（YYYY-MM-DD）")
+        parser.add_argument("--end", required=True, help="終了日（YYYY-MM-DD）")
+
+    def handle(self, *args, **options):
+        start = parse_date(options["start"])
+        end = parse_date(options["end"])
+        if start > end:
+            raise CommandError("終了日は開始日以降の日付を指定してください")
+
+        count = generate_shift_periods(start, end)
+        self.stdout.write(self.style.SUCCESS(f"{count}件の集計期間を作成しました。"))
@@ -0,0 +1,48 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from staff.utils.summary_utils import (
+    rebuild_staff_period_summaries,
+    verify_staff_period_summaries,
+)
+
+
+def parse_date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"日付はYYYY-MM-DD形式で指定してください: {value}")
+
+
+class Command(BaseCommand):
+    help = "スタッフ期間集計（StaffPeriodSummary）を勤務シフトから作り直す・検証する"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", required=True, help="開始日（YYYY-MM-DD）")
+        parser.add_argument("--end", required=True, help="終了日（YYYY-MM-DD）")
+        parser.add_argument(
+            "--verify-only",
+            action="store_true",
+            help="作り直さずに保存済みの集計を検証する",
+        )
+
+    def handle(self, *args, **options):
+        start = parse_date(options["start"])
+        end = parse_date(options["end"])
+        if start > end:
+            raise CommandError("終了日は開始日以降の日付を指定してください")
+
+        if not options["verify_only"]:
+            count = rebuild_staff_period_summaries(start, end)
+            self.stdout.write(f"{count}件の期間集計を作成しました。")
+
+        mismatches = verify_staff_period_summaries(start, end)
+        for m in mismatches:
+            self.stderr.write(
+                f"不一致: staff={m['staff_id']} period={m['period_start']} "
+                f"stored={m['stored']} expected={m['expected']}"
+            )
+        if mismatches:
+            raise CommandError(f"{len(mismatches)}件の不一致があります。")
+        self.stdout.write(self.style.SUCCESS("期間集計の検証に成功しました。"))
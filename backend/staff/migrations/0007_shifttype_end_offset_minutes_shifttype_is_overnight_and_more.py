@@ -0,0 +1,68 @@
+# Generated by Django 4.2.30 on 2026-10-17 15:19
+
+from django.db import migrations, models
+
+
+def backfill_work_minutes(apps, schema_editor):
+    """
+    既存のシフト種類の派生フィールドを計算し、勤務シフトに実働時間を写す。
+    """
+    ShiftType = apps.get_model("staff", "ShiftType")
+    WorkSchedule = apps.get_model("staff", "WorkSchedule")
+
+    for shift in ShiftType.objects.all():
+        start = shift.start_time.hour * 60 + shift.start_time.minute
+        end = shift.end_time.hour * 60 + shift.end_time.minute
+        is_overnight = end <= start
+        if is_overnight:
+            end += 24 * 60
+
+        shift.start_offset_minutes = start
+        shift.end_offset_minutes = end
+        shift.is_overnight = is_overnight
+        shift.work_minutes = end - start - (shift.break_minutes or 0)
+        shift.save(
+            update_fields=[
+                "start_offset_minutes",
+                "end_offset_minutes",
+                "is_overnight",
+                "work_minutes",
+            ]
+        )
+        WorkSchedule.objects.filter(shift=shift).update(work_minutes=shift.work_minutes)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('staff', '0006_workschedule_meal_note_workschedule_needs_breakfast_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shifttype',
+            name='end_offset_minutes',
+            field=models.IntegerField(default=0, editable=False, verbose_name='終了オフセット(分)'),
+        ),
+        migrations.AddField(
+            model_name='shifttype',
+            name='is_overnight',
+            field=models.BooleanField(default=False, editable=False, verbose_name='翌日跨り'),
+        ),
+        migrations.AddField(
+            model_name='shifttype',
+            name='start_offset_minutes',
+            field=models.IntegerField(default=0, editable=False, verbose_name='開始オフセット(分)'),
+        ),
+        migrations.AddField(
+            model_name='shifttype',
+            name='work_minutes',
+            field=models.IntegerField(default=0, editable=False, verbose_name='実働時間(分)'),
+        ),
+        migrations.AddField(
+            model_name='workschedule',
+            name='work_minutes',
+            field=models.IntegerField(default=0, editable=False, verbose_name='実働時間(分)'),
+        ),
+        migrations.RunPython(backfill_work_minutes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-17 15:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('staff', '0007_shifttype_end_offset_minutes_shifttype_is_overnight_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StaffPeriodSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_start', models.DateField(verbose_name='期間開始日')),
+                ('work_minutes', models.IntegerField(default=0, verbose_name='実働時間(分)')),
+                ('night_count', models.IntegerField(default=0, verbose_name='夜勤回数')),
+                ('paid_leave_count', models.IntegerField(default=0, verbose_name='有給回数')),
+                ('staff', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='period_summaries', to='staff.staff', verbose_name='スタッフ')),
+            ],
+            options={
+                'verbose_name': 'スタッフ期間集計',
+                'verbose_name_plural': 'スタッフ期間集計',
+                'ordering': ['period_start', 'staff'],
+                'unique_together': {('staff', 'period_start')},
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.30 on 2026-10-17 15:28
+
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('staff', '0008_staffperiodsummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RosterDraft',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_start', models.DateField(verbose_name='期間開始日')),
+                ('status', models.CharField(choices=[('draft', '下書き'), ('published', '公開済み')], default='draft', max_length=20, verbose_name='状態')),
+                ('stats', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='作成結果')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='作成日時')),
+                ('published_at', models.DateTimeField(blank=True, null=True, verbose_name='公開日時')),
+            ],
+            options={
+                'verbose_name': '勤務表下書き',
+                'verbose_name_plural': '勤務表下書き',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RosterDraftEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='日付')),
+                ('draft', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='staff.rosterdraft', verbose_name='勤務表下書き')),
+                ('shift', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='staff.shifttype', verbose_name='シフト')),
+                ('staff', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='staff.staff', verbose_name='スタッフ')),
+            ],
+            options={
+                'verbose_name': '勤務表下書きセル',
+                'verbose_name_plural': '勤務表下書きセル',
+                'ordering': ['date', 'staff'],
+                'unique_together': {('draft', 'staff', 'date')},
+            },
+        ),
+    ]
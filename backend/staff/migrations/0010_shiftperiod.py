@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-17 15:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('staff', '0009_rosterdraft'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShiftPeriod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_date', models.DateField(unique=True, verbose_name='期間開始日')),
+                ('end_date', models.DateField(unique=True, verbose_name='期間終了日（この日を含まない）')),
+                ('is_override', models.BooleanField(default=False, verbose_name='個別設定')),
+            ],
+            options={
+                'verbose_name': '集計期間',
+                'verbose_name_plural': '集計期間',
+                'ordering': ['start_date'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='shiftperiod',
+            constraint=models.CheckConstraint(check=models.Q(('end_date__gt', models.F('start_date'))), name='shift_period_end_after_start'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_cache_tables(apps, schema_editor):
+    """
+    settings.CACHES の DB キャッシュ（変更スタンプ・版番号を共有する "stamps"）のテーブルを作成する。
+    post_migrate で登録する初期データの保存時にも版番号を書き込むため、マイグレーションで作っておく。
+    既にあるテーブルは作成しない。
+    """
+    call_command("createcachetable", database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('staff', '0010_shiftperiod'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_tables, migrations.RunPython.noop),
+    ]
@@ -1,11 +1,31 @@
-﻿from django.db import models
+﻿from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.db.models import Sum
 from user.models import User
-from datetime import datetime, timedelta, date
+from datetime import timedelta
 
 from utils.date_utils import get_weekday_jp, get_shift_period_range
 from utils.model_utils import BaseNeedMeal
 
 
+def calc_shift_minutes(start_time, end_time, break_minutes=0):
+    """
+    シフトの開始・終了オフセット（当日0時からの分）と実働分を計算する。
+
+    終了時刻が開始時刻以前の場合は翌日跨り（夜勤など）とみなし、
+    終了オフセットに24時間を加える。
+
+    Returns:
+        tuple(int, int, bool, int): (開始オフセット, 終了オフセット, 翌日跨りか, 実働分)
+    """
+    start = start_time.hour * 60 + start_time.minute
+    end = end_time.hour * 60 + end_time.minute
+    is_overnight = end <= start
+    if is_overnight:
+        end += 24 * 60
+    return start, end, is_overnight, end - start - (break_minutes or 0)
+
+
 class Role(models.Model):
     """職種モデル（正社員、アルバイト、夜勤専門など）を管理する"""
 
@@ -41,39 +61,29 @@ class Staff(models.Model):
     def __str__(self):
         return self.name
 
-    def monthly_work_hours(self, target_date=None):
+    def monthly_work_hours(self, target_date=None, period_id=None):
         """
         指定された月の出勤実働時間（休憩時間を除く）を集計して返す。
 
         Args:
             target_date (datetime.date, optional): 任意の日付。指定がなければ今日。
+            period_id (int, optional): 集計期間ID（指定した場合は target_date より優先）
 
         Returns:
             datetime.timedelta: 合計実働時間
         """
-        from .models import WorkSchedule
-
-        start_date, end_date = get_shift_period_range(target_date)
-        schedules = WorkSchedule.objects.filter(
+        from .models import ShiftPeriod, WorkSchedule
+
+        if period_id is not None:
+            period = ShiftPeriod.objects.get(pk=period_id)
+            start_date, end_date = period.start_date, period.end_date
+        else:
+            start_date, end_date = get_shift_period_range(target_date)
+        total_minutes = WorkSchedule.objects.filter(
             staff=self, date__gte=start_date, date__lt=end_date
-        )
-
-        total = timedelta()
-        for schedule in schedules:
-            shift = schedule.shift
-            start_dt = datetime.combine(schedule.date, shift.start_time)
-            end_dt = datetime.combine(schedule.date, shift.end_time)
-
-            # 夜勤など翌日跨りの場合対応
-            if end_dt <= start_dt:
-                end_dt += timedelta(days=1)
-
-            work_duration = end_dt - start_dt
-            break_duration = timedelta(minutes=shift.break_minutes or 0)
+        ).aggregate(total=Sum("work_minutes"))["total"]
 
-            total += work_duration - break_duration
-
-        return total
+        return timedelta(minutes=total_minutes or 0)
 
 
 class ShiftType(models.Model):
@@ -91,6 +101,19 @@ class ShiftType(models.Model):
         default="#00000",
         verbose_name="表示色（オプション）",
     )
+    # 以下は start_time / end_time / break_minutes から save() 時に計算して保存する
+    start_offset_minutes = models.IntegerField(
+        default=0, editable=False, verbose_name="開始オフセット(分)"
+    )
+    end_offset_minutes = models.IntegerField(
+        default=0, editable=False, verbose_name="終了オフセット(分)"
+    )
+    is_overnight = models.BooleanField(
+        default=False, editable=False, verbose_name="翌日跨り"
+    )
+    work_minutes = models.IntegerField(
+        default=0, editable=False, verbose_name="実働時間(分)"
+    )
 
     class Meta:
         verbose_name = "シフトの種類"
@@ -99,6 +122,45 @@ class ShiftType(models.Model):
     def __str__(self):
         return f"{self.code}（{self.name}）"
 
+    def save(self, *args, **kwargs):
+        """
+        時刻系の派生フィールドを再計算して保存し、
+        実働時間が変わった場合は紐づく勤務シフトにも反映する。
+        """
+        (
+            self.start_offset_minutes,
+            self.end_offset_minutes,
+            self.is_overnight,
+            self.work_minutes,
+        ) = calc_shift_minutes(self.start_time, self.end_time, self.break_minutes)
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = set(update_fields) | {
+                "start_offset_minutes",
+                "end_offset_minutes",
+                "is_overnight",
+                "work_minutes",
+            }
+
+        previous = None
+        if self.pk is not None:
+            previous = (
+                ShiftType.objects.filter(pk=self.pk)
+                .values_list("code", "work_minutes")
+                .first()
+            )
+        super().save(*args, **kwargs)
+
+        if previous is not None and previous != (self.code, self.work_minutes):
+            from staff.utils.summary_utils import rebuild_summaries_for_shift
+
+            WorkSchedule.objects.filter(shift=self).exclude(
+                work_minutes=self.work_minutes
+            ).update(work_minutes=self.work_minutes)
+            # 実働時間・コードが変わると期間集計の値も変わるため作り直す
+            rebuild_summaries_for_shift(self)
+
     def get_work_duration(self):
         """
         勤務時間（休憩時間差引後）をtimedeltaで取得する。
@@ -106,15 +168,7 @@ class ShiftType(models.Model):
         Returns:
             datetime.timedelta: 実働時間
         """
-        today = datetime.today().date()
-        start_dt = datetime.combine(today, self.start_time)
-        end_dt = datetime.combine(today, self.end_time)
-
-        if end_dt <= start_dt:
-            end_dt += timedelta(days=1)
-
-        duration = end_dt - start_dt - timedelta(minutes=self.break_minutes)
-        return duration
+        return timedelta(minutes=self.work_minutes)
 
 
 class WorkSchedule(BaseNeedMeal,models.Model):
@@ -126,6 +180,10 @@ class WorkSchedule(BaseNeedMeal,models.Model):
     )
     date = models.DateField(verbose_name="日付")
     note = models.TextField(blank=True, null=True, verbose_name="備考")
+    # シフト種類の実働時間（分）の写し。集計時に JOIN せず SUM() するために保持する
+    work_minutes = models.IntegerField(
+        default=0, editable=False, verbose_name="実働時間(分)"
+    )
 
     class Meta:
         unique_together = ("staff", "date")
@@ -136,6 +194,15 @@ class WorkSchedule(BaseNeedMeal,models.Model):
     def __str__(self):
         return f"{self.date} - {self.staff.name} - {self.shift.code}"
 
+    def save(self, *args, **kwargs):
+        """シフト種類の実働時間を写して保存する"""
+        self.work_minutes = self.shift.work_minutes
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = set(update_fields) | {"work_minutes"}
+        super().save(*args, **kwargs)
+
     @property
     def weekday_jp(self):
         """
@@ -145,3 +212,119 @@ class WorkSchedule(BaseNeedMeal,models.Model):
             str: 日本語の曜日名（例：月、火、水）
         """
         return get_weekday_jp(self.date)
+
+
+class ShiftPeriod(models.Model):
+    """
+    シフト集計期間の暦（期間表）
+    - 締め日の設定から generate_shift_periods() で事前に作成しておく
+    - 年末年始などで締めをずらす場合は、override_shift_period() で個別に変更する
+    - 勤務日をこの表に結合すれば、DB 上で期間ID単位に集計できる
+    """
+
+    start_date = models.DateField(unique=True, verbose_name="期間開始日")
+    end_date = models.DateField(
+        unique=True, verbose_name="期間終了日（この日を含まない）"
+    )
+    is_override = models.BooleanField(default=False, verbose_name="個別設定")
+
+    class Meta:
+        verbose_name = "集計期間"
+        verbose_name_plural = "集計期間"
+        ordering = ["start_date"]
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(end_date__gt=models.F("start_date")),
+                name="shift_period_end_after_start",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.start_date}〜{self.end_date}"
+
+
+class StaffPeriodSummary(models.Model):
+    """
+    スタッフ毎・集計期間（15日〜翌月15日）毎の勤務集計
+    - 勤務シフトの保存・削除時に差分で更新される
+    - ダッシュボード表示時は1スタッフ1行を読むだけで済む
+    """
+
+    staff = models.ForeignKey(
+        Staff,
+        on_delete=models.CASCADE,
+        verbose_name="スタッフ",
+        related_name="period_summaries",
+    )
+    period_start = models.DateField(verbose_name="期間開始日")
+    work_minutes = models.IntegerField(default=0, verbose_name="実働時間(分)")
+    night_count = models.IntegerField(default=0, verbose_name="夜勤回数")
+    paid_leave_count = models.IntegerField(default=0, verbose_name="有給回数")
+
+    class Meta:
+        unique_together = ("staff", "period_start")
+        verbose_name = "スタッフ期間集計"
+        verbose_name_plural = "スタッフ期間集計"
+        ordering = ["period_start", "staff"]
+
+    def __str__(self):
+        return f"{self.period_start} - {self.staff.name}"
+
+    @property
+    def work_hours(self):
+        """実働時間（時間単位）"""
+        return round(self.work_minutes / 60, 2)
+
+
+class RosterDraft(models.Model):
+    """
+    自動作成した勤務表の下書き（集計期間単位）
+    - 公開（publish）するまで勤務シフトには反映されない
+    - 不足人数・ルール違反などの作成結果を stats に保持する
+    """
+
+    STATUS_CHOICES = [
+        ("draft", "下書き"),
+        ("published", "公開済み"),
+    ]
+
+    period_start = models.DateField(verbose_name="期間開始日")
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default="draft", verbose_name="状態"
+    )
+    stats = models.JSONField(
+        default=dict, encoder=DjangoJSONEncoder, verbose_name="作成結果"
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="作成日時")
+    published_at = models.DateTimeField(null=True, blank=True, verbose_name="公開日時")
+
+    class Meta:
+        verbose_name = "勤務表下書き"
+        verbose_name_plural = "勤務表下書き"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.period_start} - {self.get_status_display()}"
+
+
+class RosterDraftEntry(models.Model):
+    """勤務表下書きの1セル（スタッフ × 日付）"""
+
+    draft = models.ForeignKey(
+        RosterDraft,
+        on_delete=models.CASCADE,
+        related_name="entries",
+        verbose_name="勤務表下書き",
+    )
+    staff = models.ForeignKey(Staff, on_delete=models.CASCADE, verbose_name="スタッフ")
+    date = models.DateField(verbose_name="日付")
+    shift = models.ForeignKey(ShiftType, on_delete=models.CASCADE, verbose_name="シフト")
+
+    class Meta:
+        unique_together = ("draft", "staff", "date")
+        verbose_name = "勤務表下書きセル"
+        verbose_name_plural = "勤務表下書きセル"
+        ordering = ["date", "staff"]
+
+    def __str__(self):
+        return f"{self.date} - {self.staff.name} - {self.shift.code}"
@@ -1,7 +1,16 @@
 ﻿from rest_framework import serializers
-from .models import Role, Staff, ShiftType, WorkSchedule
+from .models import (
+    Role,
+    Staff,
+    ShiftType,
+    WorkSchedule,
+    StaffPeriodSummary,
+    ShiftPeriod,
+    RosterDraft,
+)
 
-from utils.date_utils import get_weekday_jp
+from utils.date_utils import get_shift_period_range, get_weekday_jp
+from utils.reference_data_utils import reference_registry
 
 
 class RoleSerializer(serializers.ModelSerializer):
@@ -63,9 +72,9 @@ class ShiftTypeSerializer(serializers.ModelSerializer):
 
     def get_work_hours(self, obj):
         """
-        シフトの実働時間（時間単位）を計算して返す。
+        シフトの実働時間（時間単位）を返す（保存済みの実働分から換算）。
         """
-        return round(obj.get_work_duration().total_seconds() / 3600, 2)
+        return round(obj.work_minutes / 60, 2)
 
     def validate_code(self, value):
         """コードバリデーション：空欄禁止＆英数字のみ許可"""
@@ -132,3 +141,385 @@ class WorkScheduleSerializer(serializers.ModelSerializer):
         if value < date.today():
             raise serializers.ValidationError("過去の日付は指定できません。")
         return value
+
+
+class WorkScheduleListQuerySerializer(serializers.Serializer):
+    """
+    勤務シフト一覧取得時のクエリパラメータ（絞り込み・ページング）を検証するシリアライザー
+    """
+
+    date_from = serializers.DateField(required=False, help_text="開始日（以上）")
+    date_to = serializers.DateField(required=False, help_text="終了日（以下）")
+    staff_id = serializers.IntegerField(required=False, help_text="スタッフID")
+    shift_code = serializers.CharField(required=False, help_text="シフトコード")
+    cursor = serializers.CharField(required=False, help_text="次ページ用カーソル")
+    limit = serializers.IntegerField(
+        required=False, min_value=1, help_text="1ページの件数（最大500）"
+    )
+
+    def validate(self, attrs):
+        """開始日・終了日の前後関係をチェック"""
+        date_from = attrs.get("date_from")
+        date_to = attrs.get("date_to")
+        if date_from and date_to and date_from > date_to:
+            raise serializers.ValidationError(
+                {"date_to": ["終了日は開始日以降の日付を指定してください。"]}
+            )
+        return attrs
+
+
+class WorkScheduleGridRowSerializer(serializers.Serializer):
+    """月間グリッドの1行（1スタッフ分）"""
+
+    staff_id = serializers.IntegerField(help_text="スタッフID")
+    shifts = serializers.ListField(
+        child=serializers.CharField(allow_blank=True, allow_null=True),
+        help_text="dates と同じ順序のシフトコード（空欄は変更なし）",
+    )
+
+
+class WorkScheduleGridSerializer(serializers.Serializer):
+    """
+    スタッフ × 日付のシフトコード表を一括登録するためのシリアライザー。
+    スタッフ・シフト種類は事前に一括取得し、全セルを1回の走査で検証する。
+    """
+
+    dates = serializers.ListField(
+        child=serializers.DateField(), allow_empty=False, help_text="列の日付"
+    )
+    rows = WorkScheduleGridRowSerializer(many=True, allow_empty=False)
+    check_rules = serializers.BooleanField(
+        default=False, help_text="登録前に勤務ルールを検証する"
+    )
+
+    def validate_dates(self, value):
+        """日付バリデーション：重複・過去日付は禁止"""
+        from datetime import date
+
+        if len(set(value)) != len(value):
+            raise serializers.ValidationError("日付が重複しています。")
+        if min(value) < date.today():
+            raise serializers.ValidationError("過去の日付は指定できません。")
+        return value
+
+    def validate(self, attrs):
+        """
+        全セルを検証し、(staff_id, date, shift_id) のリストを entries として追加する。
+        """
+        dates = attrs["dates"]
+        rows = attrs["rows"]
+
+        staff_ids = set(
+            Staff.objects.filter(id__in={r["staff_id"] for r in rows}).values_list(
+                "id", flat=True
+            )
+        )
+        shift_map = {
+            code: shift.id
+            for code, shift in reference_registry.snapshot(ShiftType).by_code.items()
+        }
+
+        errors = []
+        entries = []
+        for index, row in enumerate(rows):
+            staff_id = row["staff_id"]
+            if staff_id not in staff_ids:
+                errors.append({"row": index, "message": "スタッフが存在しません。"})
+                continue
+            if len(row["shifts"]) != len(dates):
+                errors.append(
+                    {"row": index, "message": "シフト数が日付数と一致しません。"}
+                )
+                continue
+            for day, code in zip(dates, row["shifts"]):
+                if not code:
+                    continue
+                shift_id = shift_map.get(code.strip())
+                if shift_id is None:
+                    errors.append(
+                        {
+                            "row": index,
+                            "date": day,
+                            "message": f"シフトコード「{code}」は存在しません。",
+                        }
+                    )
+                    continue
+                entries.append((staff_id, day, shift_id))
+
+        if errors:
+            raise serializers.ValidationError({"rows": errors})
+
+        attrs["entries"] = entries
+        return attrs
+
+
+class ShiftExpansionRequestSerializer(serializers.Serializer):
+    """連続シフト展開の1依頼（スタッフ・開始日・起点シフトコード）"""
+
+    staff_id = serializers.IntegerField(help_text="スタッフID")
+    date = serializers.DateField(help_text="開始日")
+    code = serializers.CharField(default="夜", help_text="起点シフトコード（既定：夜）")
+
+
+class ShiftExpansionSerializer(serializers.Serializer):
+    """
+    夜勤など連続シフトの一括展開リクエストを検証するシリアライザー
+    """
+
+    requests = ShiftExpansionRequestSerializer(many=True, allow_empty=False)
+    on_collision = serializers.ChoiceField(
+        choices=["overwrite", "skip", "abort"],
+        default="overwrite",
+        help_text="既存シフトと衝突した場合の扱い",
+    )
+    check_rules = serializers.BooleanField(
+        default=False, help_text="登録前に勤務ルールを検証する"
+    )
+
+    def validate_requests(self, value):
+        """スタッフの存在・展開パターンの有無をまとめてチェック"""
+        from staff.utils.shift_utils import get_shift_patterns
+
+        patterns = get_shift_patterns()
+        staff_ids = set(
+            Staff.objects.filter(id__in={r["staff_id"] for r in value}).values_list(
+                "id", flat=True
+            )
+        )
+        errors = []
+        for index, item in enumerate(value):
+            if item["staff_id"] not in staff_ids:
+                errors.append({"index": index, "message": "スタッフが存在しません。"})
+            elif item["code"] not in patterns:
+                errors.append(
+                    {
+                        "index": index,
+                        "message": f"シフトコード「{item['code']}」の展開パターンがありません。",
+                    }
+                )
+        if errors:
+            raise serializers.ValidationError(errors)
+        return value
+
+
+class StaffPeriodSummarySerializer(serializers.ModelSerializer):
+    """スタッフ期間集計（実働時間・夜勤回数・有給回数）のシリアライザー"""
+
+    staff_id = serializers.IntegerField(read_only=True)
+    staff_name = serializers.CharField(source="staff.name", read_only=True)
+    work_hours = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = StaffPeriodSummary
+        fields = [
+            "staff_id",
+            "staff_name",
+            "period_start",
+            "work_minutes",
+            "work_hours",
+            "night_count",
+            "paid_leave_count",
+        ]
+
+
+class ScheduleCalendarQuerySerializer(serializers.Serializer):
+    """
+    勤務カレンダー取得時のクエリパラメータを検証するシリアライザー。
+    期間を省略した場合は date（省略時は今日）が属する集計期間を対象とする。
+    """
+
+    MAX_DAYS = 62
+
+    date = serializers.DateField(required=False, help_text="集計期間を決める日付")
+    date_from = serializers.DateField(required=False, help_text="開始日")
+    date_to = serializers.DateField(required=False, help_text="終了日（含む）")
+
+    def validate(self, attrs):
+        """開始日・終了日はセットで指定し、最大日数を超えないこと"""
+        date_from = attrs.get("date_from")
+        date_to = attrs.get("date_to")
+        if bool(date_from) != bool(date_to):
+            raise serializers.ValidationError(
+                "date_from と date_to は両方指定してください。"
+            )
+        if date_from and date_to:
+            if date_from > date_to:
+                raise serializers.ValidationError(
+                    {"date_to": ["終了日は開始日以降の日付を指定してください。"]}
+                )
+            if (date_to - date_from).days >= self.MAX_DAYS:
+                raise serializers.ValidationError(
+                    f"期間は{self.MAX_DAYS}日以内で指定してください。"
+                )
+        return attrs
+
+
+class CoverageQuerySerializer(ScheduleCalendarQuerySerializer):
+    """
+    人員配置ヒートマップ取得時のクエリパラメータを検証するシリアライザー。
+    """
+
+    slot_minutes = serializers.ChoiceField(
+        choices=[5, 10, 15, 30, 60], default=15, help_text="スロットの長さ（分）"
+    )
+    min_staff = serializers.IntegerField(
+        min_value=0, default=1, help_text="必要人数（下回る時間帯を人員不足とする）"
+    )
+    role = serializers.IntegerField(required=False, help_text="職種IDで絞り込む")
+
+
+class RosterRequirementSerializer(serializers.Serializer):
+    """勤務表の必要人数（シフト × 職種 × 日）"""
+
+    shift = serializers.CharField(help_text="シフトコード")
+    count = serializers.IntegerField(min_value=0, help_text="必要人数")
+    role = serializers.IntegerField(
+        required=False, allow_null=True, default=None, help_text="職種ID（省略時は職種を問わない）"
+    )
+    date = serializers.DateField(
+        required=False, allow_null=True, default=None, help_text="対象日（省略時は毎日）"
+    )
+
+
+class RosterLeaveRequestSerializer(serializers.Serializer):
+    """休み希望（スタッフ・日付・シフトコード）"""
+
+    staff_id = serializers.IntegerField(help_text="スタッフID")
+    date = serializers.DateField(help_text="日付")
+    shift = serializers.CharField(default="休", help_text="シフトコード（既定：休）")
+
+
+class RosterGenerateSerializer(serializers.Serializer):
+    """
+    勤務表の自動作成リクエストを検証するシリアライザー。
+    """
+
+    MAX_TIME_LIMIT = 10.0
+
+    date = serializers.DateField(required=False, help_text="集計期間を決める日付")
+    requirements = RosterRequirementSerializer(many=True, allow_empty=False)
+    leave_requests = RosterLeaveRequestSerializer(many=True, required=False, default=list)
+    staff_ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, help_text="対象スタッフID"
+    )
+    seed = serializers.IntegerField(required=False, help_text="乱数シード")
+    time_limit = serializers.FloatField(
+        default=2.0,
+        min_value=0,
+        max_value=MAX_TIME_LIMIT,
+        help_text="局所探索の制限時間（秒）",
+    )
+
+    def validate(self, attrs):
+        """シフトコード・職種・スタッフの存在をまとめてチェック"""
+        shifts = reference_registry.snapshot(ShiftType).by_code
+        roles = reference_registry.snapshot(Role).by_id
+        errors = {}
+
+        requirement_errors = []
+        for index, req in enumerate(attrs["requirements"]):
+            if req["shift"] not in shifts:
+                requirement_errors.append(
+                    {"index": index, "message": f"シフトコード「{req['shift']}」は存在しません。"}
+                )
+            elif req["role"] is not None and req["role"] not in roles:
+                requirement_errors.append({"index": index, "message": "職種が存在しません。"})
+        if requirement_errors:
+            errors["requirements"] = requirement_errors
+
+        leave_requests = attrs["leave_requests"]
+        staff_ids = set(
+            Staff.objects.filter(
+                id__in={r["staff_id"] for r in leave_requests}
+            ).values_list("id", flat=True)
+        )
+        leave_errors = []
+        for index, item in enumerate(leave_requests):
+            if item["staff_id"] not in staff_ids:
+                leave_errors.append({"index": index, "message": "スタッフが存在しません。"})
+            elif item["shift"] not in shifts:
+                leave_errors.append(
+                    {"index": index, "message": f"シフトコード「{item['shift']}」は存在しません。"}
+                )
+        if leave_errors:
+            errors["leave_requests"] = leave_errors
+
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
+
+
+class RosterDraftSerializer(serializers.ModelSerializer):
+    """勤務表下書き（作成結果の統計を含む）のシリアライザー"""
+
+    status_display = serializers.CharField(source="get_status_display", read_only=True)
+
+    class Meta:
+        model = RosterDraft
+        fields = [
+            "id",
+            "period_start",
+            "status",
+            "status_display",
+            "stats",
+            "created_at",
+            "published_at",
+        ]
+
+
+class ScheduleCopyForwardSerializer(serializers.Serializer):
+    """
+    前期間の勤務シフトをひな形としてコピーするリクエストを検証するシリアライザー。
+    """
+
+    source_date = serializers.DateField(help_text="コピー元期間を決める日付")
+    target_date = serializers.DateField(help_text="コピー先期間を決める日付")
+    align_weekday = serializers.BooleanField(
+        default=False, help_text="曜日を揃えてコピーする"
+    )
+    on_conflict = serializers.ChoiceField(
+        choices=["skip", "overwrite"],
+        default="skip",
+        help_text="コピー先に既に勤務がある場合の扱い",
+    )
+    staff_ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, help_text="対象スタッフID"
+    )
+
+    def validate(self, attrs):
+        """コピー元とコピー先は別の集計期間であること"""
+        source_start, _ = get_shift_period_range(attrs["source_date"])
+        target_start, _ = get_shift_period_range(attrs["target_date"])
+        if source_start == target_start:
+            raise serializers.ValidationError(
+                {"target_date": ["コピー元と別の期間の日付を指定してください。"]}
+            )
+        return attrs
+
+
+class ShiftPeriodSerializer(serializers.ModelSerializer):
+    """集計期間（期間表の1行）をシリアライズするためのシリアライザー"""
+
+    class Meta:
+        model = ShiftPeriod
+        fields = ["id", "start_date", "end_date", "is_override"]
+        read_only_fields = ["is_override"]
+
+    def validate(self, attrs):
+        """終了日は開始日より後であること"""
+        start_date = attrs.get("start_date", getattr(self.instance, "start_date", None))
+        end_date = attrs.get("end_date", getattr(self.instance, "end_date", None))
+        if start_date and end_date and start_date >= end_date:
+            raise serializers.ValidationError(
+                {"end_date": ["終了日は開始日より後の日付を指定してください。"]}
+            )
+        return attrs
+
+
+class ShiftPeriodQuerySerializer(serializers.Serializer):
+    """
+    集計期間一覧取得時のクエリパラメータを検証するシリアライザー。
+    """
+
+    date_from = serializers.DateField(required=False, help_text="この日以降にかかる期間")
+    date_to = serializers.DateField(required=False, help_text="この日以前にかかる期間")
@@ -1,6 +1,11 @@
-﻿from django.db.models.signals import post_migrate
+﻿from django.db.models.signals import post_migrate, pre_save, post_save, post_delete
 from django.dispatch import receiver
-from .models import Role, ShiftType
+from django.conf import settings
+from .models import Role, ShiftPeriod, ShiftType, Staff, WorkSchedule
+from .utils.period_utils import generate_shift_periods
+from .utils.summary_utils import SummaryDelta
+from utils.change_stamp_utils import touch_change_stamp
+from utils.reference_data_utils import reference_registry
 import datetime
 
 
@@ -12,6 +17,7 @@ def create_default_data(sender, **kwargs):
 
     - 初期職種（管理者・正社員・アルバイト・夜勤専門）を自動登録
     - よく使われるシフト（早番・夜勤・明け・休み・訪問・ケアマネ）を自動登録
+    - 集計期間の期間表（ShiftPeriod）を今日の前後の分だけ作成
     """
 
     # 1. 職種（Role）を初期登録
@@ -113,3 +119,72 @@ def create_default_data(sender, **kwargs):
         # 新規作成された場合のみログ表示（migrate時に確認しやすくなる）
         if created:
             print(f"Shift '{shift['name']}' を作成しました")
+
+    # 3. 集計期間の期間表を、今日の前後の分だけ作成しておく
+    period_settings = getattr(settings, "SHIFT_PERIOD", {})
+    today = datetime.date.today()
+    generate_shift_periods(
+        today - datetime.timedelta(days=31 * period_settings.get("months_behind", 12)),
+        today + datetime.timedelta(days=31 * period_settings.get("months_ahead", 24)),
+    )
+
+
+@receiver([post_save, post_delete], sender=Role)
+@receiver([post_save, post_delete], sender=ShiftType)
+@receiver([post_save, post_delete], sender=ShiftPeriod)
+def invalidate_reference_data(sender, **kwargs):
+    """
+    職種・シフト種別・集計期間が変更されたら参照データキャッシュを破棄する。
+    """
+    reference_registry.invalidate(sender)
+
+
+@receiver(pre_save, sender=WorkSchedule)
+def remember_previous_schedule(sender, instance, raw=False, **kwargs):
+    """
+    更新前のスタッフ・日付・シフトを保持しておき、期間集計の差分計算に使う。
+    """
+    instance._previous_cell = None
+    if raw or instance.pk is None:
+        return
+    instance._previous_cell = (
+        sender.objects.filter(pk=instance.pk)
+        .values_list("staff_id", "date", "shift_id")
+        .first()
+    )
+
+
+@receiver(post_save, sender=WorkSchedule)
+def update_period_summary_on_save(sender, instance, raw=False, **kwargs):
+    """
+    勤務シフトの登録・更新をスタッフ期間集計に差分で反映する。
+    """
+    if raw:
+        return
+    delta = SummaryDelta()
+    previous = getattr(instance, "_previous_cell", None)
+    if previous is not None:
+        delta.add(*previous, sign=-1)
+    delta.add(instance.staff_id, instance.date, instance.shift_id)
+    delta.apply()
+
+
+@receiver(post_delete, sender=WorkSchedule)
+def update_period_summary_on_delete(sender, instance, **kwargs):
+    """
+    勤務シフトの削除をスタッフ期間集計に差分で反映する。
+    """
+    delta = SummaryDelta()
+    delta.add(instance.staff_id, instance.date, instance.shift_id, sign=-1)
+    delta.apply(create_missing=False)
+
+
+@receiver([post_save, post_delete], sender=WorkSchedule)
+@receiver([post_save, post_delete], sender=Staff)
+@receiver([post_save, post_delete], sender=Role)
+@receiver([post_save, post_delete], sender=ShiftType)
+def touch_collection_change_stamp(sender, **kwargs):
+    """
+    一覧の条件付き GET（ETag / Last-Modified）用に、コレクションの変更スタンプを更新する。
+    """
+    touch_change_stamp(sender)
@@ -105,3 +105,63 @@ class TestStaffModel:
     def test_str_output(self):
         """Staffモデルの __str__ メソッドテスト（氏名返却）"""
         assert str(self.staff) == "田中太郎"
+
+    def test_monthly_work_hours_report_matches_model(self):
+        """
+        全スタッフ一括集計が Staff.monthly_work_hours と同じ値を返すことのテスト
+        - 夜勤（翌日跨り）・明け・休み（00:00〜00:00）を含む
+        """
+        from staff.utils.report_utils import monthly_work_hours_report
+
+        rest, _ = ShiftType.objects.get_or_create(
+            code="休",
+            defaults={"name": "休み", "start_time": time(0, 0), "end_time": time(0, 0)},
+        )
+        other_user = get_user_model().objects.create_user(
+            name="otheruser", password="1980"
+        )
+        other = Staff.objects.create(user=other_user, name="佐藤花子", role=self.role)
+
+        base = date.today().replace(day=16)
+        WorkSchedule.objects.create(staff=self.staff, shift=self.shift_day, date=base)
+        WorkSchedule.objects.create(
+            staff=self.staff, shift=self.shift_night, date=base + timedelta(days=1)
+        )
+        WorkSchedule.objects.create(
+            staff=self.staff,
+            shift=self.shift_after_night,
+            date=base + timedelta(days=2),
+        )
+        WorkSchedule.objects.create(
+            staff=self.staff, shift=rest, date=base + timedelta(days=3)
+        )
+
+        report = monthly_work_hours_report(base)
+        minutes = {row["staff_id"]: row["work_minutes"] for row in report["results"]}
+
+        expected = self.staff.monthly_work_hours(base).total_seconds() / 60
+        assert minutes[self.staff.id] == expected
+        assert minutes[other.id] == 0
+
+    def test_shift_type_stored_time_fields(self):
+        """保存時に翌日跨り・オフセット・実働分が計算されることのテスト"""
+        assert self.shift_night.is_overnight is True
+        assert self.shift_night.start_offset_minutes == 17 * 60
+        assert self.shift_night.end_offset_minutes == 24 * 60
+        assert self.shift_night.work_minutes == 6 * 60
+        assert self.shift_day.is_overnight is False
+
+    def test_shift_type_change_propagates_to_schedules(self):
+        """休憩時間の変更が既存の勤務シフトの実働分に反映されることのテスト"""
+        today = date.today().replace(day=16)
+        schedule = WorkSchedule.objects.create(
+            staff=self.staff, shift=self.shift_day, date=today
+        )
+        assert schedule.work_minutes == 8 * 60
+
+        self.shift_day.break_minutes = 30
+        self.shift_day.save()
+
+        schedule.refresh_from_db()
+        assert schedule.work_minutes == 8 * 60 + 30
+        assert self.staff.monthly_work_hours(today) == timedelta(hours=8, minutes=30)
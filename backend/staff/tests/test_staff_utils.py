@@ -0,0 +1,633 @@
+import io
+
+import pytest
+from datetime import date, timedelta
+from django.contrib.auth import get_user_model
+
+from staff.models import (
+    Role,
+    ShiftPeriod,
+    ShiftType,
+    Staff,
+    StaffPeriodSummary,
+    WorkSchedule,
+)
+from staff.utils.copy_utils import build_date_map, copy_forward_schedules
+from staff.utils.coverage_utils import build_coverage_matrix
+from staff.utils.import_utils import import_work_schedule_csv
+from staff.utils.period_utils import (
+    annotate_shift_period,
+    generate_shift_periods,
+    override_shift_period,
+)
+from staff.utils.report_utils import work_hours_by_period
+from staff.utils.roster_utils import (
+    RosterError,
+    generate_roster_draft,
+    publish_roster_draft,
+)
+from staff.utils.rule_utils import (
+    ShiftRuleViolationError,
+    validate_period,
+)
+from staff.utils.schedule_utils import bulk_upsert_work_schedules
+from staff.utils.shift_utils import (
+    ShiftCollisionError,
+    assign_night_shift,
+    expand_shift_patterns,
+)
+from staff.utils.summary_utils import SummaryDelta
+from utils.date_utils import default_period_range, get_shift_period_range
+
+
+@pytest.mark.django_db
+class TestExpandShiftPatterns:
+    """
+    連続シフト展開（夜→明→休）のテストクラス。
+    """
+
+    def setup_method(self):
+        role, _ = Role.objects.get_or_create(name="介護士")
+        self.staffs = [
+            Staff.objects.create(
+                name=f"夜勤{i}",
+                role=role,
+                user=get_user_model().objects.create_user(name=f"night_user{i}"),
+            )
+            for i in range(2)
+        ]
+        self.base = date(2025, 5, 1)
+
+    def codes(self, staff):
+        return list(
+            WorkSchedule.objects.filter(staff=staff)
+            .order_by("date")
+            .values_list("shift__code", flat=True)
+        )
+
+    def test_assign_night_shift(self):
+        """従来の assign_night_shift が3日分を返すことのテスト"""
+        results = assign_night_shift(self.staffs[0].id, self.base)
+        assert [r["shift"] for r in results] == ["夜", "明", "休"]
+        assert all(r["created"] for r in results)
+        assert self.codes(self.staffs[0]) == ["夜", "明", "休"]
+
+    def test_batch_expansion_query_count(self, django_assert_max_num_queries):
+        """複数スタッフの展開がスタッフ数に依存しないクエリ数で終わることのテスト"""
+        requests = [(s.id, self.base, "夜") for s in self.staffs]
+        # 参照データ（シフト種類・期間表）の版の確認と初回読み込みを含む
+        with django_assert_max_num_queries(17):
+            result = expand_shift_patterns(requests)
+        assert result["summary"]["created"] == 6
+        for staff in self.staffs:
+            assert self.codes(staff) == ["夜", "明", "休"]
+
+    def test_collision_skip_and_abort(self):
+        """既存シフトとの衝突が報告され、skip / abort が効くことのテスト"""
+        staff = self.staffs[0]
+        WorkSchedule.objects.create(
+            staff=staff,
+            shift=ShiftType.objects.get(code="日1"),
+            date=self.base + timedelta(days=1),
+        )
+
+        with pytest.raises(ShiftCollisionError) as e:
+            expand_shift_patterns([(staff.id, self.base, "夜")], on_collision="abort")
+        assert e.value.collisions[0]["existing"] == "日1"
+        assert self.codes(staff) == ["日1"]
+
+        result = expand_shift_patterns([(staff.id, self.base, "夜")], on_collision="skip")
+        assert len(result["collisions"]) == 1
+        assert result["summary"]["skipped"] == 1
+        assert self.codes(staff) == ["夜", "日1", "休"]
+
+    def test_custom_pattern(self, settings):
+        """設定で追加したパターンが展開されることのテスト"""
+        settings.SHIFT_EXPANSION_PATTERNS = {"夜": ["夜", "明", "休"], "日1": ["日1", "日2"]}
+        expand_shift_patterns([(self.staffs[0].id, self.base, "日1")])
+        assert self.codes(self.staffs[0]) == ["日1", "日2"]
+
+
+@pytest.mark.django_db
+class TestStaffPeriodSummary:
+    """
+    スタッフ期間集計（差分更新・再構築・検証）のテストクラス。
+    """
+
+    def setup_method(self):
+        role, _ = Role.objects.get_or_create(name="介護士")
+        self.staff = Staff.objects.create(
+            name="集計太郎",
+            role=role,
+            user=get_user_model().objects.create_user(name="summary_user"),
+        )
+        self.period_start = date(2025, 4, 15)
+
+    def summary(self):
+        from staff.models import StaffPeriodSummary
+
+        return StaffPeriodSummary.objects.get(
+            staff=self.staff, period_start=self.period_start
+        )
+
+    def test_signals_apply_deltas(self):
+        """保存・更新・削除が差分で反映されることのテスト"""
+        schedule = WorkSchedule.objects.create(
+            staff=self.staff, shift=ShiftType.objects.get(code="日1"), date="2025-04-20"
+        )
+        assert self.summary().work_minutes == 8 * 60
+
+        schedule.shift = ShiftType.objects.get(code="有")
+        schedule.save()
+        summary = self.summary()
+        assert summary.paid_leave_count == 1
+        assert summary.work_minutes == 8 * 60
+
+        schedule.delete()
+        summary = self.summary()
+        assert (summary.work_minutes, summary.paid_leave_count) == (0, 0)
+
+    def test_deltas_are_added_in_database(self, django_assert_num_queries):
+        """差分は既存行を読まずに1クエリで加算され、先に作られた行の値を上書きしないことのテスト"""
+        day_shift = ShiftType.objects.get(code="日1")
+        first, second = SummaryDelta(), SummaryDelta()
+        first.add(self.staff.id, date(2025, 4, 20), day_shift.id)
+        second.add(self.staff.id, date(2025, 4, 21), day_shift.id)
+
+        # 両方が行の無い状態から差分を作り、順に反映する（同時に動いたトランザクションに相当）
+        with django_assert_num_queries(1):
+            first.apply()
+        second.apply()
+        assert self.summary().work_minutes == 2 * 8 * 60
+
+        removed = SummaryDelta()
+        removed.add(self.staff.id, date(2025, 4, 21), day_shift.id, sign=-1)
+        removed.add(self.staff.id, date(2025, 6, 1), day_shift.id, sign=-1)
+        removed.apply(create_missing=False)
+        assert self.summary().work_minutes == 8 * 60
+        assert StaffPeriodSummary.objects.filter(staff=self.staff).count() == 1
+
+    def test_bulk_path_and_verify_command(self):
+        """一括登録の差分が再計算結果と一致し、コマンドで検証できることのテスト"""
+        from django.core.management import call_command
+
+        expand_shift_patterns([(self.staff.id, date(2025, 4, 20), "夜")])
+        summary = self.summary()
+        assert summary.night_count == 1
+        assert summary.work_minutes == 6 * 60 + 9 * 60 + 24 * 60
+
+        call_command(
+            "rebuild_staff_period_summary",
+            "--start=2025-04-15",
+            "--end=2025-05-14",
+            "--verify-only",
+        )
+
+
+@pytest.mark.django_db
+class TestShiftRules:
+    """
+    勤務ルール検証（連続勤務・夜勤明け・休息時間・実働時間上限）のテストクラス。
+    """
+
+    def setup_method(self):
+        role, _ = Role.objects.get_or_create(name="介護士")
+        self.staff = Staff.objects.create(
+            name="ルール花子",
+            role=role,
+            user=get_user_model().objects.create_user(name="rule_user"),
+        )
+        self.base = date(2025, 4, 20)
+
+    def put(self, codes, start=None):
+        start = start or self.base
+        for offset, code in enumerate(codes):
+            WorkSchedule.objects.create(
+                staff=self.staff,
+                shift=ShiftType.objects.get(code=code),
+                date=start + timedelta(days=offset),
+            )
+
+    def violations(self):
+        return validate_period(self.base)["violations"]
+
+    def rules(self):
+        return [v["rule"] for v in self.violations()]
+
+    def test_valid_schedule(self):
+        """規則どおりの勤務では違反が出ないことのテスト"""
+        self.put(["日1", "日1", "夜", "明", "休", "日1"])
+        assert self.rules() == []
+
+    def test_consecutive_days(self):
+        """7日連続勤務が違反になることのテスト"""
+        self.put(["日1"] * 7)
+        assert self.rules() == ["max_consecutive_days"]
+
+    def test_night_without_after_night(self):
+        """夜勤の翌日が明けでない場合に違反になることのテスト"""
+        self.put(["夜", "休"])
+        assert self.rules() == ["night_without_after_night"]
+
+    def test_night_followed_by_blank_day(self):
+        """夜勤の翌日が空欄でも違反になり、期間最終日の夜勤だけは判定しないことのテスト"""
+        self.put(["日1", "夜"])
+        assert self.rules() == ["night_without_after_night"]
+
+        _, period_end = get_shift_period_range(self.base)
+        WorkSchedule.objects.filter(staff=self.staff).delete()
+        self.put(["夜"], start=period_end - timedelta(days=1))
+        assert self.rules() == []
+
+    def test_min_rest(self):
+        """夜勤明けを挟まずに翌朝の日勤に入ると休息時間不足になることのテスト"""
+        self.put(["夜", "日1"])
+        violations = {v["rule"]: v for v in self.violations()}
+        assert set(violations) == {"night_without_after_night", "min_rest"}
+        assert violations["min_rest"]["date"] == self.base + timedelta(days=1)
+        assert violations["min_rest"]["detail"] == 9 * 60
+
+    def test_period_work_minutes(self, settings):
+        """集計期間の実働時間上限を超えると違反になることのテスト"""
+        settings.SHIFT_RULES = {"max_period_work_minutes": 16 * 60}
+        self.put(["日1", "日1", "休", "日1"])
+        assert self.rules() == ["max_period_work_minutes"]
+
+    def test_bulk_upsert_rejects_violation(self):
+        """check_rules=True の一括登録が違反時に何も書き込まないことのテスト"""
+        day = ShiftType.objects.get(code="日1").id
+        entries = [(self.staff.id, self.base + timedelta(days=i), day) for i in range(7)]
+        with pytest.raises(ShiftRuleViolationError) as e:
+            bulk_upsert_work_schedules(entries, check_rules=True)
+        assert e.value.violations[0]["rule"] == "max_consecutive_days"
+        assert not WorkSchedule.objects.filter(staff=self.staff).exists()
+
+        bulk_upsert_work_schedules(entries[:6], check_rules=True)
+        assert WorkSchedule.objects.filter(staff=self.staff).count() == 6
+
+
+@pytest.mark.django_db
+class TestRosterSolver:
+    """
+    勤務表の自動作成（下書き作成・公開）のテストクラス。
+    """
+
+    def setup_method(self):
+        role, _ = Role.objects.get_or_create(name="介護士")
+        self.staffs = [
+            Staff.objects.create(
+                name=f"勤務表{i}",
+                role=role,
+                user=get_user_model().objects.create_user(name=f"roster_user{i}"),
+            )
+            for i in range(10)
+        ]
+        self.requirements = [
+            {"shift": "夜", "count": 1},
+            {"shift": "日1", "count": 3},
+        ]
+
+    def test_generate_draft(self):
+        """必要人数を満たし、休み希望と夜勤パターンを守った下書きが作られることのテスト"""
+        leave_day = date(2025, 4, 20)
+        draft = generate_roster_draft(
+            date(2025, 4, 20),
+            self.requirements,
+            leave_requests={(self.staffs[0].id, leave_day): "有"},
+            seed=1,
+            time_limit=0.5,
+        )
+
+        assert draft.period_start == date(2025, 4, 15)
+        assert draft.stats["shortfalls"] == []
+        assert draft.stats["violations"] == []
+        assert draft.entries.count() == 10 * 30
+
+        cells = {
+            (e.staff_id, e.date): e.shift.code
+            for e in draft.entries.select_related("shift")
+        }
+        assert cells[(self.staffs[0].id, leave_day)] == "有"
+        for (staff_id, day), code in cells.items():
+            if code == "夜" and (staff_id, day + timedelta(days=1)) in cells:
+                assert cells[(staff_id, day + timedelta(days=1))] == "明"
+
+        day = date(2025, 5, 1)
+        codes = [code for (_, d), code in cells.items() if d == day]
+        assert codes.count("夜") == 1
+        assert codes.count("日1") == 3
+        assert not WorkSchedule.objects.exists()
+
+    def test_publish_draft(self):
+        """公開で勤務シフトに一括登録され、二重公開はできないことのテスト"""
+        draft = generate_roster_draft(
+            date(2025, 4, 20), self.requirements, seed=1, time_limit=0.1
+        )
+        summary = publish_roster_draft(draft)
+        assert summary["created"] == 10 * 30
+        assert WorkSchedule.objects.count() == 10 * 30
+
+        draft.refresh_from_db()
+        assert draft.status == "published"
+        with pytest.raises(RosterError):
+            publish_roster_draft(draft)
+
+
+@pytest.mark.django_db
+class TestCoverageMatrix:
+    """
+    時間帯別在席人数（ヒートマップ）のテストクラス。
+    """
+
+    def setup_method(self):
+        role, _ = Role.objects.get_or_create(name="介護士")
+        self.staff = Staff.objects.create(
+            name="配置太郎",
+            role=role,
+            user=get_user_model().objects.create_user(name="coverage_user"),
+        )
+        for day, code in ((date(2025, 4, 20), "夜"), (date(2025, 4, 21), "明")):
+            WorkSchedule.objects.create(
+                staff=self.staff, shift=ShiftType.objects.get(code=code), date=day
+            )
+
+    def test_overnight_and_break(self):
+        """夜→明が0時をまたいで連続し、休憩スロットが抜けることのテスト"""
+        result = build_coverage_matrix(
+            date(2025, 4, 20), date(2025, 4, 21), slot_minutes=60
+        )
+        night = [row[0] for row in result["coverage"]]
+        after_night = [row[1] for row in result["coverage"]]
+        # 夜 17:00〜24:00（休憩 20:00〜21:00）
+        assert night == [0] * 17 + [1, 1, 1, 0, 1, 1, 1]
+        # 明 0:00〜10:00（休憩 4:30〜5:30 は1時間スロットを丸ごと占めない）
+        assert after_night == [1] * 10 + [0] * 14
+
+        windows = [(w["start"].hour, w["end"].hour) for w in result["under_coverage"]]
+        assert windows == [(0, 17), (20, 21), (10, 0)]
+        assert result["under_coverage"][-1]["spans_midnight"] is False
+
+    def test_break_with_fine_slots(self):
+        """15分スロットでは明けの休憩時間帯が不足として出ることのテスト"""
+        result = build_coverage_matrix(date(2025, 4, 21), date(2025, 4, 21))
+        starts = [w["start"].strftime("%H:%M") for w in result["under_coverage"]]
+        assert "04:30" in starts
+
+    def test_previous_day_night_shift(self):
+        """開始日の前日の夜勤は当日分に入らないことのテスト"""
+        result = build_coverage_matrix(date(2025, 4, 21), date(2025, 4, 21), 60)
+        assert result["coverage"][0] == [1]
+        assert result["coverage"][23] == [0]
+
+
+@pytest.mark.django_db
+class TestWorkScheduleCsvImport:
+    """
+    勤務シフトの CSV 一括取り込みのテストクラス。
+    """
+
+    def setup_method(self):
+        role, _ = Role.objects.get_or_create(name="介護士")
+        self.staff = Staff.objects.create(
+            name="取込太郎",
+            role=role,
+            user=get_user_model().objects.create_user(name="import_user"),
+        )
+
+    def csv(self, *lines):
+        return io.StringIO("日付,氏名,シフトコード\n" + "\n".join(lines) + "\n")
+
+    def test_import_with_row_errors(self):
+        """解釈できない行を報告しつつ、他の行はバッチ毎に登録されることのテスト"""
+        result = import_work_schedule_csv(
+            self.csv(
+                "2025-04-01,取込太郎,日1",
+                "2025-04-02,取込太郎,存在しない",
+                "2025/04/03,取込太郎,夜",
+                "2025-04-04,いない人,日1",
+                "日付ではない,取込太郎,日2",
+            ),
+            batch_size=2,
+        )
+        assert result["rows"] == 5
+        assert result["created"] == 2
+        assert result["error_count"] == 3
+        assert [e["line"] for e in result["errors"]] == [3, 5, 6]
+        assert WorkSchedule.objects.filter(staff=self.staff).count() == 2
+
+        result = import_work_schedule_csv(
+            self.csv("2025-04-01,取込太郎,日2", f"2025-04-03,{self.staff.id},夜")
+        )
+        assert (result["updated"], result["unchanged"]) == (1, 1)
+
+    def test_management_command(self, tmp_path):
+        """管理コマンドで Shift_JIS の CSV を取り込めることのテスト"""
+        from django.core.management import call_command
+
+        path = tmp_path / "schedules.csv"
+        path.write_bytes("日付,氏名,シフトコード\n2025-04-01,取込太郎,休\n".encode("cp932"))
+        call_command("import_work_schedules", str(path), "--encoding=cp932")
+        assert WorkSchedule.objects.get(staff=self.staff).shift.code == "休"
+
+
+@pytest.mark.django_db
+class TestCopyForwardSchedules:
+    """
+    前期間の勤務シフトのコピーのテストクラス。
+    """
+
+    def setup_method(self):
+        role, _ = Role.objects.get_or_create(name="介護士")
+        self.staffs = [
+            Staff.objects.create(
+                name=f"コピー{i}",
+                role=role,
+                user=get_user_model().objects.create_user(name=f"copy_user{i}"),
+            )
+            for i in range(2)
+        ]
+        self.day1 = ShiftType.objects.get(code="日1")
+        self.night = ShiftType.objects.get(code="夜")
+        # コピー元期間: 2025-04-15〜2025-05-14、コピー先期間: 2025-05-15〜2025-06-14
+        for staff in self.staffs:
+            WorkSchedule.objects.create(
+                staff=staff,
+                shift=self.day1,
+                date=date(2025, 4, 15),
+                needs_lunch=True,
+                meal_note="減塩",
+                note="研修",
+            )
+            WorkSchedule.objects.create(staff=staff, shift=self.night, date=date(2025, 4, 16))
+
+    def test_copy_by_offset(self):
+        """期間先頭からの日数で対応させ、食事の要否を引き継ぎ、備考はコピーしないことのテスト"""
+        result = copy_forward_schedules(date(2025, 4, 20), date(2025, 5, 20))
+
+        assert result["copied"] == 4
+        assert result["created"] == 4
+        copied = WorkSchedule.objects.get(staff=self.staffs[0], date=date(2025, 5, 15))
+        assert copied.shift == self.day1
+        assert copied.needs_lunch is True
+        assert copied.meal_note == "減塩"
+        assert copied.note is None
+        assert (
+            WorkSchedule.objects.get(staff=self.staffs[0], date=date(2025, 5, 16)).shift
+            == self.night
+        )
+
+        summary = StaffPeriodSummary.objects.get(
+            staff=self.staffs[0], period_start=date(2025, 5, 15)
+        )
+        assert summary.night_count == 1
+
+    def test_skip_and_overwrite(self):
+        """コピー先の既存行が skip では残り、overwrite では上書きされることのテスト"""
+        holiday = ShiftType.objects.get(code="休")
+        WorkSchedule.objects.create(
+            staff=self.staffs[0], shift=holiday, date=date(2025, 5, 15)
+        )
+
+        result = copy_forward_schedules(date(2025, 4, 15), date(2025, 5, 15))
+        assert (result["created"], result["skipped"], result["updated"]) == (3, 1, 0)
+        existing = WorkSchedule.objects.get(staff=self.staffs[0], date=date(2025, 5, 15))
+        assert existing.shift == holiday
+
+        result = copy_forward_schedules(
+            date(2025, 4, 15), date(2025, 5, 15), on_conflict="overwrite"
+        )
+        assert (result["created"], result["skipped"], result["updated"]) == (0, 0, 4)
+        existing.refresh_from_db()
+        assert existing.shift == self.day1
+        assert existing.needs_lunch is True
+
+    def test_staff_filter(self):
+        """staff_ids を指定した場合はそのスタッフだけコピーされることのテスト"""
+        result = copy_forward_schedules(
+            date(2025, 4, 15), date(2025, 5, 15), staff_ids=[self.staffs[1].id]
+        )
+        assert result["created"] == 2
+        assert not WorkSchedule.objects.filter(
+            staff=self.staffs[0], date__gte=date(2025, 5, 15)
+        ).exists()
+
+    def test_same_period(self):
+        """コピー元とコピー先が同じ期間の場合はエラーになることのテスト"""
+        with pytest.raises(ValueError):
+            copy_forward_schedules(date(2025, 4, 15), date(2025, 5, 1))
+
+    def test_weekday_alignment(self):
+        """曜日合わせの場合、コピー先の各日に同じ曜日のコピー元の日付が対応することのテスト"""
+        source_start, source_end = date(2025, 4, 15), date(2025, 5, 15)
+        target_start, target_end = date(2025, 5, 15), date(2025, 6, 15)
+        pairs = build_date_map(
+            source_start, source_end, target_start, target_end, align_weekday=True
+        )
+
+        assert len(pairs) == 31
+        for source, target in pairs:
+            assert source.weekday() == target.weekday()
+            assert source_start <= source < source_end
+        # 2025-05-15（木）には、コピー元の最初の木曜日 2025-04-17 が対応する
+        assert pairs[0] == (date(2025, 4, 17), date(2025, 5, 15))
+
+    def test_weekday_alignment_short_source(self):
+        """コピー元が1週間に満たない場合、同じ曜日の無い日は対応させないことのテスト"""
+        # コピー元は 2025-04-15（火）〜 04-17（木）の3日間
+        source_start, source_end = date(2025, 4, 15), date(2025, 4, 18)
+        target_start, target_end = date(2025, 5, 15), date(2025, 6, 15)
+        pairs = build_date_map(
+            source_start, source_end, target_start, target_end, align_weekday=True
+        )
+
+        for source, target in pairs:
+            assert source.weekday() == target.weekday()
+            assert source_start <= source < source_end
+        assert {target.weekday() for _, target in pairs} == {1, 2, 3}
+        # 2025-05-15（木）〜 06-14 の火・水・木曜日
+        assert len(pairs) == 13
+
+
+@pytest.mark.django_db
+class TestShiftPeriodCalendar:
+    """
+    集計期間の期間表のテストクラス。
+    """
+
+    def setup_method(self):
+        role, _ = Role.objects.get_or_create(name="介護士")
+        self.staff = Staff.objects.create(
+            name="期間太郎",
+            role=role,
+            user=get_user_model().objects.create_user(name="period_user"),
+        )
+        self.day1 = ShiftType.objects.get(code="日1")
+        generate_shift_periods(date(2025, 1, 1), date(2026, 12, 31))
+
+    def test_default_period_range(self):
+        """締め日の設定から期間が計算されることのテスト"""
+        assert default_period_range(date(2025, 3, 28)) == (date(2025, 3, 15), date(2025, 4, 15))
+        assert default_period_range(date(2025, 1, 2)) == (date(2024, 12, 15), date(2025, 1, 15))
+        assert default_period_range(date(2025, 12, 31), start_day=1) == (
+            date(2025, 12, 1),
+            date(2026, 1, 1),
+        )
+
+    def test_generate_is_contiguous(self):
+        """期間表が隙間なく連続し、再実行しても重複しないことのテスト"""
+        assert generate_shift_periods(date(2025, 1, 1), date(2026, 12, 31)) == 0
+        periods = list(
+            ShiftPeriod.objects.filter(
+                start_date__gte=date(2025, 1, 1), end_date__lte=date(2026, 12, 31)
+            )
+        )
+        for before, after in zip(periods, periods[1:]):
+            assert before.end_date == after.start_date
+        assert get_shift_period_range(date(2025, 5, 20)) == (
+            date(2025, 5, 15),
+            date(2025, 6, 15),
+        )
+
+    def test_override_moves_neighbours_and_summaries(self):
+        """個別変更で隣の期間と期間集計が作り直されることのテスト"""
+        WorkSchedule.objects.create(staff=self.staff, shift=self.day1, date=date(2026, 1, 12))
+        assert StaffPeriodSummary.objects.filter(period_start=date(2025, 12, 15)).exists()
+
+        period = ShiftPeriod.objects.get(start_date=date(2025, 12, 15))
+        override_shift_period(period, date(2025, 12, 15), date(2026, 1, 10))
+
+        assert get_shift_period_range(date(2026, 1, 12)) == (
+            date(2026, 1, 10),
+            date(2026, 2, 15),
+        )
+        assert ShiftPeriod.objects.get(start_date=date(2026, 1, 10)).is_override
+        assert not StaffPeriodSummary.objects.filter(
+            period_start=date(2026, 1, 15)
+        ).exists()
+        summary = StaffPeriodSummary.objects.get(
+            staff=self.staff, period_start=date(2026, 1, 10)
+        )
+        assert summary.work_minutes == self.day1.work_minutes
+
+        with pytest.raises(ValueError):
+            override_shift_period(period, date(2025, 12, 15), date(2026, 3, 1))
+
+    def test_group_by_period_id(self, django_assert_num_queries):
+        """期間IDでの集計が DB 側で行われ、monthly_work_hours が期間IDを受け付けることのテスト"""
+        for day in (date(2025, 4, 20), date(2025, 5, 10), date(2025, 5, 20)):
+            WorkSchedule.objects.create(staff=self.staff, shift=self.day1, date=day)
+        april = ShiftPeriod.objects.get(start_date=date(2025, 4, 15))
+
+        with django_assert_num_queries(2):
+            rows = work_hours_by_period(date(2025, 4, 1), date(2025, 5, 31))
+        assert [(r["period_start"], r["work_minutes"]) for r in rows] == [
+            (date(2025, 4, 15), 2 * self.day1.work_minutes),
+            (date(2025, 5, 15), self.day1.work_minutes),
+        ]
+        assert rows[0]["period_id"] == april.id
+
+        annotated = annotate_shift_period(WorkSchedule.objects.filter(date=date(2025, 5, 10)))
+        assert annotated.get().period_id == april.id
+        assert self.staff.monthly_work_hours(period_id=april.id) == timedelta(
+            minutes=2 * self.day1.work_minutes
+        )
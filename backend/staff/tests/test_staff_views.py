@@ -1,7 +1,7 @@
 ﻿import pytest
 from rest_framework.test import APIClient
 from staff.models import Role, Staff, ShiftType, WorkSchedule
-from datetime import date
+from datetime import date, timedelta
 
 client = APIClient()
 
@@ -150,3 +150,530 @@ class TestWorkScheduleView:
         assert response.data["data"]["needs_breakfast"] is True
         assert response.data["data"]["needs_lunch"] is True
         assert response.data["data"]["needs_dinner"] is False
+
+
+@pytest.mark.django_db
+class TestStaffWorkHoursReportView:
+    """
+    全スタッフ実働時間レポートAPIのテストクラス。
+    """
+
+    def test_work_hours_report(self, admin_user):
+        """期間内の実働時間が時間単位で返ることのテスト"""
+        shift = ShiftType.objects.get(code="日1")
+        role, _ = Role.objects.get_or_create(name="介護士")
+        staff = Staff.objects.create(name="テスト太郎", role=role, user=admin_user)
+        target = date(2025, 4, 20)
+        WorkSchedule.objects.create(staff=staff, shift=shift, date=target)
+
+        client.force_authenticate(user=admin_user)
+        response = client.get("/api/staff/reports/work-hours/", {"date": "2025-04-20"})
+
+        assert response.status_code == 200
+        row = response.data["data"]["results"][0]
+        assert row["staff_id"] == staff.id
+        assert row["work_hours"] == 8
+
+    def test_work_hours_report_invalid_date(self, admin_user):
+        """日付形式が不正な場合は400が返ることのテスト"""
+        client.force_authenticate(user=admin_user)
+        response = client.get("/api/staff/reports/work-hours/", {"date": "2025/04/20"})
+        assert response.status_code == 400
+
+
+@pytest.mark.django_db
+class TestWorkScheduleListView:
+    """
+    勤務シフト一覧API（絞り込み・カーソルページング）のテストクラス。
+    """
+
+    def setup_method(self):
+        from django.contrib.auth import get_user_model
+
+        self.role, _ = Role.objects.get_or_create(name="介護士")
+        self.day = ShiftType.objects.get(code="日1")
+        self.night = ShiftType.objects.get(code="夜")
+        self.staffs = [
+            Staff.objects.create(
+                name=f"スタッフ{i}",
+                role=self.role,
+                user=get_user_model().objects.create_user(name=f"ws_user{i}"),
+            )
+            for i in range(3)
+        ]
+        for staff in self.staffs:
+            for day in range(1, 6):
+                WorkSchedule.objects.create(
+                    staff=staff,
+                    shift=self.night if day == 3 else self.day,
+                    date=date(2025, 4, day),
+                )
+
+    def test_filters(self):
+        """日付範囲・スタッフ・シフトコードで絞り込めることのテスト"""
+        response = client.get(
+            "/api/staff/schedules/",
+            {
+                "date_from": "2025-04-02",
+                "date_to": "2025-04-04",
+                "staff_id": self.staffs[0].id,
+            },
+        )
+        assert response.status_code == 200
+        results = response.data["data"]["results"]
+        assert [r["date"] for r in results] == ["2025-04-02", "2025-04-03", "2025-04-04"]
+
+        response = client.get("/api/staff/schedules/", {"shift_code": "夜"})
+        assert len(response.data["data"]["results"]) == 3
+
+    def test_cursor_pagination(self):
+        """カーソルで全件を重複なく辿れることのテスト"""
+        seen = []
+        params = {"limit": 4}
+        while True:
+            response = client.get("/api/staff/schedules/", params)
+            assert response.status_code == 200
+            seen += [r["id"] for r in response.data["data"]["results"]]
+            cursor = response.data["data"]["next_cursor"]
+            if not cursor:
+                break
+            params["cursor"] = cursor
+        assert len(seen) == len(set(seen)) == 15
+
+    def test_query_count_is_constant(self, django_assert_num_queries):
+        """ページ内の件数に関わらずクエリ数が一定であることのテスト"""
+        client.get("/api/staff/schedules/")  # 変更スタンプを発行しておく
+        with django_assert_num_queries(2):  # 変更スタンプの確認 + 一覧
+            response = client.get("/api/staff/schedules/", {"limit": 15})
+        assert len(response.data["data"]["results"]) == 15
+
+    def test_invalid_params(self):
+        """不正なパラメータでは400が返ることのテスト"""
+        response = client.get(
+            "/api/staff/schedules/",
+            {"date_from": "2025-04-05", "date_to": "2025-04-01"},
+        )
+        assert response.status_code == 400
+        response = client.get("/api/staff/schedules/", {"cursor": "broken"})
+        assert response.status_code == 400
+
+
+@pytest.mark.django_db
+class TestWorkScheduleBulkUpsertView:
+    """
+    勤務シフト一括登録APIのテストクラス。
+    """
+
+    def setup_method(self):
+        from django.contrib.auth import get_user_model
+
+        self.user = get_user_model().objects.create_user(name="bulk_user")
+        role, _ = Role.objects.get_or_create(name="介護士")
+        self.staff = Staff.objects.create(name="一括太郎", role=role, user=self.user)
+        self.dates = [str(date.today() + timedelta(days=i)) for i in range(3)]
+
+    def test_bulk_upsert_counts(self):
+        """作成・更新・変更なしの件数が返ることのテスト"""
+        WorkSchedule.objects.create(
+            staff=self.staff, shift=ShiftType.objects.get(code="日1"), date=self.dates[0]
+        )
+        WorkSchedule.objects.create(
+            staff=self.staff, shift=ShiftType.objects.get(code="日2"), date=self.dates[1]
+        )
+        client.force_authenticate(user=self.user)
+        payload = {
+            "dates": self.dates,
+            "rows": [{"staff_id": self.staff.id, "shifts": ["日1", "休", "訪"]}],
+        }
+        response = client.post("/api/staff/schedules/bulk/", payload, format="json")
+
+        assert response.status_code == 200
+        assert response.data["data"] == {"created": 1, "updated": 1, "unchanged": 1}
+        codes = list(
+            WorkSchedule.objects.filter(staff=self.staff)
+            .order_by("date")
+            .values_list("shift__code", flat=True)
+        )
+        assert codes == ["日1", "休", "訪"]
+
+    def test_bulk_upsert_rejects_unknown_code(self):
+        """存在しないシフトコードがあれば何も書き込まれないことのテスト"""
+        client.force_authenticate(user=self.user)
+        payload = {
+            "dates": self.dates,
+            "rows": [{"staff_id": self.staff.id, "shifts": ["日1", "XX", ""]}],
+        }
+        response = client.post("/api/staff/schedules/bulk/", payload, format="json")
+
+        assert response.status_code == 400
+        assert not WorkSchedule.objects.filter(staff=self.staff).exists()
+
+
+@pytest.mark.django_db
+class TestShiftExpansionView:
+    """
+    連続シフト一括展開APIのテストクラス。
+    """
+
+    def test_abort_on_collision(self, admin_user):
+        """abort 指定で衝突がある場合は409が返ることのテスト"""
+        role, _ = Role.objects.get_or_create(name="介護士")
+        staff = Staff.objects.create(name="夜勤花子", role=role, user=admin_user)
+        base = date.today()
+        WorkSchedule.objects.create(
+            staff=staff, shift=ShiftType.objects.get(code="日1"), date=base
+        )
+
+        client.force_authenticate(user=admin_user)
+        payload = {
+            "requests": [{"staff_id": staff.id, "date": str(base)}],
+            "on_collision": "abort",
+        }
+        response = client.post("/api/staff/schedules/expand/", payload, format="json")
+        assert response.status_code == 409
+
+        payload["on_collision"] = "overwrite"
+        response = client.post("/api/staff/schedules/expand/", payload, format="json")
+        assert response.status_code == 200
+        assert response.data["data"]["summary"] == {
+            "created": 2,
+            "updated": 1,
+            "unchanged": 0,
+            "skipped": 0,
+        }
+
+
+@pytest.mark.django_db
+class TestWorkScheduleCalendarView:
+    """
+    勤務カレンダー（行列形式）APIのテストクラス。
+    """
+
+    def test_calendar_matrix(self, admin_user, django_assert_max_num_queries):
+        """シフトIDの2次元配列が正しい位置に入ることのテスト"""
+        role, _ = Role.objects.get_or_create(name="介護士")
+        staff = Staff.objects.create(name="暦太郎", role=role, user=admin_user)
+        shift = ShiftType.objects.get(code="日1")
+        WorkSchedule.objects.create(staff=staff, shift=shift, date=date(2025, 4, 16))
+
+        # スタッフ + 勤務シフト + 参照データ（期間表・シフト種類）の版の確認
+        with django_assert_max_num_queries(4):
+            response = client.get("/api/staff/schedules/calendar/", {"date": "2025-04-20"})
+
+        assert response.status_code == 200
+        data = response.data["data"]
+        assert data["dates"][0] == date(2025, 4, 15)
+        assert data["dates"][-1] == date(2025, 5, 14)
+        row = data["shifts"][data["staff_ids"].index(staff.id)]
+        assert row[1] == shift.id
+        assert row.count(None) == len(data["dates"]) - 1
+        assert any(s["code"] == "日1" for s in data["shift_types"])
+
+
+@pytest.mark.django_db
+class TestRosterDraftView:
+    """
+    勤務表自動作成APIのテストクラス。
+    """
+
+    def test_generate_and_publish(self, admin_user):
+        """下書きを作成・取得・公開できることのテスト"""
+        role, _ = Role.objects.get_or_create(name="介護士")
+        Staff.objects.create(name="勤務表太郎", role=role, user=admin_user)
+
+        client.force_authenticate(user=admin_user)
+        payload = {
+            "date": "2025-04-20",
+            "requirements": [{"shift": "日1", "count": 1}],
+            "seed": 1,
+            "time_limit": 0.1,
+        }
+        response = client.post("/api/staff/rosters/", payload, format="json")
+        assert response.status_code == 201
+        draft_id = response.data["data"]["id"]
+
+        response = client.get(f"/api/staff/rosters/{draft_id}/")
+        assert response.status_code == 200
+        assert len(response.data["data"]["matrix"]["dates"]) == 30
+
+        response = client.post(f"/api/staff/rosters/{draft_id}/publish/")
+        assert response.status_code == 200
+        response = client.post(f"/api/staff/rosters/{draft_id}/publish/")
+        assert response.status_code == 409
+
+    def test_unknown_shift_code(self, admin_user):
+        """存在しないシフトコードは400になることのテスト"""
+        client.force_authenticate(user=admin_user)
+        payload = {"requirements": [{"shift": "存在しない", "count": 1}]}
+        response = client.post("/api/staff/rosters/", payload, format="json")
+        assert response.status_code == 400
+
+
+@pytest.mark.django_db
+class TestWorkScheduleCoverageView:
+    """
+    人員配置ヒートマップAPIのテストクラス。
+    """
+
+    def test_coverage(self, admin_user, django_assert_max_num_queries):
+        """スロット × 日付の行列と人員不足の時間帯が返ることのテスト"""
+        role, _ = Role.objects.get_or_create(name="介護士")
+        staff = Staff.objects.create(name="配置花子", role=role, user=admin_user)
+        WorkSchedule.objects.create(
+            staff=staff, shift=ShiftType.objects.get(code="日1"), date=date(2025, 4, 16)
+        )
+
+        with django_assert_max_num_queries(3):
+            response = client.get(
+                "/api/staff/schedules/coverage/",
+                {"date": "2025-04-20", "slot_minutes": 30, "min_staff": 1},
+            )
+
+        assert response.status_code == 200
+        data = response.data["data"]
+        assert len(data["coverage"]) == 48
+        assert len(data["coverage"][0]) == 30
+        assert data["coverage"][18][1] == 1
+        assert data["coverage"][18][0] == 0
+
+    def test_invalid_slot(self):
+        """スロット長が選択肢以外の場合は400になることのテスト"""
+        response = client.get("/api/staff/schedules/coverage/", {"slot_minutes": 7})
+        assert response.status_code == 400
+
+
+@pytest.mark.django_db
+class TestWorkScheduleExportView:
+    """
+    勤務シフトのエクスポートAPIのテストクラス。
+    """
+
+    def test_export_csv(self, admin_user):
+        """期間内の勤務シフトが CSV で出力されることのテスト"""
+        role, _ = Role.objects.get_or_create(name="介護士")
+        staff = Staff.objects.create(name="出力太郎", role=role, user=admin_user)
+        shift = ShiftType.objects.get(code="日1")
+        for day in (1, 2, 3):
+            WorkSchedule.objects.create(staff=staff, shift=shift, date=date(2025, 4, day))
+
+        client.force_authenticate(user=admin_user)
+        response = client.get(
+            "/api/staff/schedules/export/",
+            {"date_from": "2025-04-02", "date_to": "2025-04-02"},
+        )
+        assert response.status_code == 200
+        assert "work_schedules.csv" in response["Content-Disposition"]
+
+        lines = b"".join(response.streaming_content).decode("utf-8-sig").splitlines()
+        assert lines[1] == f"2025-04-02,{staff.id},出力太郎,日1,480,"
+        assert len(lines) == 2
+
+    def test_invalid_range(self, admin_user):
+        """開始日が終了日より後の場合は400になることのテスト"""
+        client.force_authenticate(user=admin_user)
+        response = client.get(
+            "/api/staff/schedules/export/",
+            {"date_from": "2025-04-03", "date_to": "2025-04-02"},
+        )
+        assert response.status_code == 400
+
+
+@pytest.mark.django_db
+class TestWorkScheduleImportView:
+    """
+    勤務シフトの CSV 一括取り込みAPIのテストクラス。
+    """
+
+    def test_upload(self, admin_user):
+        """アップロードした CSV が取り込まれ、エラー行が返ることのテスト"""
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        role, _ = Role.objects.get_or_create(name="介護士")
+        staff = Staff.objects.create(name="取込花子", role=role, user=admin_user)
+        body = f"日付,スタッフID,シフトコード\n2025-04-01,{staff.id},日1\n2025-04-02,{staff.id},??\n"
+
+        client.force_authenticate(user=admin_user)
+        response = client.post(
+            "/api/staff/schedules/import/",
+            {"file": SimpleUploadedFile("s.csv", body.encode("utf-8"), "text/csv")},
+            format="multipart",
+        )
+        assert response.status_code == 200
+        assert response.data["data"]["created"] == 1
+        assert response.data["data"]["errors"][0]["line"] == 3
+
+    def test_bad_encoding_writes_nothing(self, admin_user):
+        """途中の行が復号できない場合、先頭のバッチも登録せずに400を返すことのテスト"""
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        role, _ = Role.objects.get_or_create(name="介護士")
+        staff = Staff.objects.create(name="取込次郎", role=role, user=admin_user)
+        # 読み込みのバッファより後ろに、復号できないバイト列を置く
+        body = "日付,スタッフID,シフトコード\n" + f"2025-04-01,{staff.id},日1\n" * 1000
+        body = body.encode("utf-8") + f"2025-04-02,{staff.id},".encode("utf-8") + b"\xff\xfe\n"
+
+        client.force_authenticate(user=admin_user)
+        response = client.post(
+            "/api/staff/schedules/import/",
+            {"file": SimpleUploadedFile("s.csv", body, "text/csv"), "batch_size": 100},
+            format="multipart",
+        )
+        assert response.status_code == 400
+        assert not WorkSchedule.objects.filter(staff=staff).exists()
+
+
+@pytest.mark.django_db
+class TestWorkScheduleCopyForwardView:
+    """
+    前期間の勤務シフトのコピーAPIのテストクラス。
+    """
+
+    def test_copy_forward(self, admin_user):
+        """前期間の勤務がコピーされ、件数が返ることのテスト"""
+        role, _ = Role.objects.get_or_create(name="介護士")
+        staff = Staff.objects.create(name="複写花子", role=role, user=admin_user)
+        WorkSchedule.objects.create(
+            staff=staff, shift=ShiftType.objects.get(code="日1"), date=date(2025, 4, 15)
+        )
+
+        client.force_authenticate(user=admin_user)
+        response = client.post(
+            "/api/staff/schedules/copy-forward/",
+            {"source_date": "2025-04-20", "target_date": "2025-05-20"},
+            format="json",
+        )
+        assert response.status_code == 200
+        assert response.data["data"]["created"] == 1
+        assert WorkSchedule.objects.filter(staff=staff, date=date(2025, 5, 15)).exists()
+
+    def test_same_period(self, admin_user):
+        """同じ期間を指定した場合は400になることのテスト"""
+        client.force_authenticate(user=admin_user)
+        response = client.post(
+            "/api/staff/schedules/copy-forward/",
+            {"source_date": "2025-04-20", "target_date": "2025-05-01"},
+            format="json",
+        )
+        assert response.status_code == 400
+
+
+@pytest.mark.django_db
+class TestShiftPeriodView:
+    """
+    集計期間（期間表）APIのテストクラス。
+    """
+
+    def test_list_and_override(self, admin_user):
+        """期間の一覧取得と個別変更、期間IDでの実働時間レポートのテスト"""
+        from staff.models import ShiftPeriod
+        from staff.utils.period_utils import generate_shift_periods
+
+        generate_shift_periods(date(2025, 11, 1), date(2026, 2, 28))
+        client.force_authenticate(user=admin_user)
+
+        response = client.get(
+            "/api/staff/periods/", {"date_from": "2025-12-20", "date_to": "2026-01-20"}
+        )
+        assert response.status_code == 200
+        assert [p["start_date"] for p in response.data["data"]] == ["2025-12-15", "2026-01-15"]
+
+        period_id = response.data["data"][0]["id"]
+        response = client.patch(
+            f"/api/staff/periods/{period_id}/", {"end_date": "2026-01-10"}, format="json"
+        )
+        assert response.status_code == 200
+        assert response.data["data"]["is_override"] is True
+        assert ShiftPeriod.objects.get(end_date=date(2026, 2, 15)).start_date == date(2026, 1, 10)
+
+        response = client.patch(
+            f"/api/staff/periods/{period_id}/", {"end_date": "2025-12-01"}, format="json"
+        )
+        assert response.status_code == 400
+
+        response = client.get("/api/staff/reports/work-hours/", {"period_id": period_id})
+        assert response.status_code == 200
+        assert response.data["data"]["period"]["end"] == date(2026, 1, 10)
+
+
+@pytest.mark.django_db
+class TestWorkScheduleConditionalGet:
+    """
+    勤務シフト一覧の条件付き GET（ETag / Last-Modified）のテストクラス。
+    """
+
+    def test_not_modified_until_change(
+        self, admin_user, django_assert_num_queries, django_capture_on_commit_callbacks
+    ):
+        """変更が無ければ一覧を読まずに304、変更後は200になることのテスト"""
+        role, _ = Role.objects.get_or_create(name="介護士")
+        staff = Staff.objects.create(name="条件太郎", role=role, user=admin_user)
+        client.force_authenticate(user=admin_user)
+
+        response = client.get("/api/staff/schedules/")
+        assert response.status_code == 200
+        etag = response["ETag"]
+        assert response["Last-Modified"]
+
+        with django_assert_num_queries(1):  # 共有の変更スタンプの確認だけ
+            response = client.get("/api/staff/schedules/", HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response["ETag"] == etag
+
+        with django_capture_on_commit_callbacks(execute=True):
+            WorkSchedule.objects.create(
+                staff=staff, shift=ShiftType.objects.get(code="日1"), date=date(2025, 4, 1)
+            )
+        response = client.get("/api/staff/schedules/", HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response["ETag"] != etag
+
+    def test_stamps_are_shared_between_processes(self, admin_user):
+        """変更スタンプがプロセス内のキャッシュではなく共有の DB テーブルに置かれることのテスト"""
+        from django.core.cache import cache
+
+        from utils.change_stamp_utils import STAMP_KEY, stamp_cache
+
+        client.force_authenticate(user=admin_user)
+        etag = client.get("/api/staff/schedules/")["ETag"]
+
+        # 別プロセスのサーバーに相当（プロセス内のキャッシュは空）
+        cache.clear()
+        response = client.get("/api/staff/schedules/", HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+
+        # 管理コマンドなど別プロセスでの書き込みに相当（共有テーブルのスタンプだけが変わる）
+        stamp_cache.set(STAMP_KEY.format(label=WorkSchedule._meta.label), ("other", 0), None)
+        response = client.get("/api/staff/schedules/", HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+
+    def test_etag_varies_by_query(self, admin_user):
+        """絞り込み条件やカーソルが違う一覧には、別の ETag で200を返すことのテスト"""
+        client.force_authenticate(user=admin_user)
+        etag = client.get("/api/staff/schedules/")["ETag"]
+
+        response = client.get(
+            "/api/staff/schedules/", {"limit": 1}, HTTP_IF_NONE_MATCH=etag
+        )
+        assert response.status_code == 200
+        assert response["ETag"] != etag
+
+        response = client.get(
+            "/api/staff/schedules/", {"limit": 1}, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        assert response.status_code == 304
+
+    def test_bulk_upsert_changes_etag(self, admin_user, django_capture_on_commit_callbacks):
+        """シグナルが出ない一括登録でも ETag が変わることのテスト"""
+        from staff.utils.schedule_utils import bulk_upsert_work_schedules
+
+        role, _ = Role.objects.get_or_create(name="介護士")
+        staff = Staff.objects.create(name="条件花子", role=role, user=admin_user)
+        client.force_authenticate(user=admin_user)
+        etag = client.get("/api/staff/schedules/")["ETag"]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            bulk_upsert_work_schedules(
+                [(staff.id, date(2025, 4, 1), ShiftType.objects.get(code="日1").id)]
+            )
+        response = client.get("/api/staff/schedules/", HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
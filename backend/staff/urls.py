@@ -8,6 +8,21 @@ from .views import (
     StaffDetailView,
     WorkScheduleListCreateView,
     WorkScheduleDetailView,
+    WorkScheduleBulkUpsertView,
+    ShiftExpansionView,
+    WorkScheduleCalendarView,
+    WorkScheduleRuleCheckView,
+    WorkScheduleCoverageView,
+    WorkScheduleExportView,
+    WorkScheduleImportView,
+    WorkScheduleCopyForwardView,
+    StaffWorkHoursReportView,
+    StaffPeriodSummaryView,
+    ShiftPeriodListView,
+    ShiftPeriodDetailView,
+    RosterDraftCreateView,
+    RosterDraftDetailView,
+    RosterDraftPublishView,
     assign_night_shift,
 )
 
@@ -33,7 +48,74 @@ urlpatterns = [
     path(
         "schedules/", WorkScheduleListCreateView.as_view(), name="schedule-list"
     ),  # 勤務シフト一覧・作成
+    path(
+        "schedules/bulk/",
+        WorkScheduleBulkUpsertView.as_view(),
+        name="schedule-bulk-upsert",
+    ),  # 勤務シフト一括登録・更新
+    path(
+        "schedules/expand/",
+        ShiftExpansionView.as_view(),
+        name="schedule-expand",
+    ),  # 夜勤など連続シフトの一括展開
+    path(
+        "schedules/calendar/",
+        WorkScheduleCalendarView.as_view(),
+        name="schedule-calendar",
+    ),  # 勤務カレンダー（スタッフ × 日付の行列）
+    path(
+        "schedules/copy-forward/",
+        WorkScheduleCopyForwardView.as_view(),
+        name="schedule-copy-forward",
+    ),  # 前期間の勤務シフトをひな形としてコピー
+    path(
+        "schedules/import/",
+        WorkScheduleImportView.as_view(),
+        name="schedule-import",
+    ),  # 勤務シフトの CSV 一括取り込み
+    path(
+        "schedules/export/",
+        WorkScheduleExportView.as_view(),
+        name="schedule-export",
+    ),  # 勤務シフトのエクスポート（CSV / XLSX）
+    path(
+        "schedules/coverage/",
+        WorkScheduleCoverageView.as_view(),
+        name="schedule-coverage",
+    ),  # 時間帯別の在席人数（ヒートマップ）
+    path(
+        "schedules/validate/",
+        WorkScheduleRuleCheckView.as_view(),
+        name="schedule-validate",
+    ),  # 勤務ルールの一括検証
     path(
         "schedules/<int:pk>/", WorkScheduleDetailView.as_view(), name="schedule-detail"
     ),  # 勤務シフト詳細・更新・削除
+    path(
+        "reports/work-hours/",
+        StaffWorkHoursReportView.as_view(),
+        name="work-hours-report",
+    ),  # 全スタッフの実働時間集計
+    path(
+        "periods/", ShiftPeriodListView.as_view(), name="period-list"
+    ),  # 集計期間（期間表）一覧
+    path(
+        "periods/<int:pk>/", ShiftPeriodDetailView.as_view(), name="period-detail"
+    ),  # 集計期間の個別変更
+    path(
+        "reports/period-summary/",
+        StaffPeriodSummaryView.as_view(),
+        name="period-summary",
+    ),  # スタッフ期間集計（差分更新済み）
+    path(
+        "rosters/", RosterDraftCreateView.as_view(), name="roster-create"
+    ),  # 勤務表の自動作成（下書き）
+    path(
+        "rosters/<int:pk>/", RosterDraftDetailView.as_view(), name="roster-detail"
+    ),  # 勤務表下書きの取得
+    path(
+        "rosters/<int:pk>/publish/",
+        RosterDraftPublishView.as_view(),
+        name="roster-publish",
+    ),  # 勤務表下書きの公開
 ]
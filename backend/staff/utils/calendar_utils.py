@@ -0,0 +1,47 @@
+from datetime import timedelta
+
+from staff.models import ShiftType, Staff, WorkSchedule
+from staff.serializers import ShiftTypeSerializer
+from utils.reference_data_utils import reference_registry
+
+
+def build_schedule_matrix(start_date, end_date, cells=None):
+    """
+    スタッフ × 日付の勤務シフト表を列指向の形で組み立てる。
+
+    勤務シフトは values_list の1クエリで (staff_id, date, shift_id) だけを取得し、
+    ネストしたシリアライザーを通さずに2次元配列へ詰める。
+    シフト定義は参照データキャッシュから1回だけ添付する。
+
+    Args:
+        start_date (date): 開始日
+        end_date (date): 終了日（この日を含む）
+        cells (QuerySet, optional): staff_id / date / shift_id を持つ行
+            （省略時は勤務シフト。勤務表下書きのセルを渡すこともできる）
+
+    Returns:
+        dict: staff_ids / staff_names / dates / shifts（2次元配列）/ shift_types
+    """
+    days = (end_date - start_date).days + 1
+    dates = [start_date + timedelta(days=i) for i in range(days)]
+
+    staffs = list(Staff.objects.order_by("id").values_list("id", "name"))
+    row_index = {staff_id: i for i, (staff_id, _) in enumerate(staffs)}
+
+    matrix = [[None] * days for _ in staffs]
+    if cells is None:
+        cells = WorkSchedule.objects.all()
+    cells = cells.filter(date__gte=start_date, date__lte=end_date).values_list(
+        "staff_id", "date", "shift_id"
+    )
+    for staff_id, day, shift_id in cells:
+        matrix[row_index[staff_id]][(day - start_date).days] = shift_id
+
+    shift_types = reference_registry.snapshot(ShiftType).objects
+    return {
+        "staff_ids": [staff_id for staff_id, _ in staffs],
+        "staff_names": [name for _, name in staffs],
+        "dates": dates,
+        "shifts": matrix,
+        "shift_types": ShiftTypeSerializer(shift_types, many=True).data,
+    }
@@ -0,0 +1,174 @@
+from datetime import timedelta
+
+from django.db import NotSupportedError, connection, transaction
+
+from staff.models import WorkSchedule
+from staff.utils.summary_utils import rebuild_staff_period_summaries
+from utils.change_stamp_utils import touch_change_stamp
+from utils.date_utils import get_shift_period_range
+from utils.model_utils import meal_needs_changed
+
+ON_CONFLICT_CHOICES = ("skip", "overwrite")
+
+# コピーする列（staff / date 以外）。note（備考）はその日固有のためコピーしない
+COPIED_FIELDS = (
+    "shift",
+    "work_minutes",
+    "needs_breakfast",
+    "needs_lunch",
+    "needs_dinner",
+    "meal_note",
+)
+
+
+def build_date_map(source_start, source_end, target_start, target_end, align_weekday=False):
+    """
+    コピー先期間の各日付に対応するコピー元の日付を求める。
+
+    - align_weekday=False: 期間の先頭から同じ日数目の日付（コピー元が短い場合は末尾が空く）
+    - align_weekday=True: コピー元期間内の同じ曜日の日付（先頭の週から順に対応させ、
+      はみ出した分は1週前に戻す）。コピー元が1週間に満たず同じ曜日が無い日は対応させない
+
+    Returns:
+        list(tuple): (コピー元の日付, コピー先の日付)
+    """
+    source_days = (source_end - source_start).days
+    target_days = (target_end - target_start).days
+
+    pairs = []
+    if align_weekday:
+        shift = (target_start.weekday() - source_start.weekday()) % 7
+        for i in range(target_days):
+            offset = i + shift
+            while offset >= source_days:
+                offset -= 7
+            if offset < 0:
+                continue
+            pairs.append((source_start + timedelta(days=offset), target_start + timedelta(days=i)))
+    else:
+        for i in range(min(source_days, target_days)):
+            pairs.append((source_start + timedelta(days=i), target_start + timedelta(days=i)))
+    return pairs
+
+
+def copy_forward_schedules(
+    source_date, target_date, align_weekday=False, on_conflict="skip", staff_ids=None
+):
+    """
+    コピー元期間の勤務シフトを、コピー先期間へ1回の INSERT ... SELECT でコピーする。
+
+    日付の対応表を CTE として渡し、勤務シフト表と JOIN して挿入するため、
+    スタッフ数・行数に関わらず発行する書き込みは1文だけになる。
+    食事の要否（needs_*・meal_note）も引き継ぐ。
+    生の SQL はシグナルを発行しないため、コピー先期間の期間集計・一覧の変更スタンプの更新と
+    食事注文の同期（meal_needs_changed）はここで行う。
+
+    Args:
+        source_date (date): コピー元期間を決める任意の日付
+        target_date (date): コピー先期間を決める任意の日付
+        align_weekday (bool): 曜日を揃えてコピーするか
+        on_conflict (str): コピー先に既に勤務がある場合の扱い（"skip" / "overwrite"）
+        staff_ids (iterable, optional): 対象スタッフ（省略時は全スタッフ）
+
+    Returns:
+        dict: source / target（期間）、copied（コピー対象行数）、created / updated / skipped
+    """
+    if on_conflict not in ON_CONFLICT_CHOICES:
+        raise ValueError(f"on_conflictは {ON_CONFLICT_CHOICES} のいずれかです")
+    if connection.vendor not in ("sqlite", "postgresql"):
+        raise NotSupportedError("期間コピーは SQLite / PostgreSQL のみ対応しています")
+
+    source_start, source_end = get_shift_period_range(source_date)
+    target_start, target_end = get_shift_period_range(target_date)
+    if source_start == target_start:
+        raise ValueError("コピー元とコピー先が同じ期間です")
+
+    pairs = build_date_map(source_start, source_end, target_start, target_end, align_weekday)
+
+    qn = connection.ops.quote_name
+    adapt = connection.ops.adapt_datefield_value
+    opts = WorkSchedule._meta
+    table = qn(opts.db_table)
+    col = {name: qn(opts.get_field(name).column) for name in ("staff", "date") + COPIED_FIELDS}
+    copied = [col[name] for name in COPIED_FIELDS]
+
+    date_map_sql = " UNION ALL ".join(["SELECT %s, %s"] * len(pairs))
+    date_map_params = [adapt(day) for pair in pairs for day in pair]
+
+    staff_sql = ""
+    staff_params = []
+    if staff_ids is not None:
+        staff_ids = list(staff_ids)
+        if not staff_ids:
+            staff_ids = [None]
+        staff_sql = f" AND ws.{col['staff']} IN ({', '.join(['%s'] * len(staff_ids))})"
+        staff_params = staff_ids
+
+    source_sql = (
+        f"WITH date_map (source_date, target_date) AS ({date_map_sql}) "
+        f"{{select}} FROM {table} ws "
+        f"JOIN date_map m ON ws.{col['date']} = m.source_date "
+        f"WHERE 1 = 1{staff_sql}"
+    )
+    params = date_map_params + staff_params
+
+    # 件数の見積もり（コピー対象行数と、コピー先に既に行があるもの）
+    count_sql = source_sql.format(
+        select=(
+            "SELECT COUNT(*), COALESCE(SUM(CASE WHEN EXISTS ("
+            f"SELECT 1 FROM {table} t WHERE t.{col['staff']} = ws.{col['staff']} "
+            f"AND t.{col['date']} = m.target_date) THEN 1 ELSE 0 END), 0)"
+        )
+    )
+
+    if on_conflict == "overwrite":
+        conflict_sql = "DO UPDATE SET " + ", ".join(f"{c} = excluded.{c}" for c in copied)
+    else:
+        conflict_sql = "DO NOTHING"
+    insert_sql = (
+        f"INSERT INTO {table} ({col['staff']}, {col['date']}, {', '.join(copied)}) "
+        + source_sql.format(
+            select=f"SELECT ws.{col['staff']}, m.target_date, "
+            + ", ".join(f"ws.{c}" for c in copied)
+        )
+        + f" ON CONFLICT ({col['staff']}, {col['date']}) {conflict_sql}"
+    )
+
+    summary = {
+        "source": {"start": source_start, "end": source_end},
+        "target": {"start": target_start, "end": target_end},
+        "copied": 0,
+        "created": 0,
+        "updated": 0,
+        "skipped": 0,
+    }
+    if not pairs:
+        return summary
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(count_sql, params)
+            total, conflicts = cursor.fetchone()
+            cursor.execute(insert_sql, params)
+
+        summary["copied"] = total
+        summary["created"] = total - conflicts
+        summary["updated" if on_conflict == "overwrite" else "skipped"] = conflicts
+
+        if summary["created"] or summary["updated"]:
+            rebuild_staff_period_summaries(
+                target_start, target_end - timedelta(days=1), staff_ids
+            )
+            touch_change_stamp(WorkSchedule)
+
+            copied_cells = WorkSchedule.objects.filter(
+                date__gte=target_start, date__lt=target_end
+            )
+            if staff_ids is not None:
+                copied_cells = copied_cells.filter(staff_id__in=staff_ids)
+            meal_needs_changed.send(
+                sender=WorkSchedule,
+                keys=list(copied_cells.values_list("staff_id", "date")),
+            )
+
+    return summary
@@ -0,0 +1,133 @@
+from datetime import datetime, time, timedelta
+
+import numpy as np
+
+from staff.models import ShiftType, WorkSchedule
+from staff.utils.rule_utils import get_shift_rules
+from utils.reference_data_utils import reference_registry
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def _shift_arrays(slot_minutes, off_codes):
+    """
+    シフト種類ID毎の勤務区間・休憩区間（日の0時からのスロット番号）を配列にする。
+
+    休憩は開始時刻が登録されていないため、勤務時間の中央に置く。
+    勤務はスロットに一部でも掛かれば在席、休憩はスロット全体が休憩の場合だけ不在とする。
+    """
+    shifts = reference_registry.snapshot(ShiftType).objects
+    size = max((s.id for s in shifts), default=0) + 1
+    work_start = np.zeros(size, dtype=np.int64)
+    work_end = np.zeros(size, dtype=np.int64)
+    break_start = np.zeros(size, dtype=np.int64)
+    break_end = np.zeros(size, dtype=np.int64)
+    for s in shifts:
+        if s.code in off_codes:
+            continue
+        start, end = s.start_offset_minutes, s.end_offset_minutes
+        rest = min(s.break_minutes, end - start)
+        rest_start = start + (end - start - rest) // 2
+        work_start[s.id] = start // slot_minutes
+        work_end[s.id] = -(-end // slot_minutes)
+        break_start[s.id] = -(-rest_start // slot_minutes)
+        break_end[s.id] = max((rest_start + rest) // slot_minutes, break_start[s.id])
+    return work_start, work_end, break_start, break_end
+
+
+def build_coverage_matrix(
+    start_date, end_date, slot_minutes=15, min_staff=1, role_id=None
+):
+    """
+    期間の勤務シフトから、時間帯スロット × 日付の在席人数行列を作る。
+
+    各勤務を期間先頭からの絶対スロット区間に変換し、差分配列への加算と
+    累積和だけで全スロットの人数を求める（勤務ごとのループを持たない）。
+    日付をまたぐ夜勤・明けも同じ時間軸に載るため、0時前後の人数も連続して数える。
+    前日開始の勤務が当日にかかる分を数えるため、開始日の前日の勤務も読み込む。
+
+    Args:
+        start_date (date): 開始日
+        end_date (date): 終了日（この日を含む）
+        slot_minutes (int): スロットの長さ（分。1日の分数を割り切れること）
+        min_staff (int): 必要人数（これを下回る時間帯を人員不足として返す）
+        role_id (int, optional): 職種で絞り込む
+
+    Returns:
+        dict: dates / slot_minutes / coverage（スロット × 日付の2次元配列）/ under_coverage
+    """
+    if MINUTES_PER_DAY % slot_minutes:
+        raise ValueError("slot_minutesは1日の分数を割り切れる値を指定してください")
+
+    n_days = (end_date - start_date).days + 1
+    slots_per_day = MINUTES_PER_DAY // slot_minutes
+    n_slots = n_days * slots_per_day
+    off_codes = get_shift_rules()["off_codes"]
+
+    qs = WorkSchedule.objects.filter(
+        date__gte=start_date - timedelta(days=1), date__lte=end_date
+    )
+    if role_id is not None:
+        qs = qs.filter(staff__role_id=role_id)
+    rows = list(qs.values_list("date", "shift_id"))
+
+    diff = np.zeros(n_slots + 1, dtype=np.int64)
+    if rows:
+        work_start, work_end, break_start, break_end = _shift_arrays(
+            slot_minutes, off_codes
+        )
+        shift_ids = np.fromiter((r[1] for r in rows), dtype=np.int64, count=len(rows))
+        base = np.fromiter(
+            ((r[0] - start_date).days * slots_per_day for r in rows),
+            dtype=np.int64,
+            count=len(rows),
+        )
+
+        # 差分配列：区間の開始で +1、終了で -1（休憩はその逆）
+        for starts, ends, sign in (
+            (work_start, work_end, 1),
+            (break_start, break_end, -1),
+        ):
+            lo = np.clip(base + starts[shift_ids], 0, n_slots)
+            hi = np.clip(base + ends[shift_ids], 0, n_slots)
+            np.add.at(diff, lo, sign)
+            np.add.at(diff, hi, -sign)
+
+    occupancy = np.cumsum(diff[:-1])
+    coverage = occupancy.reshape(n_days, slots_per_day).T
+
+    return {
+        "dates": [start_date + timedelta(days=i) for i in range(n_days)],
+        "slot_minutes": slot_minutes,
+        "min_staff": min_staff,
+        "coverage": coverage.tolist(),
+        "under_coverage": find_under_coverage(
+            occupancy, start_date, slot_minutes, min_staff
+        ),
+    }
+
+
+def find_under_coverage(occupancy, start_date, slot_minutes, min_staff):
+    """
+    在席人数が必要人数を下回る連続したスロットを時間帯としてまとめる。
+
+    Returns:
+        list(dict): start / end（日時）、min_count（時間帯内の最少人数）、spans_midnight
+    """
+    short = np.concatenate(([False], occupancy < min_staff, [False]))
+    edges = np.flatnonzero(np.diff(short.astype(np.int8)))
+    origin = datetime.combine(start_date, time())
+
+    windows = []
+    for lo, hi in zip(edges[::2], edges[1::2]):
+        start = origin + timedelta(minutes=int(lo) * slot_minutes)
+        end = origin + timedelta(minutes=int(hi) * slot_minutes)
+        windows.append(
+            {
+                "start": start,
+                "end": end,
+                "min_count": int(occupancy[lo:hi].min()),
+                "spans_midnight": start.date() != (end - timedelta(minutes=1)).date(),
+            }
+        )
+    return windows
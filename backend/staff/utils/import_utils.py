@@ -0,0 +1,60 @@
+from collections import defaultdict
+
+from staff.models import ShiftType, Staff
+from staff.utils.schedule_utils import bulk_upsert_work_schedules
+from utils.import_utils import (
+    IMPORT_BATCH_SIZE,
+    ImportRowError,
+    open_csv_stream,
+    parse_date,
+    parse_fields,
+    pick,
+    resolve,
+    run_csv_import,
+)
+from utils.reference_data_utils import reference_registry
+
+
+def import_work_schedule_csv(fileobj, batch_size=IMPORT_BATCH_SIZE):
+    """
+    勤務シフトの CSV を1行ずつ読み込み、batch_size 行毎に一括登録・更新する。
+
+    列（エクスポートと同じ見出し、または英語名）:
+        日付 / date、スタッフID / staff_id または 氏名 / staff、シフトコード / shift
+
+    スタッフ・シフト種類は最初に1回だけ辞書に読み込み、行毎の問い合わせはしない。
+
+    Returns:
+        dict: rows / created / updated / unchanged / error_count / errors（行番号とメッセージ）
+    """
+    staff_ids = set()
+    staff_by_name = defaultdict(list)
+    for staff_id, name in Staff.objects.values_list("id", "name"):
+        staff_ids.add(staff_id)
+        staff_by_name[name].append(staff_id)
+    shifts = reference_registry.snapshot(ShiftType).by_code
+
+    def parse_shift(code):
+        if code not in shifts:
+            raise ImportRowError(f"シフトコードが存在しません: {code}")
+        return shifts[code].id
+
+    def parse_row(row):
+        values = parse_fields(
+            date=lambda: parse_date(pick(row, "日付", "date")),
+            staff_id=lambda: resolve(
+                pick(row, "スタッフID", "staff_id") or pick(row, "氏名", "staff"),
+                staff_ids,
+                staff_by_name,
+                "スタッフ",
+            ),
+            shift_id=lambda: parse_shift(pick(row, "シフトコード", "shift")),
+        )
+        return values["staff_id"], values["date"], values["shift_id"]
+
+    return run_csv_import(
+        open_csv_stream(fileobj),
+        parse_row,
+        lambda entries: bulk_upsert_work_schedules(entries, batch_size=batch_size),
+        batch_size=batch_size,
+    )
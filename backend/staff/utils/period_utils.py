@@ -0,0 +1,157 @@
+import bisect
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Max, Min, OuterRef, Subquery
+
+from staff.models import ShiftPeriod, StaffPeriodSummary
+from staff.utils.summary_utils import rebuild_staff_period_summaries
+from utils.date_utils import default_period_range
+from utils.reference_data_utils import reference_registry
+
+# 期間表スナップショットから作った開始日の索引（スナップショットが変われば作り直す）。
+# 他スレッドが途中の状態を読まないよう、タプルごと差し替える
+_index = (None, [], [])
+
+
+def _period_index():
+    global _index
+    snapshot = reference_registry.snapshot(ShiftPeriod)
+    if _index[0] is not snapshot:
+        periods = sorted(snapshot.objects, key=lambda p: p.start_date)
+        _index = (snapshot, [p.start_date for p in periods], periods)
+    return _index[1], _index[2]
+
+
+def find_shift_period(target_date):
+    """
+    期間表から指定日が属する集計期間を二分探索で探す。
+
+    Returns:
+        ShiftPeriod: 集計期間（期間表に無ければ None）
+    """
+    starts, periods = _period_index()
+    i = bisect.bisect_right(starts, target_date) - 1
+    if i >= 0 and target_date < periods[i].end_date:
+        return periods[i]
+    return None
+
+
+def resolve_period_range(target_date):
+    """
+    utils.date_utils.get_shift_period_range に登録する参照関数。
+
+    Returns:
+        tuple(date, date): (開始日, 終了日)。期間表に無ければ None
+    """
+    period = find_shift_period(target_date)
+    if period is None:
+        return None
+    return period.start_date, period.end_date
+
+
+def generate_shift_periods(start_date, end_date):
+    """
+    start_date〜end_date（終了日を含む）を覆うよう、期間表に足りない期間を作成する。
+
+    既存の期間（個別設定を含む）は変更せず、先頭の前・末尾の後ろに
+    締め日の設定で計算した期間を継ぎ足すため、期間表は常に隙間なく連続する。
+
+    Returns:
+        int: 作成した期間の数
+    """
+    bounds = ShiftPeriod.objects.aggregate(
+        first=Min("start_date"), last=Max("end_date")
+    )
+    if bounds["first"] is None:
+        first, _ = default_period_range(start_date)
+        last = first
+    else:
+        first, last = bounds["first"], bounds["last"]
+
+    rows = []
+    while last <= end_date:
+        _, period_end = default_period_range(last)
+        rows.append(ShiftPeriod(start_date=last, end_date=period_end))
+        last = period_end
+    while first > start_date:
+        period_start, _ = default_period_range(first - timedelta(days=1))
+        rows.append(ShiftPeriod(start_date=period_start, end_date=first))
+        first = period_start
+
+    if rows:
+        ShiftPeriod.objects.bulk_create(rows, ignore_conflicts=True)
+        # bulk_create はシグナルを発行しないため、参照データキャッシュをここで破棄する
+        reference_registry.invalidate(ShiftPeriod)
+    return len(rows)
+
+
+def override_shift_period(period, start_date, end_date):
+    """
+    集計期間の開始日・終了日を個別に変更する（年末年始の締めの前倒しなど）。
+
+    隣の期間の終了日・開始日も合わせて動かし、期間表を連続したまま保つ。
+    期間集計（StaffPeriodSummary）は期間開始日をキーにしているため、
+    動いた期間の分を作り直す。
+
+    Raises:
+        ValueError: 期間が空になる場合、または隣の期間が期間表に無い場合
+    """
+    if start_date >= end_date:
+        raise ValueError("終了日は開始日より後の日付を指定してください")
+
+    with transaction.atomic():
+        period = ShiftPeriod.objects.select_for_update().get(pk=period.pk)
+        prev = None
+        if start_date != period.start_date:
+            prev = (
+                ShiftPeriod.objects.select_for_update()
+                .filter(end_date=period.start_date)
+                .first()
+            )
+            if prev is None:
+                raise ValueError("前の期間が期間表にありません")
+            if start_date <= prev.start_date:
+                raise ValueError("開始日は前の期間の開始日より後にしてください")
+        nxt = None
+        if end_date != period.end_date:
+            nxt = (
+                ShiftPeriod.objects.select_for_update()
+                .filter(start_date=period.end_date)
+                .first()
+            )
+            if nxt is None:
+                raise ValueError("次の期間が期間表にありません")
+            if end_date >= nxt.end_date:
+                raise ValueError("終了日は次の期間の終了日より前にしてください")
+
+        touched = [p for p in (prev, period, nxt) if p is not None]
+        old_starts = [p.start_date for p in touched]
+        span_start = min(old_starts + [start_date])
+        span_end = max([p.end_date for p in touched] + [end_date])
+
+        period.start_date, period.end_date = start_date, end_date
+        if prev is not None:
+            prev.end_date = start_date
+        if nxt is not None:
+            nxt.start_date = end_date
+        for p in touched:
+            p.is_override = True
+            p.save()
+
+        StaffPeriodSummary.objects.filter(period_start__in=old_starts).delete()
+        rebuild_staff_period_summaries(span_start, span_end - timedelta(days=1))
+    return period
+
+
+def annotate_shift_period(queryset, field="date"):
+    """
+    日付フィールドが属する集計期間のIDを period_id として付ける。
+
+    期間表との結合は DB 側で行うため、values("period_id").annotate(...) で
+    期間単位の集計を1クエリで書ける。
+    """
+    period = ShiftPeriod.objects.filter(
+        start_date__lte=OuterRef(field), end_date__gt=OuterRef(field)
+    ).order_by()
+    return queryset.annotate(period_id=Subquery(period.values("id")[:1]))
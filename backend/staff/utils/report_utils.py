@@ -0,0 +1,99 @@
+from django.db.models import Q, Sum
+from django.db.models.functions import Coalesce
+
+from staff.models import ShiftPeriod, Staff, WorkSchedule
+from staff.utils.period_utils import annotate_shift_period
+from utils.date_utils import get_shift_period_range
+
+
+def monthly_work_hours_report(target_date=None, period_id=None):
+    """
+    全スタッフの指定期間（15日〜翌月15日）の実働時間を1クエリで集計する。
+
+    Staff.monthly_work_hours をスタッフ毎に呼ぶ代わりに、
+    勤務シフトに保存済みの実働時間（work_minutes）を SUM() で集計する。
+    勤務が1件もないスタッフも 0 分として含める。
+
+    Args:
+        target_date (datetime.date, optional): 期間を決める任意の日付。指定がなければ今日。
+        period_id (int, optional): 集計期間ID（指定した場合は target_date より優先）
+
+    Returns:
+        dict: 期間（start / end）とスタッフ毎の実働時間リスト
+    """
+    if period_id is not None:
+        period = ShiftPeriod.objects.get(pk=period_id)
+        start_date, end_date = period.start_date, period.end_date
+    else:
+        start_date, end_date = get_shift_period_range(target_date)
+
+    in_period = Q(
+        workschedule__date__gte=start_date, workschedule__date__lt=end_date
+    )
+    staffs = (
+        Staff.objects.annotate(
+            work_minutes=Coalesce(
+                Sum("workschedule__work_minutes", filter=in_period),
+                0,
+            )
+        )
+        .order_by("id")
+        .values("id", "name", "work_minutes")
+    )
+
+    results = [
+        {
+            "staff_id": row["id"],
+            "name": row["name"],
+            "work_minutes": row["work_minutes"],
+            "work_hours": round(row["work_minutes"] / 60, 2),
+        }
+        for row in staffs
+    ]
+
+    return {
+        "period": {"start": start_date, "end": end_date},
+        "results": results,
+    }
+
+
+def work_hours_by_period(start_date, end_date, staff_ids=None):
+    """
+    start_date〜end_date（終了日を含む）の勤務を、集計期間ID × スタッフ毎に DB 側で集計する。
+
+    勤務日を期間表（ShiftPeriod）に結合して GROUP BY するため、
+    期間をまたぐ範囲でも Python 側で期間毎にループしない。
+
+    Returns:
+        list(dict): period_id / period_start / period_end / staff_id / work_minutes / work_hours
+    """
+    qs = WorkSchedule.objects.filter(date__gte=start_date, date__lte=end_date)
+    if staff_ids is not None:
+        qs = qs.filter(staff_id__in=staff_ids)
+    rows = (
+        annotate_shift_period(qs)
+        .values("period_id", "staff_id")
+        .annotate(work_minutes=Coalesce(Sum("work_minutes"), 0))
+        .order_by()
+    )
+    periods = ShiftPeriod.objects.in_bulk({row["period_id"] for row in rows})
+
+    # 期間IDは作成順のため、開始日順に並べ直す（期間表に無い日付は末尾）
+    def sort_key(row):
+        period = periods.get(row["period_id"])
+        return (period is None, period.start_date if period else None, row["staff_id"])
+
+    results = []
+    for row in sorted(rows, key=sort_key):
+        period = periods.get(row["period_id"])
+        results.append(
+            {
+                "period_id": row["period_id"],
+                "period_start": period.start_date if period else None,
+                "period_end": period.end_date if period else None,
+                "staff_id": row["staff_id"],
+                "work_minutes": row["work_minutes"],
+                "work_hours": round(row["work_minutes"] / 60, 2),
+            }
+        )
+    return results
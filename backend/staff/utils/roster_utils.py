@@ -0,0 +1,458 @@
+import random
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from staff.models import (
+    RosterDraft,
+    RosterDraftEntry,
+    ShiftType,
+    Staff,
+    WorkSchedule,
+)
+from staff.utils.rule_utils import get_shift_rules, validate_schedule_rows
+from staff.utils.schedule_utils import bulk_upsert_work_schedules
+from staff.utils.shift_utils import get_shift_patterns
+from utils.date_utils import get_shift_period_range
+from utils.reference_data_utils import reference_registry
+
+MINUTES_PER_DAY = 24 * 60
+
+# 違反1件あたりのコスト（公平性のコストより十分大きくする）
+RULE_PENALTY = 10_000
+
+
+class RosterError(Exception):
+    """勤務表の自動作成・公開ができない場合に送出される例外"""
+
+
+class RosterSolver:
+    """
+    集計期間の勤務表を作成するソルバー（すべてプロセス内で完結する）。
+
+    1. 休み希望・前期間から続く夜勤パターンを固定する
+    2. 夜勤を 夜→明→休 のパターンごと、必要人数分だけ貪欲に割り当てる
+    3. 日勤などの必要人数を、ルールを破らないスタッフから実働時間の少ない順に割り当てる
+    4. 同じ日・同じ職種のスタッフ間でセルを入れ替える局所探索で、
+       ルール違反と実働時間の偏りを減らす（入れ替えなので充足人数は変わらない）
+    """
+
+    def __init__(
+        self,
+        staffs,
+        dates,
+        requirements,
+        leave_requests=None,
+        history=None,
+        rules=None,
+        seed=None,
+    ):
+        """
+        Args:
+            staffs (list): (staff_id, role_id) のリスト
+            dates (list): 期間内の日付（昇順）
+            requirements (list(dict)): 必要人数 {shift, count, role(任意), date(任意)}
+                date を省略した行は毎日の必要人数、指定した行はその日だけ上書きする
+            leave_requests (dict, optional): (staff_id, date) → 休みのシフトコード
+            history (dict, optional): 期間直前の (staff_id, date) → シフトコード
+            rules (dict, optional): 勤務ルール（省略時は get_shift_rules()）
+            seed (int, optional): 乱数シード
+        """
+        self.rules = rules or get_shift_rules()
+        self.random = random.Random(seed)
+        self.shifts = reference_registry.snapshot(ShiftType).by_code
+        self.night_code = self.rules["night_code"]
+        self.off_code = self.rules["off_codes"][0]
+        self.night_pattern = get_shift_patterns().get(self.night_code, [self.night_code])
+
+        self.staff_ids = [staff_id for staff_id, _ in staffs]
+        self.roles = [role_id for _, role_id in staffs]
+        self.dates = list(dates)
+        self.day_index = {day: i for i, day in enumerate(self.dates)}
+        n_staff, n_days = len(self.staff_ids), len(self.dates)
+
+        # 連続勤務・休息時間の判定用に、期間直前の数日分を行の先頭に持つ
+        self.history_days = self.rules["max_consecutive_days"]
+        first = self.dates[0]
+        history = history or {}
+        row_of = {staff_id: s for s, staff_id in enumerate(self.staff_ids)}
+        self.history = [[None] * self.history_days for _ in range(n_staff)]
+        for (staff_id, day), code in history.items():
+            offset = (day - first).days + self.history_days
+            if staff_id in row_of and 0 <= offset < self.history_days:
+                self.history[row_of[staff_id]][offset] = code
+
+        self.grid = [[None] * n_days for _ in range(n_staff)]
+        self.locked = [[False] * n_days for _ in range(n_staff)]
+        self.demand = self._expand_requirements(requirements)
+        self.shortfalls = []
+
+        for (staff_id, day), code in (leave_requests or {}).items():
+            if staff_id in row_of and day in self.day_index:
+                self._fix(row_of[staff_id], self.day_index[day], code)
+        self._continue_history_patterns()
+
+        # シフトコード毎の属性（行コスト計算用）
+        self.info = {
+            code: (
+                code not in self.rules["off_codes"],
+                shift.start_offset_minutes,
+                shift.end_offset_minutes,
+                shift.work_minutes,
+            )
+            for code, shift in self.shifts.items()
+        }
+
+    # ---- 準備 ----
+
+    def _expand_requirements(self, requirements):
+        """必要人数を 日 → [(シフトコード, 職種ID, 人数)] に展開する（職種指定を先に並べる）"""
+        daily = {}
+        per_date = defaultdict(dict)
+        for req in requirements:
+            key = (req["shift"], req.get("role"))
+            if req.get("date") is None:
+                daily[key] = req["count"]
+            elif req["date"] in self.day_index:
+                per_date[self.day_index[req["date"]]][key] = req["count"]
+
+        demand = []
+        for d in range(len(self.dates)):
+            merged = {**daily, **per_date.get(d, {})}
+            demand.append(
+                sorted(
+                    ((code, role, count) for (code, role), count in merged.items() if count),
+                    key=lambda item: item[1] is None,
+                )
+            )
+        return demand
+
+    def _fix(self, s, d, code):
+        self.grid[s][d] = code
+        self.locked[s][d] = True
+
+    def _continue_history_patterns(self):
+        """前期間の末尾で始まった夜勤パターンの残りを期間の先頭に固定する"""
+        length = len(self.night_pattern)
+        for s, row in enumerate(self.history):
+            for back in range(1, length):
+                if back > len(row) or row[-back] != self.night_code:
+                    continue
+                for k, code in enumerate(self.night_pattern[back:]):
+                    if k < len(self.dates) and self.grid[s][k] is None:
+                        self._fix(s, k, code)
+                break
+
+    # ---- コスト ----
+
+    def row_rule_cost(self, s):
+        """1スタッフ分の行のルール違反数（連続勤務超過日数・休息不足・夜勤明けなし・実働上限超過）"""
+        rules = self.rules
+        row = self.history[s] + self.grid[s]
+        offset = self.history_days
+        cost = 0
+        run = 0
+        prev_end = None
+        minutes = 0
+        for i, code in enumerate(row):
+            info = self.info.get(code)
+            if info is None or not info[0]:
+                run = 0
+                continue
+            is_work, start, end, work_minutes = info
+            run += 1
+            if i >= offset:
+                minutes += work_minutes
+                if run > rules["max_consecutive_days"]:
+                    cost += 1
+                if prev_end is not None:
+                    gap = i * MINUTES_PER_DAY + start - prev_end
+                    if gap != 0 and gap < rules["min_rest_minutes"]:
+                        cost += 1
+                if (
+                    code == self.night_code
+                    and i + 1 < len(row)
+                    and row[i + 1] is not None
+                    and row[i + 1] != rules["after_night_code"]
+                ):
+                    cost += 1
+            prev_end = i * MINUTES_PER_DAY + end
+        if minutes > rules["max_period_work_minutes"]:
+            cost += 1
+        return cost
+
+    def row_minutes(self, s):
+        return sum(
+            self.info[code][3]
+            for code in self.grid[s]
+            if code is not None and self.info[code][0]
+        )
+
+    def row_cost(self, s, target):
+        """ルール違反コスト + 目標実働時間からの乖離（時間の2乗）"""
+        deviation = (self.row_minutes(s) - target) / 60
+        return self.row_rule_cost(s) * RULE_PENALTY + deviation * deviation
+
+    # ---- 構築 ----
+
+    def _candidates(self, d, role):
+        rows = [
+            s
+            for s in range(len(self.staff_ids))
+            if self.grid[s][d] is None and (role is None or self.roles[s] == role)
+        ]
+        self.random.shuffle(rows)
+        rows.sort(key=lambda s: self.minutes[s])
+        return rows
+
+    def _try_place(self, s, cells):
+        """違反が増えない場合だけ cells（[(日, コード)]）を割り当てる"""
+        before = self.rule_cost[s]
+        for d, code in cells:
+            self.grid[s][d] = code
+        after = self.row_rule_cost(s)
+        if after > before:
+            for d, _ in cells:
+                self.grid[s][d] = None
+            return False
+        self.rule_cost[s] = after
+        self.minutes[s] = self.row_minutes(s)
+        return True
+
+    def _assign(self, d, code, role, count, place):
+        assigned = 0
+        for s in self._candidates(d, role):
+            if assigned == count:
+                break
+            if place(s):
+                assigned += 1
+        if assigned < count:
+            self.shortfalls.append(
+                {
+                    "date": self.dates[d],
+                    "shift": code,
+                    "role": role,
+                    "required": count,
+                    "assigned": assigned,
+                }
+            )
+
+    def construct(self):
+        n_staff, n_days = len(self.staff_ids), len(self.dates)
+        self.rule_cost = [self.row_rule_cost(s) for s in range(n_staff)]
+        self.minutes = [self.row_minutes(s) for s in range(n_staff)]
+
+        # 夜勤はパターン（夜→明→休）ごと割り当てて固定する
+        for d in range(n_days):
+            for code, role, count in self.demand[d]:
+                if code != self.night_code:
+                    continue
+                cells = [
+                    (d + k, c)
+                    for k, c in enumerate(self.night_pattern)
+                    if d + k < n_days
+                ]
+
+                def place(s, cells=cells):
+                    if any(self.grid[s][day] is not None for day, _ in cells):
+                        return False
+                    if not self._try_place(s, cells):
+                        return False
+                    for day, _ in cells:
+                        self.locked[s][day] = True
+                    return True
+
+                self._assign(d, code, role, count, place)
+
+        # それ以外のシフトは日付順に1セルずつ割り当てる
+        for d in range(n_days):
+            for code, role, count in self.demand[d]:
+                if code == self.night_code:
+                    continue
+                self._assign(
+                    d, code, role, count, lambda s, d=d, code=code: self._try_place(s, [(d, code)])
+                )
+
+        for s in range(n_staff):
+            for d in range(n_days):
+                if self.grid[s][d] is None:
+                    self.grid[s][d] = self.off_code
+
+    # ---- 局所探索 ----
+
+    def improve(self, time_limit=2.0, max_iterations=50_000):
+        """
+        同じ日・同じ職種の2人のセルを入れ替え、コストが下がらなければ戻す。
+
+        Returns:
+            int: 試行回数
+        """
+        n_staff, n_days = len(self.staff_ids), len(self.dates)
+        total = sum(self.row_minutes(s) for s in range(n_staff))
+        target = total / n_staff if n_staff else 0
+        costs = [self.row_cost(s, target) for s in range(n_staff)]
+
+        groups = defaultdict(list)
+        for s, role in enumerate(self.roles):
+            groups[role].append(s)
+        groups = [rows for rows in groups.values() if len(rows) > 1]
+        if not groups:
+            return 0
+
+        deadline = time.monotonic() + time_limit
+        iterations = 0
+        while iterations < max_iterations and time.monotonic() < deadline:
+            iterations += 1
+            d = self.random.randrange(n_days)
+            a, b = self.random.sample(self.random.choice(groups), 2)
+            if self.locked[a][d] or self.locked[b][d]:
+                continue
+            if self.grid[a][d] == self.grid[b][d]:
+                continue
+
+            self.grid[a][d], self.grid[b][d] = self.grid[b][d], self.grid[a][d]
+            new_a, new_b = self.row_cost(a, target), self.row_cost(b, target)
+            if new_a + new_b <= costs[a] + costs[b]:
+                costs[a], costs[b] = new_a, new_b
+            else:
+                self.grid[a][d], self.grid[b][d] = self.grid[b][d], self.grid[a][d]
+        return iterations
+
+    def solve(self, time_limit=2.0):
+        """
+        勤務表を作成する。
+
+        Returns:
+            dict: cells（(staff_id, date) → シフトコード）、shortfalls、iterations
+        """
+        self.construct()
+        iterations = self.improve(time_limit=time_limit)
+        cells = {
+            (staff_id, day): self.grid[s][d]
+            for s, staff_id in enumerate(self.staff_ids)
+            for d, day in enumerate(self.dates)
+        }
+        return {
+            "cells": cells,
+            "shortfalls": self.shortfalls,
+            "iterations": iterations,
+        }
+
+
+def generate_roster_draft(
+    target_date,
+    requirements,
+    leave_requests=None,
+    staff_ids=None,
+    seed=None,
+    time_limit=2.0,
+):
+    """
+    指定日が属する集計期間の勤務表を自動作成し、下書きとして一括保存する。
+
+    Args:
+        target_date (date): 期間を決める任意の日付
+        requirements (list(dict)): 必要人数 {shift, count, role(任意), date(任意)}
+        leave_requests (dict, optional): (staff_id, date) → 休みのシフトコード
+        staff_ids (iterable, optional): 対象スタッフ（省略時は全スタッフ）
+        seed (int, optional): 乱数シード
+        time_limit (float): 局所探索の制限時間（秒）
+
+    Returns:
+        RosterDraft: 作成した下書き
+    """
+    started = time.monotonic()
+    rules = get_shift_rules()
+    start_date, end_date = get_shift_period_range(target_date)
+    dates = [
+        start_date + timedelta(days=i) for i in range((end_date - start_date).days)
+    ]
+
+    shifts = reference_registry.snapshot(ShiftType).by_code
+    codes = {req["shift"] for req in requirements} | set((leave_requests or {}).values())
+    codes |= set(get_shift_patterns().get(rules["night_code"], []))
+    codes.add(rules["off_codes"][0])
+    missing = codes - shifts.keys()
+    if missing:
+        raise ShiftType.DoesNotExist(f"シフト種類が存在しません: {sorted(missing)}")
+
+    staffs = Staff.objects.order_by("id")
+    if staff_ids is not None:
+        staffs = staffs.filter(id__in=staff_ids)
+    staffs = list(staffs.values_list("id", "role_id"))
+    if not staffs:
+        raise RosterError("対象のスタッフがいません。")
+
+    history = {
+        (staff_id, day): code
+        for staff_id, day, code in WorkSchedule.objects.filter(
+            staff_id__in=[staff_id for staff_id, _ in staffs],
+            date__gte=start_date - timedelta(days=rules["max_consecutive_days"]),
+            date__lt=start_date,
+        ).values_list("staff_id", "date", "shift__code")
+    }
+
+    solver = RosterSolver(
+        staffs,
+        dates,
+        requirements,
+        leave_requests=leave_requests,
+        history=history,
+        rules=rules,
+        seed=seed,
+    )
+    result = solver.solve(time_limit=time_limit)
+
+    rows = [
+        (staff_id, day, shifts[code].id) for (staff_id, day), code in result["cells"].items()
+    ]
+    violations = validate_schedule_rows(
+        rows + [(s, d, shifts[c].id) for (s, d), c in history.items()],
+        start_date,
+        end_date,
+        rules,
+    )
+
+    with transaction.atomic():
+        draft = RosterDraft.objects.create(
+            period_start=start_date,
+            stats={
+                "shortfalls": result["shortfalls"],
+                "violations": violations,
+                "iterations": result["iterations"],
+                "elapsed_ms": int((time.monotonic() - started) * 1000),
+            },
+        )
+        RosterDraftEntry.objects.bulk_create(
+            [
+                RosterDraftEntry(draft=draft, staff_id=staff_id, date=day, shift_id=shift_id)
+                for staff_id, day, shift_id in rows
+            ],
+            batch_size=500,
+        )
+    return draft
+
+
+def publish_roster_draft(draft, check_rules=False):
+    """
+    下書きを勤務シフトへ一括登録する（bulk_upsert_work_schedules 経由）。
+
+    Returns:
+        dict: created / updated / unchanged の件数
+    """
+    with transaction.atomic():
+        draft = RosterDraft.objects.select_for_update().get(pk=draft.pk)
+        if draft.status == "published":
+            raise RosterError("この勤務表は公開済みです。")
+
+        summary = bulk_upsert_work_schedules(
+            draft.entries.values_list("staff_id", "date", "shift_id"),
+            check_rules=check_rules,
+        )
+        draft.status = "published"
+        draft.published_at = timezone.now()
+        draft.save(update_fields=["status", "published_at"])
+    return summary
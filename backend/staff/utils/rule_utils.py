@@ -0,0 +1,232 @@
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+
+from staff.models import ShiftType, WorkSchedule
+from staff.utils.summary_utils import iter_period_starts
+from utils.date_utils import get_shift_period_range
+from utils.reference_data_utils import reference_registry
+
+# 勤務ルールの既定値（settings.SHIFT_RULES で上書きできる）
+DEFAULT_SHIFT_RULES = {
+    # 勤務終了から次の勤務開始までの最低休息時間（分）。0分の間隔は連続勤務（夜→明）とみなす
+    "min_rest_minutes": 11 * 60,
+    # 最大連続勤務日数
+    "max_consecutive_days": 6,
+    # 集計期間あたりの実働時間上限（分）
+    "max_period_work_minutes": 177 * 60,
+    # 夜勤コードと、翌日に必要な明けコード
+    "night_code": "夜",
+    "after_night_code": "明",
+    # 勤務日として数えないシフトコード
+    "off_codes": ["休", "有"],
+}
+
+MINUTES_PER_DAY = 24 * 60
+
+
+class ShiftRuleViolationError(Exception):
+    """一括登録前の検証で勤務ルール違反が見つかった場合に送出される例外"""
+
+    def __init__(self, violations):
+        self.violations = violations
+        super().__init__(f"{len(violations)}件の勤務ルール違反があります。")
+
+
+def get_shift_rules():
+    """設定を反映した勤務ルール辞書を返す"""
+    rules = dict(DEFAULT_SHIFT_RULES)
+    rules.update(getattr(settings, "SHIFT_RULES", {}))
+    return rules
+
+
+def validate_schedule_rows(rows, start_date, end_date, rules=None):
+    """
+    勤務シフト行を NumPy 配列に展開し、全スタッフの勤務ルールをまとめて検証する。
+
+    行の読み込み範囲には、連続勤務・休息時間の判定のため
+    期間の前後の日付を含めてよい（違反として報告するのは期間内の日付のみ）。
+
+    Args:
+        rows (iterable): (staff_id, date, shift_id) のタプル列
+        start_date (date): 検証期間の開始日
+        end_date (date): 検証期間の終了日（この日を含まない）
+        rules (dict, optional): 勤務ルール（省略時は get_shift_rules()）
+
+    Returns:
+        list(dict): 違反一覧（rule, staff_id, date, detail）
+    """
+    rules = rules or get_shift_rules()
+    rows = list(rows)
+    if not rows:
+        return []
+
+    # ---- シフト種類の属性を ID で引ける配列にする ----
+    shifts = reference_registry.snapshot(ShiftType).objects
+    max_id = max(s.id for s in shifts) + 1
+    start_of = np.zeros(max_id, dtype=np.int64)
+    end_of = np.zeros(max_id, dtype=np.int64)
+    minutes_of = np.zeros(max_id, dtype=np.int64)
+    is_work_of = np.zeros(max_id, dtype=bool)
+    is_night_of = np.zeros(max_id, dtype=bool)
+    is_after_night_of = np.zeros(max_id, dtype=bool)
+    for s in shifts:
+        start_of[s.id] = s.start_offset_minutes
+        end_of[s.id] = s.end_offset_minutes
+        minutes_of[s.id] = s.work_minutes
+        is_work_of[s.id] = s.code not in rules["off_codes"]
+        is_night_of[s.id] = s.code == rules["night_code"]
+        is_after_night_of[s.id] = s.code == rules["after_night_code"]
+
+    # ---- 行を配列に展開 ----
+    staff_ids = np.array([r[0] for r in rows], dtype=np.int64)
+    shift_ids = np.array([r[2] for r in rows], dtype=np.int64)
+    first_day = min(r[1] for r in rows)
+    day_idx = np.array([(r[1] - first_day).days for r in rows], dtype=np.int64)
+
+    period_lo = (start_date - first_day).days
+    period_hi = (end_date - first_day).days
+    staff_list, staff_idx = np.unique(staff_ids, return_inverse=True)
+    n_staff = len(staff_list)
+    # 期間最終日の夜勤も翌日と比べられるよう、少なくとも期間終了日の列までは確保する
+    n_days = max(int(day_idx.max()), period_hi) + 1
+
+    is_work = is_work_of[shift_ids]
+    day_of = [first_day + timedelta(days=i) for i in range(n_days)]
+    violations = []
+
+    def report(rule, s_idx, d_idx, detail):
+        for s, d, value in zip(s_idx, d_idx, detail):
+            if period_lo <= d < period_hi:
+                violations.append(
+                    {
+                        "rule": rule,
+                        "staff_id": int(staff_list[s]),
+                        "date": day_of[d],
+                        "detail": int(value),
+                    }
+                )
+
+    # ---- スタッフ × 日 の行列 ----
+    work = np.zeros((n_staff, n_days), dtype=bool)
+    has_cell = np.zeros((n_staff, n_days + 1), dtype=bool)
+    night = np.zeros((n_staff, n_days + 1), dtype=bool)
+    after_night = np.zeros((n_staff, n_days + 1), dtype=bool)
+    work[staff_idx, day_idx] = is_work
+    has_cell[staff_idx, day_idx] = True
+    night[staff_idx, day_idx] = is_night_of[shift_ids]
+    after_night[staff_idx, day_idx] = is_after_night_of[shift_ids]
+
+    # 1. 最大連続勤務日数：累積和から直前の休日までの累積和を引いて連続日数を得る
+    counts = work.cumsum(axis=1)
+    reset = np.maximum.accumulate(np.where(~work, counts, 0), axis=1)
+    run = counts - reset
+    s_idx, d_idx = np.nonzero(run == rules["max_consecutive_days"] + 1)
+    report("max_consecutive_days", s_idx, d_idx, run[s_idx, d_idx])
+
+    # 2. 夜勤の翌日が明けでない（空欄も違反。ただし期間最終日の夜勤は、
+    #    翌期間の勤務がまだ組まれていないことがあるため、翌日が未登録なら判定しない）
+    missing = night[:, :-1] & ~after_night[:, 1:]
+    if period_hi >= 1:
+        missing[:, period_hi - 1] &= has_cell[:, period_hi]
+    s_idx, d_idx = np.nonzero(missing)
+    report("night_without_after_night", s_idx, d_idx, np.zeros(len(s_idx)))
+
+    # 3. 最低休息時間：勤務を (スタッフ, 開始時刻) で並べ、隣り合う勤務の間隔を見る
+    w_staff = staff_idx[is_work]
+    w_day = day_idx[is_work]
+    w_start = w_day * MINUTES_PER_DAY + start_of[shift_ids[is_work]]
+    w_end = w_day * MINUTES_PER_DAY + end_of[shift_ids[is_work]]
+    order = np.lexsort((w_start, w_staff))
+    w_staff, w_day, w_start, w_end = (
+        w_staff[order],
+        w_day[order],
+        w_start[order],
+        w_end[order],
+    )
+    gap = w_start[1:] - w_end[:-1]
+    short = (w_staff[1:] == w_staff[:-1]) & (gap != 0) & (gap < rules["min_rest_minutes"])
+    hit = np.nonzero(short)[0] + 1
+    report("min_rest", w_staff[hit], w_day[hit], gap[hit - 1])
+
+    # 4. 期間内の実働時間上限
+    in_period = (day_idx >= period_lo) & (day_idx < period_hi) & is_work
+    totals = np.bincount(
+        staff_idx, weights=np.where(in_period, minutes_of[shift_ids], 0), minlength=n_staff
+    ).astype(np.int64)
+    for s in np.nonzero(totals > rules["max_period_work_minutes"])[0]:
+        violations.append(
+            {
+                "rule": "max_period_work_minutes",
+                "staff_id": int(staff_list[s]),
+                "date": start_date,
+                "detail": int(totals[s]),
+            }
+        )
+
+    violations.sort(key=lambda v: (v["staff_id"], v["date"], v["rule"]))
+    return violations
+
+
+def load_rule_window(start_date, end_date, rules, staff_ids=None):
+    """
+    検証に必要な範囲（期間の前に連続勤務日数分、後ろに1日）の勤務シフト行を取得する。
+    """
+    qs = WorkSchedule.objects.filter(
+        date__gte=start_date - timedelta(days=rules["max_consecutive_days"]),
+        date__lte=end_date,
+    )
+    if staff_ids is not None:
+        qs = qs.filter(staff_id__in=staff_ids)
+    return {
+        (staff_id, day): shift_id
+        for staff_id, day, shift_id in qs.values_list("staff_id", "date", "shift_id")
+    }
+
+
+def validate_period(target_date=None):
+    """
+    指定日が属する集計期間の全スタッフの勤務ルールを検証する。
+
+    Returns:
+        dict: 期間（start / end）と違反一覧
+    """
+    rules = get_shift_rules()
+    start_date, end_date = get_shift_period_range(target_date)
+    cells = load_rule_window(start_date, end_date, rules)
+    violations = validate_schedule_rows(
+        ((s, d, shift) for (s, d), shift in cells.items()), start_date, end_date, rules
+    )
+    return {"period": {"start": start_date, "end": end_date}, "violations": violations}
+
+
+def validate_proposed_cells(desired):
+    """
+    一括登録予定のセルを既存の勤務に重ねた状態で検証する（書き込み前フック）。
+
+    Args:
+        desired (dict): (staff_id, date) → shift_id
+
+    Raises:
+        ShiftRuleViolationError: 違反がある場合
+    """
+    if not desired:
+        return
+    rules = get_shift_rules()
+    staff_ids = {staff_id for staff_id, _ in desired}
+    dates = [day for _, day in desired]
+
+    # 変更対象の日付を含む集計期間それぞれを検証する（実働時間上限は期間毎）
+    first_start, _ = get_shift_period_range(min(dates))
+    _, last_end = get_shift_period_range(max(dates))
+    cells = load_rule_window(first_start, last_end, rules, staff_ids)
+    cells.update(desired)
+    rows = [(s, d, shift) for (s, d), shift in cells.items()]
+
+    violations = []
+    for period_start in iter_period_starts(min(dates), max(dates)):
+        _, period_end = get_shift_period_range(period_start)
+        violations += validate_schedule_rows(rows, period_start, period_end, rules)
+    if violations:
+        raise ShiftRuleViolationError(violations)
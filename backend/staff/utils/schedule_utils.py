@@ -0,0 +1,76 @@
+from django.db import transaction
+
+from staff.models import ShiftType, WorkSchedule
+from staff.utils.rule_utils import validate_proposed_cells
+from staff.utils.summary_utils import SummaryDelta
+from utils.change_stamp_utils import touch_change_stamp
+from utils.reference_data_utils import reference_registry
+
+
+def bulk_upsert_work_schedules(entries, batch_size=500, check_rules=False):
+    """
+    勤務シフトを (staff, date) のユニークキーで一括登録・更新する。
+
+    既存行を1クエリで読み込んで差分を判定し、変更のある行だけを
+    1トランザクション内の INSERT ... ON CONFLICT DO UPDATE で書き込む。
+    bulk_create は保存シグナルを発行しないため、期間集計の差分と一覧の変更スタンプもここで反映する。
+
+    Args:
+        entries (iterable): (staff_id, date, shift_id) のタプル列。同じキーは後勝ち。
+        batch_size (int): 1回の INSERT 文に含める最大行数
+        check_rules (bool): True の場合、書き込み前に勤務ルールを検証し、
+            違反があれば ShiftRuleViolationError を送出して何も書き込まない
+
+    Returns:
+        dict: created / updated / unchanged の件数
+    """
+    desired = {(staff_id, day): shift_id for staff_id, day, shift_id in entries}
+    summary = {"created": 0, "updated": 0, "unchanged": 0}
+    if not desired:
+        return summary
+
+    staff_ids = {staff_id for staff_id, _ in desired}
+    dates = [day for _, day in desired]
+    shifts = reference_registry.snapshot(ShiftType).by_id
+
+    with transaction.atomic():
+        if check_rules:
+            validate_proposed_cells(desired)
+
+        existing = {
+            (staff_id, day): shift_id
+            for staff_id, day, shift_id in WorkSchedule.objects.filter(
+                staff_id__in=staff_ids, date__range=(min(dates), max(dates))
+            ).values_list("staff_id", "date", "shift_id")
+        }
+
+        to_write = []
+        delta = SummaryDelta()
+        for (staff_id, day), shift_id in desired.items():
+            current = existing.get((staff_id, day))
+            if current == shift_id:
+                summary["unchanged"] += 1
+                continue
+            summary["updated" if current is not None else "created"] += 1
+            delta.change(staff_id, day, current, shift_id)
+            to_write.append(
+                WorkSchedule(
+                    staff_id=staff_id,
+                    date=day,
+                    shift_id=shift_id,
+                    work_minutes=shifts[shift_id].work_minutes,
+                )
+            )
+
+        WorkSchedule.objects.bulk_create(
+            to_write,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=["staff", "date"],
+            update_fields=["shift", "work_minutes"],
+        )
+        delta.apply()
+        if to_write:
+            touch_change_stamp(WorkSchedule)
+
+    return summary
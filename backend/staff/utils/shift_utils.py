@@ -1,5 +1,133 @@
 ﻿from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+
 from staff.models import Staff, ShiftType, WorkSchedule
+from staff.utils.schedule_utils import bulk_upsert_work_schedules
+from utils.reference_data_utils import reference_registry
+
+# 起点シフトコード → 連続して割り当てるシフトコード列
+# settings.SHIFT_EXPANSION_PATTERNS で上書き・追加できる
+DEFAULT_SHIFT_PATTERNS = {
+    "夜": ["夜", "明", "休"],
+}
+
+# 既存シフトとの衝突時の扱い
+ON_COLLISION_CHOICES = ("overwrite", "skip", "abort")
+
+
+class ShiftCollisionError(Exception):
+    """on_collision="abort" で既存シフトとの衝突が見つかった場合に送出される例外"""
+
+    def __init__(self, collisions):
+        self.collisions = collisions
+        super().__init__(f"{len(collisions)}件のシフトが既存の勤務と衝突しています。")
+
+
+def get_shift_patterns():
+    """設定を反映した展開パターン辞書を返す"""
+    patterns = dict(DEFAULT_SHIFT_PATTERNS)
+    patterns.update(getattr(settings, "SHIFT_EXPANSION_PATTERNS", {}))
+    return patterns
+
+
+def expand_shift_patterns(requests, on_collision="overwrite", check_rules=False):
+    """
+    複数の (スタッフ, 開始日, 起点シフトコード) を連続シフトに展開し、
+    1トランザクションで一括登録する。
+
+    例：夜 → 夜・明・休 の3日分
+
+    引数:
+        requests (iterable): (staff_id, start_date, code) のタプル列
+        on_collision (str): 既存シフトと衝突した場合の扱い
+            - "overwrite": 上書きする（従来の assign_night_shift と同じ）
+            - "skip": 衝突したセルだけ書き込まない
+            - "abort": 何も書き込まずに ShiftCollisionError を送出する
+        check_rules (bool): True の場合、書き込み前に勤務ルールを検証する
+
+    戻り値:
+        dict: results（セル毎の登録結果）、collisions（衝突一覧）、summary（件数）
+    """
+    if on_collision not in ON_COLLISION_CHOICES:
+        raise ValueError(f"on_collisionは {ON_COLLISION_CHOICES} のいずれかです")
+
+    patterns = get_shift_patterns()
+    requests = list(requests)
+
+    unknown = {code for _, _, code in requests if code not in patterns}
+    if unknown:
+        raise ValueError(f"展開パターンが未定義のシフトコード: {sorted(unknown)}")
+
+    # 必要なシフト種類を参照データキャッシュから取得
+    codes = {c for _, _, code in requests for c in patterns[code]}
+    shifts = reference_registry.snapshot(ShiftType).by_code
+    shift_map = {code: shifts[code].id for code in codes if code in shifts}
+    missing = codes - shift_map.keys()
+    if missing:
+        raise ShiftType.DoesNotExist(f"シフト種類が存在しません: {sorted(missing)}")
+
+    # 展開後のセル（同じセルは後の依頼が優先）
+    cells = {}
+    for staff_id, start_date, code in requests:
+        for offset, cell_code in enumerate(patterns[code]):
+            cells[(staff_id, start_date + timedelta(days=offset))] = cell_code
+
+    staff_ids = {staff_id for staff_id, _ in cells}
+    dates = [day for _, day in cells]
+
+    with transaction.atomic():
+        existing = {}
+        if cells:
+            existing = {
+                (staff_id, day): code
+                for staff_id, day, code in WorkSchedule.objects.select_for_update()
+                .filter(staff_id__in=staff_ids, date__range=(min(dates), max(dates)))
+                .values_list("staff_id", "date", "shift__code")
+            }
+
+        collisions = [
+            {
+                "staff_id": staff_id,
+                "date": day,
+                "existing": existing[(staff_id, day)],
+                "requested": code,
+            }
+            for (staff_id, day), code in sorted(cells.items())
+            if (staff_id, day) in existing and existing[(staff_id, day)] != code
+        ]
+        if collisions and on_collision == "abort":
+            raise ShiftCollisionError(collisions)
+
+        skipped = (
+            {(c["staff_id"], c["date"]) for c in collisions}
+            if on_collision == "skip"
+            else set()
+        )
+        to_write = {key: code for key, code in cells.items() if key not in skipped}
+
+        summary = bulk_upsert_work_schedules(
+            [
+                (staff_id, day, shift_map[code])
+                for (staff_id, day), code in to_write.items()
+            ],
+            check_rules=check_rules,
+        )
+
+    results = [
+        {
+            "staff_id": staff_id,
+            "date": day,
+            "shift": code,
+            "created": (staff_id, day) not in existing,
+            "skipped": (staff_id, day) in skipped,
+        }
+        for (staff_id, day), code in sorted(cells.items())
+    ]
+    summary["skipped"] = len(skipped)
+
+    return {"results": results, "collisions": collisions, "summary": summary}
 
 
 def assign_night_shift(staff_id, base_date):
@@ -13,29 +141,11 @@ def assign_night_shift(staff_id, base_date):
     戻り値:
         list(dict): 登録結果リスト（各日にちとシフト種別、作成有無）
     """
-    staff = Staff.objects.get(id=staff_id)
-
-    # 「夜」「明」「休」シフトの取得
-    shift_map = {
-        "夜": ShiftType.objects.get(code="夜"),
-        "明": ShiftType.objects.get(code="明"),
-        "休": ShiftType.objects.get(code="休"),
-    }
-
-    results = []
-    for offset, shift_code in enumerate(["夜", "明", "休"]):
-        target_date = base_date + timedelta(days=offset)
-        obj, created = WorkSchedule.objects.update_or_create(
-            staff=staff,
-            date=target_date,
-            defaults={"shift": shift_map[shift_code]},
-        )
-        results.append(
-            {
-                "date": target_date,
-                "shift": shift_code,
-                "created": created,
-            }
-        )
+    if not Staff.objects.filter(id=staff_id).exists():
+        raise Staff.DoesNotExist(f"スタッフが存在しません: {staff_id}")
 
-    return results
+    expanded = expand_shift_patterns([(staff_id, base_date, "夜")])
+    return [
+        {"date": r["date"], "shift": r["shift"], "created": r["created"]}
+        for r in expanded["results"]
+    ]
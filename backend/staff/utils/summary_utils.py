@@ -0,0 +1,193 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from staff.models import ShiftType, StaffPeriodSummary, WorkSchedule
+from utils.date_utils import get_shift_period_range
+from utils.model_utils import bulk_increment
+from utils.reference_data_utils import reference_registry
+
+NIGHT_SHIFT_CODE = "夜"
+PAID_LEAVE_CODE = "有"
+
+SUMMARY_FIELDS = ("work_minutes", "night_count", "paid_leave_count")
+
+
+def schedule_contribution(shift_id, shifts=None):
+    """
+    勤務シフト1件が期間集計に与える値を返す。
+
+    Args:
+        shift_id (int): シフト種類ID
+        shifts (dict, optional): ID → ShiftType の辞書（省略時は参照データキャッシュ）
+
+    Returns:
+        dict: work_minutes / night_count / paid_leave_count
+    """
+    if shifts is None:
+        shifts = reference_registry.snapshot(ShiftType).by_id
+    shift = shifts[shift_id]
+    return {
+        "work_minutes": shift.work_minutes,
+        "night_count": int(shift.code == NIGHT_SHIFT_CODE),
+        "paid_leave_count": int(shift.code == PAID_LEAVE_CODE),
+    }
+
+
+class SummaryDelta:
+    """
+    (スタッフ, 期間開始日) 毎の集計差分を貯めておき、まとめて反映するためのクラス。
+    """
+
+    def __init__(self):
+        self.shifts = reference_registry.snapshot(ShiftType).by_id
+        self.deltas = defaultdict(lambda: dict.fromkeys(SUMMARY_FIELDS, 0))
+        # 直前に引いた集計期間（同じ期間の行が続く場合は期間表を引き直さない）
+        self._period = None
+
+    def period_start_of(self, day):
+        """指定日が属する集計期間の開始日を返す"""
+        if self._period is None or not self._period[0] <= day < self._period[1]:
+            self._period = get_shift_period_range(day)
+        return self._period[0]
+
+    def add(self, staff_id, day, shift_id, sign=1):
+        """勤務シフト1件分の値を sign（+1: 追加, -1: 削除）倍して加算する"""
+        day = WorkSchedule._meta.get_field("date").to_python(day)
+        delta = self.deltas[(staff_id, self.period_start_of(day))]
+        for field, value in schedule_contribution(shift_id, self.shifts).items():
+            delta[field] += sign * value
+
+    def change(self, staff_id, day, old_shift_id, new_shift_id):
+        """同じセルのシフトが変わった場合の差分を加算する"""
+        if old_shift_id is not None:
+            self.add(staff_id, day, old_shift_id, sign=-1)
+        if new_shift_id is not None:
+            self.add(staff_id, day, new_shift_id, sign=1)
+
+    def apply(self, create_missing=True):
+        """
+        貯めた差分を期間集計テーブルに反映する。
+
+        1回の INSERT ... ON CONFLICT DO UPDATE SET 列 = 列 + EXCLUDED.列 で
+        データベース側で加算するため、同じ (スタッフ, 期間) にまだ行が無い状態で
+        同時に反映しても差分は失われない。
+
+        Args:
+            create_missing (bool): 集計行が無い場合に作成するか。
+                削除時は False にし、存在しない行は作らない。
+        """
+        deltas = {
+            key: delta for key, delta in self.deltas.items() if any(delta.values())
+        }
+        if deltas and not create_missing:
+            existing = set(
+                StaffPeriodSummary.objects.filter(
+                    staff_id__in={staff_id for staff_id, _ in deltas},
+                    period_start__in={period_start for _, period_start in deltas},
+                ).values_list("staff_id", "period_start")
+            )
+            deltas = {key: delta for key, delta in deltas.items() if key in existing}
+
+        bulk_increment(StaffPeriodSummary, ["staff", "period_start"], deltas)
+        self.deltas.clear()
+
+
+def iter_period_starts(start_date, end_date):
+    """start_date〜end_date（終了日を含む）にかかる集計期間の開始日を順に返す"""
+    period_start, period_end = get_shift_period_range(start_date)
+    while period_start <= end_date:
+        yield period_start
+        period_start, period_end = get_shift_period_range(period_end)
+
+
+def compute_period_summaries(period_start, staff_ids=None):
+    """
+    勤務シフトから期間集計を計算し直す（1期間1クエリ）。
+
+    Returns:
+        dict: staff_id → {work_minutes, night_count, paid_leave_count}
+    """
+    _, period_end = get_shift_period_range(period_start)
+    qs = WorkSchedule.objects.filter(date__gte=period_start, date__lt=period_end)
+    if staff_ids is not None:
+        qs = qs.filter(staff_id__in=staff_ids)
+
+    rows = qs.values("staff_id").annotate(
+        work_minutes=Sum("work_minutes"),
+        night_count=Count("id", filter=Q(shift__code=NIGHT_SHIFT_CODE)),
+        paid_leave_count=Count("id", filter=Q(shift__code=PAID_LEAVE_CODE)),
+    )
+    return {row.pop("staff_id"): row for row in rows}
+
+
+def rebuild_staff_period_summaries(start_date, end_date, staff_ids=None):
+    """
+    指定範囲にかかる期間の集計行を作り直す。
+
+    Returns:
+        int: 作成した集計行の数
+    """
+    created = 0
+    with transaction.atomic():
+        for period_start in iter_period_starts(start_date, end_date):
+            stale = StaffPeriodSummary.objects.filter(period_start=period_start)
+            if staff_ids is not None:
+                stale = stale.filter(staff_id__in=staff_ids)
+            stale.delete()
+
+            rows = [
+                StaffPeriodSummary(staff_id=staff_id, period_start=period_start, **values)
+                for staff_id, values in compute_period_summaries(
+                    period_start, staff_ids
+                ).items()
+            ]
+            StaffPeriodSummary.objects.bulk_create(rows)
+            created += len(rows)
+    return created
+
+
+def verify_staff_period_summaries(start_date, end_date):
+    """
+    保存済みの集計と勤務シフトからの再計算結果を比較する。
+
+    Returns:
+        list(dict): 不一致の一覧（staff_id, period_start, stored, expected）
+    """
+    zero = dict.fromkeys(SUMMARY_FIELDS, 0)
+    mismatches = []
+    for period_start in iter_period_starts(start_date, end_date):
+        expected = compute_period_summaries(period_start)
+        stored = {
+            row.pop("staff_id"): row
+            for row in StaffPeriodSummary.objects.filter(
+                period_start=period_start
+            ).values("staff_id", *SUMMARY_FIELDS)
+        }
+        for staff_id in expected.keys() | stored.keys():
+            want = expected.get(staff_id, zero)
+            have = stored.get(staff_id, zero)
+            if want != have:
+                mismatches.append(
+                    {
+                        "staff_id": staff_id,
+                        "period_start": period_start,
+                        "stored": have,
+                        "expected": want,
+                    }
+                )
+    return mismatches
+
+
+def rebuild_summaries_for_shift(shift):
+    """
+    シフト種類の実働時間・コードが変わった場合に、
+    そのシフトを含む期間の集計を作り直す。
+    """
+    span = WorkSchedule.objects.filter(shift=shift).values_list("date", flat=True)
+    first = span.order_by("date").first()
+    if first is None:
+        return
+    last = span.order_by("-date").first()
+    rebuild_staff_period_summaries(first, last)
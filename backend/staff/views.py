@@ -1,4 +1,5 @@
 from datetime import datetime, timedelta
+from io import TextIOWrapper
 from django.shortcuts import get_object_or_404
 from rest_framework import status
 from rest_framework.decorators import api_view
@@ -7,15 +8,61 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from drf_spectacular.utils import extend_schema, OpenApiResponse
 
-from .models import ShiftType, Staff, Role, WorkSchedule
+from .models import (
+    ShiftType,
+    Staff,
+    Role,
+    WorkSchedule,
+    StaffPeriodSummary,
+    ShiftPeriod,
+    RosterDraft,
+)
 from .serializers import (
     ShiftTypeSerializer,
     StaffSerializer,
     RoleSerializer,
     WorkScheduleSerializer,
+    WorkScheduleListQuerySerializer,
+    WorkScheduleGridSerializer,
+    ShiftExpansionSerializer,
+    StaffPeriodSummarySerializer,
+    ScheduleCalendarQuerySerializer,
+    CoverageQuerySerializer,
+    RosterGenerateSerializer,
+    RosterDraftSerializer,
+    ScheduleCopyForwardSerializer,
+    ShiftPeriodSerializer,
+    ShiftPeriodQuerySerializer,
 )
 from utils.api_response_utils import api_response
-from staff.utils.shift_utils import assign_night_shift
+from utils.change_stamp_utils import conditional_on_change_stamps
+from utils.import_utils import CsvImportSerializer, check_encoding
+from utils.export_utils import (
+    EXPORT_CHUNK_SIZE,
+    ExportQuerySerializer,
+    filter_date_range,
+    streaming_export_response,
+)
+from utils.date_utils import get_shift_period_range
+from utils.pagination_utils import InvalidPageParam, keyset_paginate, parse_limit
+from staff.utils.shift_utils import (
+    ShiftCollisionError,
+    assign_night_shift,
+    expand_shift_patterns,
+)
+from staff.utils.period_utils import override_shift_period
+from staff.utils.report_utils import monthly_work_hours_report
+from staff.utils.schedule_utils import bulk_upsert_work_schedules
+from staff.utils.calendar_utils import build_schedule_matrix
+from staff.utils.copy_utils import copy_forward_schedules
+from staff.utils.coverage_utils import build_coverage_matrix
+from staff.utils.import_utils import import_work_schedule_csv
+from staff.utils.rule_utils import ShiftRuleViolationError, validate_period
+from staff.utils.roster_utils import (
+    RosterError,
+    generate_roster_draft,
+    publish_roster_draft,
+)
 
 
 # ================================================================
@@ -313,15 +360,54 @@ class WorkScheduleListCreateView(APIView):
     model = WorkSchedule
     serializer_class = WorkScheduleSerializer
 
+    def get_queryset(self, params):
+        """
+        クエリパラメータで絞り込んだ勤務シフトを返す。
+        スタッフ・職種・シフト種類は JOIN で同時に取得する。
+        """
+        qs = self.model.objects.select_related("staff__role", "shift")
+        if "date_from" in params:
+            qs = qs.filter(date__gte=params["date_from"])
+        if "date_to" in params:
+            qs = qs.filter(date__lte=params["date_to"])
+        if "staff_id" in params:
+            qs = qs.filter(staff_id=params["staff_id"])
+        if "shift_code" in params:
+            qs = qs.filter(shift__code=params["shift_code"])
+        return qs
+
     @extend_schema(
         operation_id="WorkScheduleList",
         summary="勤務シフト一覧取得",
+        description="日付範囲・スタッフ・シフトコードで絞り込み、(日付, ID) 順のカーソルでページングする。",
         tags=["スタッフ管理"],
-        responses={200: OpenApiResponse(description="一覧取得成功")},
+        parameters=[WorkScheduleListQuerySerializer],
+        responses={
+            200: OpenApiResponse(description="一覧取得成功"),
+            304: OpenApiResponse(description="前回取得時から変更なし（If-None-Match / If-Modified-Since）"),
+            400: OpenApiResponse(description="クエリパラメータエラー"),
+        },
     )
+    @conditional_on_change_stamps(WorkSchedule, Staff, Role, ShiftType)
     def get(self, request):
-        ser = self.serializer_class(self.model.objects.all(), many=True)
-        return api_response(data=ser.data)
+        query = WorkScheduleListQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return api_response(
+                code=400, message="バリデーションエラー", data=query.errors
+            )
+        params = query.validated_data
+
+        try:
+            rows, next_cursor = keyset_paginate(
+                self.get_queryset(params),
+                cursor=params.get("cursor"),
+                limit=parse_limit(params.get("limit")),
+            )
+        except InvalidPageParam as e:
+            return api_response(code=400, message=str(e))
+
+        ser = self.serializer_class(rows, many=True)
+        return api_response(data={"results": ser.data, "next_cursor": next_cursor})
 
     @extend_schema(
         operation_id="WorkScheduleCreate",
@@ -355,6 +441,227 @@ class WorkScheduleListCreateView(APIView):
         return api_response(code=400, message="バリデーションエラー", data=ser.errors)
 
 
+class WorkScheduleBulkUpsertView(APIView):
+    """
+    勤務シフト一括登録（スタッフ × 日付のグリッド）
+    """
+
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    serializer_class = WorkScheduleGridSerializer
+
+    @extend_schema(
+        operation_id="WorkScheduleBulkUpsert",
+        summary="勤務シフト一括登録・更新",
+        description="月間のシフト表を1リクエストで検証し、1トランザクションで登録・更新する。",
+        tags=["スタッフ管理"],
+        request=WorkScheduleGridSerializer,
+        responses={
+            200: OpenApiResponse(description="一括登録成功"),
+            400: OpenApiResponse(description="バリデーションエラー"),
+        },
+    )
+    def post(self, request):
+        ser = self.serializer_class(data=request.data)
+        if not ser.is_valid():
+            return api_response(code=400, message="バリデーションエラー", data=ser.errors)
+
+        try:
+            summary = bulk_upsert_work_schedules(
+                ser.validated_data["entries"],
+                check_rules=ser.validated_data["check_rules"],
+            )
+        except ShiftRuleViolationError as e:
+            return api_response(code=400, message=str(e), data=e.violations)
+        return api_response(message="勤務シフトを一括登録しました。", data=summary)
+
+
+class ShiftExpansionView(APIView):
+    """
+    連続シフト（夜→明→休 など）の一括展開登録
+    """
+
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    serializer_class = ShiftExpansionSerializer
+
+    @extend_schema(
+        operation_id="ShiftExpansionCreate",
+        summary="連続シフトの一括展開登録",
+        description="複数スタッフ・複数日の夜勤などを展開し、既存シフトとの衝突を検出した上で1トランザクションで登録する。",
+        tags=["スタッフ管理"],
+        request=ShiftExpansionSerializer,
+        responses={
+            200: OpenApiResponse(description="展開登録成功"),
+            400: OpenApiResponse(description="バリデーションエラー"),
+            409: OpenApiResponse(description="既存シフトと衝突（abort 指定時）"),
+        },
+    )
+    def post(self, request):
+        ser = self.serializer_class(data=request.data)
+        if not ser.is_valid():
+            return api_response(code=400, message="バリデーションエラー", data=ser.errors)
+
+        try:
+            result = expand_shift_patterns(
+                [
+                    (item["staff_id"], item["date"], item["code"])
+                    for item in ser.validated_data["requests"]
+                ],
+                on_collision=ser.validated_data["on_collision"],
+                check_rules=ser.validated_data["check_rules"],
+            )
+        except ShiftCollisionError as e:
+            return api_response(code=409, message=str(e), data=e.collisions)
+        except ShiftRuleViolationError as e:
+            return api_response(code=400, message=str(e), data=e.violations)
+        except ShiftType.DoesNotExist as e:
+            return api_response(code=400, message=str(e))
+
+        return api_response(message="連続シフトを登録しました。", data=result)
+
+
+class WorkScheduleCopyForwardView(APIView):
+    """
+    前期間の勤務シフトをひな形としてコピー
+    """
+
+    permission_classes = [IsAdminUser]
+    serializer_class = ScheduleCopyForwardSerializer
+
+    @extend_schema(
+        operation_id="WorkScheduleCopyForward",
+        summary="前期間の勤務シフトのコピー",
+        description="コピー元期間の勤務シフト（食事の要否を含む）を、コピー先期間へ1回の INSERT ... SELECT でコピーする。曜日合わせ・既存行の上書き／スキップを指定できる。",
+        tags=["スタッフ管理"],
+        request=ScheduleCopyForwardSerializer,
+        responses={
+            200: OpenApiResponse(description="コピー成功"),
+            400: OpenApiResponse(description="バリデーションエラー"),
+        },
+    )
+    def post(self, request):
+        ser = self.serializer_class(data=request.data)
+        if not ser.is_valid():
+            return api_response(code=400, message="バリデーションエラー", data=ser.errors)
+        params = ser.validated_data
+
+        summary = copy_forward_schedules(
+            params["source_date"],
+            params["target_date"],
+            align_weekday=params["align_weekday"],
+            on_conflict=params["on_conflict"],
+            staff_ids=params.get("staff_ids"),
+        )
+        return api_response(message="勤務シフトをコピーしました。", data=summary)
+
+
+class WorkScheduleCalendarView(APIView):
+    """
+    勤務シフトのカレンダー表示用データ（スタッフ × 日付の行列）
+    """
+
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    @extend_schema(
+        operation_id="WorkScheduleCalendar",
+        summary="勤務カレンダー（行列形式）取得",
+        description="スタッフID・日付の並びと、シフト種類IDの2次元配列を返す。シフト定義は1回だけ添付する。",
+        tags=["スタッフ管理"],
+        parameters=[ScheduleCalendarQuerySerializer],
+        responses={
+            200: OpenApiResponse(description="取得成功"),
+            400: OpenApiResponse(description="クエリパラメータエラー"),
+        },
+    )
+    def get(self, request):
+        query = ScheduleCalendarQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return api_response(
+                code=400, message="バリデーションエラー", data=query.errors
+            )
+        params = query.validated_data
+
+        if "date_from" in params:
+            start_date, end_date = params["date_from"], params["date_to"]
+        else:
+            start_date, period_end = get_shift_period_range(params.get("date"))
+            end_date = period_end - timedelta(days=1)
+
+        return api_response(data=build_schedule_matrix(start_date, end_date))
+
+
+class WorkScheduleCoverageView(APIView):
+    """
+    時間帯別の在席人数（スロット × 日付のヒートマップ）と人員不足の時間帯
+    """
+
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    @extend_schema(
+        operation_id="WorkScheduleCoverage",
+        summary="人員配置ヒートマップ取得",
+        description="勤務シフトから時間帯スロット × 日付の在席人数を計算し、必要人数（min_staff）を下回る時間帯を返す。休憩は勤務時間の中央に置く。",
+        tags=["スタッフ管理"],
+        parameters=[CoverageQuerySerializer],
+        responses={
+            200: OpenApiResponse(description="取得成功"),
+            400: OpenApiResponse(description="クエリパラメータエラー"),
+        },
+    )
+    def get(self, request):
+        query = CoverageQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return api_response(
+                code=400, message="バリデーションエラー", data=query.errors
+            )
+        params = query.validated_data
+
+        if "date_from" in params:
+            start_date, end_date = params["date_from"], params["date_to"]
+        else:
+            start_date, period_end = get_shift_period_range(params.get("date"))
+            end_date = period_end - timedelta(days=1)
+
+        data = build_coverage_matrix(
+            start_date,
+            end_date,
+            slot_minutes=params["slot_minutes"],
+            min_staff=params["min_staff"],
+            role_id=params.get("role"),
+        )
+        return api_response(data=data)
+
+
+class WorkScheduleRuleCheckView(APIView):
+    """
+    集計期間の勤務ルール検証（休息時間・連続勤務・夜勤明け・実働時間上限）
+    """
+
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    @extend_schema(
+        operation_id="WorkScheduleRuleCheck",
+        summary="勤務ルールの一括検証",
+        description="指定日（date）が属する集計期間の全スタッフの勤務ルール違反を返す。",
+        tags=["スタッフ管理"],
+        responses={
+            200: OpenApiResponse(description="検証成功"),
+            400: OpenApiResponse(description="日付形式エラー"),
+        },
+    )
+    def get(self, request):
+        target_date = request.query_params.get("date")
+        if target_date:
+            try:
+                target_date = datetime.strptime(target_date, "%Y-%m-%d").date()
+            except ValueError:
+                return api_response(
+                    code=400, message="dateはYYYY-MM-DD形式で指定してください"
+                )
+
+        result = validate_period(target_date)
+        return api_response(message="検証成功", data=result)
+
+
 class WorkScheduleDetailView(APIView):
     """
     勤務シフト詳細・更新・削除
@@ -394,11 +701,10 @@ class WorkScheduleDetailView(APIView):
         schedule = self.get_object(pk)
         ser = self.serializer_class(schedule, data=request.data)
         if ser.is_valid():
-            shift_id = ser.validated_data.get("shift_id")
-            shift = ShiftType.objects.get(id=shift_id)
+            shift = ser.validated_data.get("shift")
             if shift.code == "夜":
                 results = assign_night_shift(
-                    shift=ser.validated_data.get("shift"),
+                    staff_id=ser.validated_data.get("staff").id,
                     base_date=ser.validated_data.get("date"),
                 )
                 return api_response(
@@ -421,3 +727,362 @@ class WorkScheduleDetailView(APIView):
     def delete(self, request, pk):
         self.get_object(pk).delete()
         return api_response(message="削除成功", code=204)
+
+
+# ================================================================
+# 集計レポート
+# ================================================================
+class StaffWorkHoursReportView(APIView):
+    """
+    全スタッフの期間内（15日〜翌月15日）実働時間レポート
+    """
+
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(
+        operation_id="StaffWorkHoursReport",
+        summary="全スタッフの実働時間集計",
+        description="指定日（date）または集計期間ID（period_id）の期間の実働時間を全スタッフ分まとめて返す。",
+        tags=["スタッフ管理"],
+        responses={
+            200: OpenApiResponse(description="集計成功"),
+            400: OpenApiResponse(description="日付形式エラー"),
+            404: OpenApiResponse(description="集計期間が存在しない"),
+        },
+    )
+    def get(self, request):
+        target_date = request.query_params.get("date")
+        if target_date:
+            try:
+                target_date = datetime.strptime(target_date, "%Y-%m-%d").date()
+            except ValueError:
+                return api_response(
+                    code=400, message="dateはYYYY-MM-DD形式で指定してください"
+                )
+
+        period_id = request.query_params.get("period_id")
+        if period_id is not None:
+            if not period_id.isdigit():
+                return api_response(code=400, message="period_idは数値で指定してください")
+            period_id = get_object_or_404(ShiftPeriod, pk=int(period_id)).pk
+
+        report = monthly_work_hours_report(target_date, period_id=period_id)
+        return api_response(message="集計成功", data=report)
+
+
+class ShiftPeriodListView(APIView):
+    """
+    集計期間（期間表）の一覧取得
+    """
+
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(
+        operation_id="ShiftPeriodList",
+        summary="集計期間一覧取得",
+        description="期間表の集計期間を開始日順に返す。date_from / date_to で範囲にかかる期間に絞り込める。",
+        tags=["スタッフ管理"],
+        parameters=[ShiftPeriodQuerySerializer],
+        responses={
+            200: OpenApiResponse(description="取得成功"),
+            400: OpenApiResponse(description="バリデーションエラー"),
+        },
+    )
+    def get(self, request):
+        query = ShiftPeriodQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return api_response(code=400, message="バリデーションエラー", data=query.errors)
+        params = query.validated_data
+
+        periods = ShiftPeriod.objects.all()
+        if params.get("date_from"):
+            periods = periods.filter(end_date__gt=params["date_from"])
+        if params.get("date_to"):
+            periods = periods.filter(start_date__lte=params["date_to"])
+        ser = ShiftPeriodSerializer(periods, many=True)
+        return api_response(data=ser.data)
+
+
+class ShiftPeriodDetailView(APIView):
+    """
+    集計期間の個別変更（年末年始の締めの前倒しなど）
+    """
+
+    permission_classes = [IsAdminUser]
+    serializer_class = ShiftPeriodSerializer
+
+    @extend_schema(
+        operation_id="ShiftPeriodOverride",
+        summary="集計期間の個別変更",
+        description="集計期間の開始日・終了日を変更する。隣の期間も合わせて動かし、影響する期間集計を作り直す。",
+        tags=["スタッフ管理"],
+        request=ShiftPeriodSerializer,
+        responses={
+            200: OpenApiResponse(description="更新成功"),
+            400: OpenApiResponse(description="バリデーションエラー"),
+            404: OpenApiResponse(description="存在しない"),
+        },
+    )
+    def patch(self, request, pk):
+        period = get_object_or_404(ShiftPeriod, pk=pk)
+        ser = self.serializer_class(period, data=request.data, partial=True)
+        if not ser.is_valid():
+            return api_response(code=400, message="バリデーションエラー", data=ser.errors)
+
+        try:
+            period = override_shift_period(
+                period,
+                ser.validated_data.get("start_date", period.start_date),
+                ser.validated_data.get("end_date", period.end_date),
+            )
+        except ValueError as e:
+            return api_response(code=400, message=str(e))
+        return api_response(
+            message="集計期間を更新しました。", data=self.serializer_class(period).data
+        )
+
+
+class StaffPeriodSummaryView(APIView):
+    """
+    スタッフ期間集計（実働時間・夜勤回数・有給回数）の取得
+    """
+
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(
+        operation_id="StaffPeriodSummary",
+        summary="スタッフ期間集計の取得",
+        description="指定日（date）が属する集計期間の、差分更新済みの集計値を返す。",
+        tags=["スタッフ管理"],
+        responses={
+            200: OpenApiResponse(description="取得成功"),
+            400: OpenApiResponse(description="日付形式エラー"),
+        },
+    )
+    def get(self, request):
+        target_date = request.query_params.get("date")
+        if target_date:
+            try:
+                target_date = datetime.strptime(target_date, "%Y-%m-%d").date()
+            except ValueError:
+                return api_response(
+                    code=400, message="dateはYYYY-MM-DD形式で指定してください"
+                )
+
+        start_date, end_date = get_shift_period_range(target_date)
+        summaries = StaffPeriodSummary.objects.filter(
+            period_start=start_date
+        ).select_related("staff")
+        ser = StaffPeriodSummarySerializer(summaries, many=True)
+        return api_response(
+            data={
+                "period": {"start": start_date, "end": end_date},
+                "results": ser.data,
+            }
+        )
+
+
+class RosterDraftCreateView(APIView):
+    """
+    勤務表の自動作成（下書きとして保存）
+    """
+
+    permission_classes = [IsAdminUser]
+    serializer_class = RosterGenerateSerializer
+
+    @extend_schema(
+        operation_id="RosterDraftCreate",
+        summary="勤務表の自動作成",
+        description="必要人数・休み希望・夜勤パターン（夜→明→休）から集計期間の勤務表を作成し、下書きとして保存する。",
+        tags=["スタッフ管理"],
+        request=RosterGenerateSerializer,
+        responses={
+            201: RosterDraftSerializer,
+            400: OpenApiResponse(description="バリデーションエラー"),
+        },
+    )
+    def post(self, request):
+        ser = self.serializer_class(data=request.data)
+        if not ser.is_valid():
+            return api_response(code=400, message="バリデーションエラー", data=ser.errors)
+        params = ser.validated_data
+
+        try:
+            draft = generate_roster_draft(
+                params.get("date"),
+                params["requirements"],
+                leave_requests={
+                    (item["staff_id"], item["date"]): item["shift"]
+                    for item in params["leave_requests"]
+                },
+                staff_ids=params.get("staff_ids"),
+                seed=params.get("seed"),
+                time_limit=params["time_limit"],
+            )
+        except (RosterError, ShiftType.DoesNotExist) as e:
+            return api_response(code=400, message=str(e))
+
+        return api_response(
+            code=201,
+            message="勤務表の下書きを作成しました。",
+            data=RosterDraftSerializer(draft).data,
+        )
+
+
+class RosterDraftDetailView(APIView):
+    """
+    勤務表下書きの取得（スタッフ × 日付の行列）
+    """
+
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(
+        operation_id="RosterDraftRetrieve",
+        summary="勤務表下書きの取得",
+        description="下書きの作成結果と、勤務カレンダーと同じ行列形式のセルを返す。",
+        tags=["スタッフ管理"],
+        responses={
+            200: OpenApiResponse(description="取得成功"),
+            404: OpenApiResponse(description="下書きが存在しない"),
+        },
+    )
+    def get(self, request, pk):
+        draft = get_object_or_404(RosterDraft, pk=pk)
+        start_date, end_date = get_shift_period_range(draft.period_start)
+        data = RosterDraftSerializer(draft).data
+        data["matrix"] = build_schedule_matrix(
+            start_date, end_date - timedelta(days=1), cells=draft.entries.all()
+        )
+        return api_response(data=data)
+
+
+class RosterDraftPublishView(APIView):
+    """
+    勤務表下書きの公開（勤務シフトへの一括登録）
+    """
+
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(
+        operation_id="RosterDraftPublish",
+        summary="勤務表下書きの公開",
+        description="下書きのセルを勤務シフトへ1トランザクションで一括登録する。check_rules=true で登録前に勤務ルールを検証する。",
+        tags=["スタッフ管理"],
+        responses={
+            200: OpenApiResponse(description="公開成功"),
+            400: OpenApiResponse(description="勤務ルール違反"),
+            404: OpenApiResponse(description="下書きが存在しない"),
+            409: OpenApiResponse(description="公開済み"),
+        },
+    )
+    def post(self, request, pk):
+        draft = get_object_or_404(RosterDraft, pk=pk)
+        check_rules = str(request.data.get("check_rules", "")).lower() in ("1", "true")
+
+        try:
+            summary = publish_roster_draft(draft, check_rules=check_rules)
+        except RosterError as e:
+            return api_response(code=409, message=str(e))
+        except ShiftRuleViolationError as e:
+            return api_response(code=400, message=str(e), data=e.violations)
+
+        return api_response(message="勤務表を公開しました。", data=summary)
+
+
+class WorkScheduleExportView(APIView):
+    """
+    勤務シフトのエクスポート（CSV / XLSX をストリーミングで返す）
+    """
+
+    permission_classes = [IsAdminUser]
+    HEADER = [
+        "日付",
+        "スタッフID",
+        "氏名",
+        "シフトコード",
+        "実働時間(分)",
+        "備考",
+    ]
+
+    @extend_schema(
+        operation_id="WorkScheduleExport",
+        summary="勤務シフトのエクスポート",
+        description="期間（date_from〜date_to）の勤務シフトを1行ずつ読み出し、CSV / XLSX として逐次返す。",
+        tags=["スタッフ管理"],
+        parameters=[ExportQuerySerializer],
+        responses={
+            200: OpenApiResponse(description="ファイル（CSV / XLSX）"),
+            400: OpenApiResponse(description="クエリパラメータエラー"),
+        },
+    )
+    def get(self, request):
+        query = ExportQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return api_response(
+                code=400, message="バリデーションエラー", data=query.errors
+            )
+        params = query.validated_data
+
+        qs = filter_date_range(
+            WorkSchedule.objects.all(), params.get("date_from"), params.get("date_to")
+        )
+        rows = (
+            qs.order_by("date", "staff_id")
+            .values_list(
+                "date",
+                "staff_id",
+                "staff__name",
+                "shift__code",
+                "work_minutes",
+                "note",
+            )
+            .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        )
+        return streaming_export_response(
+            "work_schedules", self.HEADER, rows, params["file_format"]
+        )
+
+
+class WorkScheduleImportView(APIView):
+    """
+    勤務シフトの CSV 一括取り込み
+    """
+
+    permission_classes = [IsAdminUser]
+    serializer_class = CsvImportSerializer
+
+    @extend_schema(
+        operation_id="WorkScheduleImport",
+        summary="勤務シフトの CSV 一括取り込み",
+        description="CSVを1行ずつ読み込み、(スタッフ, 日付) のユニークキーで一定行数毎に一括登録・更新する。解釈できない行は行番号付きのエラーとして返し、他の行の登録は続ける。",
+        tags=["スタッフ管理"],
+        request={"multipart/form-data": CsvImportSerializer},
+        responses={
+            200: OpenApiResponse(description="取り込み完了（行毎のエラーを含む）"),
+            400: OpenApiResponse(description="バリデーションエラー"),
+        },
+    )
+    def post(self, request):
+        ser = self.serializer_class(data=request.data)
+        if not ser.is_valid():
+            return api_response(code=400, message="バリデーションエラー", data=ser.errors)
+        params = ser.validated_data
+
+        upload = params["file"].file
+        try:
+            # 途中のバッチまで登録されてから失敗しないよう、書き込む前に全体を確かめる
+            check_encoding(upload, params["encoding"])
+        except UnicodeDecodeError:
+            return api_response(
+                code=400, message="文字コードが正しくありません。encoding を確認してください。"
+            )
+
+        result = import_work_schedule_csv(
+            TextIOWrapper(upload, encoding=params["encoding"], newline=""),
+            batch_size=params["batch_size"],
+        )
+
+        return api_response(
+            message=f"{result['rows'] - result['error_count']}件を取り込みました（エラー{result['error_count']}件）。",
+            data=result,
+        )
@@ -0,0 +1,107 @@
+import functools
+import hashlib
+import time
+import uuid
+
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.connection import ConnectionProxy
+from django.utils.http import http_date, quote_etag
+
+STAMP_KEY = "changestamp:{label}"
+
+# 変更スタンプや参照データ・配膳表の版を置くキャッシュ（settings.CACHES の "stamps"）。
+# 管理コマンドなど別プロセスの書き込みもサーバーに伝わるよう、全プロセスで共有するものを使う
+STAMP_CACHE_ALIAS = "stamps"
+stamp_cache = ConnectionProxy(caches, STAMP_CACHE_ALIAS)
+
+
+def _new_stamp():
+    # Last-Modified は秒単位のため、時刻とは別に一意なトークンを持つ
+    return (uuid.uuid4().hex, int(time.time()))
+
+
+def touch_change_stamp(model):
+    """
+    コレクション（モデル）の変更スタンプを更新する。
+
+    コミット前に更新すると、他のリクエストが変更前のデータを
+    新しいスタンプで返してしまうため、コミット後に書き込む。
+    bulk_create / QuerySet.update() などシグナルが出ない書き込みの後にも呼ぶこと。
+    """
+    key = STAMP_KEY.format(label=model._meta.label)
+    transaction.on_commit(lambda: stamp_cache.set(key, _new_stamp(), None))
+
+
+def get_change_stamps(*models):
+    """
+    複数コレクションの変更スタンプを1回のキャッシュアクセスで取得する。
+    まだスタンプが無いコレクションには新しいスタンプを発行する。
+
+    Returns:
+        list(tuple): モデル毎の (トークン, 更新時刻のUNIX秒)
+    """
+    keys = [STAMP_KEY.format(label=model._meta.label) for model in models]
+    stamps = stamp_cache.get_many(keys)
+    for key in keys:
+        if key not in stamps:
+            stamp = _new_stamp()
+            # 他のプロセスが先に発行していれば、そちらを使う
+            stamps[key] = stamp if stamp_cache.add(key, stamp, None) else stamp_cache.get(key)
+    return [stamps[key] for key in keys]
+
+
+def get_collection_validators(*models, variant=""):
+    """
+    一覧レスポンスの ETag と Last-Modified を変更スタンプから求める（本体テーブルは読まない）。
+
+    Args:
+        models: 一覧の内容に影響するモデル（本体と、表示名などを引く関連モデル）
+        variant (str): 同じスタンプでも内容が変わる条件（利用者によるシリアライザーの違いなど）
+
+    Returns:
+        tuple: (ETag 文字列, 最終更新時刻のUNIX秒)
+    """
+    stamps = get_change_stamps(*models)
+    tokens = [token for token, _ in stamps] + [variant]
+    digest = hashlib.md5("|".join(tokens).encode()).hexdigest()
+    return quote_etag(digest), max(modified for _, modified in stamps)
+
+
+def conditional_on_change_stamps(*models, vary=None):
+    """
+    APIView の get() を条件付き GET に対応させるデコレーター。
+
+    If-None-Match / If-Modified-Since が現在の変更スタンプと一致すれば、
+    ビュー本体を実行せずに 304 を返す。200 の場合は ETag / Last-Modified を付ける。
+    ETag にはクエリ文字列を含むパスを含めるため、絞り込み条件やカーソルが違うページは
+    別の ETag になる。
+
+    Args:
+        models: 一覧の内容に影響するモデル
+        vary (callable, optional): (view, request) → 文字列。利用者などで内容が変わる場合に ETag に含める
+    """
+
+    def decorator(view_method):
+        @functools.wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            variant = request.get_full_path()
+            if vary:
+                variant += "|" + vary(self, request)
+            etag, last_modified = get_collection_validators(*models, variant=variant)
+            not_modified = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if not_modified is not None:
+                response = not_modified
+            else:
+                response = view_method(self, request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                response.headers.setdefault("ETag", etag)
+                response.headers.setdefault("Last-Modified", http_date(last_modified))
+            return response
+
+        return wrapper
+
+    return decorator
@@ -1,4 +1,5 @@
-﻿from django.utils.timezone import now
+﻿from django.conf import settings
+from django.utils.timezone import now
 from datetime import timedelta, date
 
 
@@ -11,15 +12,62 @@ def get_weekday_jp(date):
     return ["月", "火", "水", "木", "金", "土", "日"][date.weekday()]
 
 
-def get_shift_period_range(target_date=None):
+# シフト集計期間の暦（期間表）を引く関数。staff アプリの起動時に登録される
+_period_resolver = None
+
+
+def register_period_resolver(resolver):
     """
-    指定された日付が属する「シフト集計期間（15日〜翌月15日）」の
-    開始日と終了日を求める関数。
+    get_shift_period_range が使う期間表の参照関数を登録する。
+
+    Args:
+        resolver (callable): 日付 → (開始日, 終了日)。期間表に無い日付は None を返す
+    """
+    global _period_resolver
+    _period_resolver = resolver
+
 
-    例:
+def get_period_start_day():
+    """集計期間の開始日（締め日の翌日）を設定から取得する（既定は15日）"""
+    return getattr(settings, "SHIFT_PERIOD", {}).get("start_day", 15)
+
+
+def default_period_range(target_date, start_day=None):
+    """
+    締め日の設定だけから、指定日が属する集計期間の開始日と終了日を求める。
+
+    例（start_day=15）:
         - 2025年3月28日 → 開始日: 3月15日, 終了日: 4月15日
         - 2025年3月2日  → 開始日: 2月15日, 終了日: 3月15日
 
+    パラメータ:
+        target_date (datetime.date): 対象日
+        start_day (int, optional): 期間の開始日（1〜28。省略時は設定値）
+
+    戻り値:
+        tuple(datetime.date, datetime.date): (開始日, 終了日（この日を含まない）)
+    """
+    if start_day is None:
+        start_day = get_period_start_day()
+
+    year, month = target_date.year, target_date.month
+    if target_date.day < start_day:
+        # 開始日より前の場合：前月の開始日から
+        year, month = (year - 1, 12) if month == 1 else (year, month - 1)
+    start = date(year, month, start_day)
+    # 翌月の開始日を終了日とする（12月の場合は年を繰り上げて1月）
+    end = date(year + 1, 1, start_day) if month == 12 else date(year, month + 1, start_day)
+    return start, end
+
+
+def get_shift_period_range(target_date=None):
+    """
+    指定された日付が属する「シフト集計期間（既定は15日〜翌月15日）」の
+    開始日と終了日を求める関数。
+
+    期間表（staff.ShiftPeriod）に行があればその開始日・終了日を返し、
+    無い場合は締め日の設定から計算する。
+
     パラメータ:
         target_date (datetime.date): 対象日（省略時は今日の日付）
 
@@ -30,22 +78,8 @@ def get_shift_period_range(target_date=None):
         # 日付が指定されていない場合は、今日の日付を使用
         target_date = date.today()
 
-    if target_date.day >= 15:
-        # 15日以降の場合：今月15日を開始日、翌月15日を終了日とする
-        start = target_date.replace(day=15)
-        if target_date.month == 12:
-            # 12月の場合は年を繰り上げて1月
-            end = date(target_date.year + 1, 1, 15)
-        else:
-            end = date(target_date.year, target_date.month + 1, 15)
-    else:
-        # 15日未満の場合：前月15日を開始日、今月15日を終了日とする
-        if target_date.month == 1:
-            # 1月の場合は年を繰り下げて前の年の12月
-            start = date(target_date.year - 1, 12, 15)
-        else:
-            start = date(target_date.year, target_date.month - 1, 15)
-        end = target_date.replace(day=15)
-
-    return start, end
-
+    if _period_resolver is not None:
+        period = _period_resolver(target_date)
+        if period is not None:
+            return period
+    return default_period_range(target_date)
@@ -0,0 +1,206 @@
+import codecs
+import csv
+import io
+from datetime import datetime
+
+from django.db import DatabaseError
+from rest_framework import serializers
+
+# 1回の一括登録に含める行数
+IMPORT_BATCH_SIZE = 1000
+
+# レスポンスに含めるエラー行の上限（件数は error_count で全件返す）
+MAX_REPORTED_ERRORS = 1000
+
+TRUE_VALUES = {"1", "true", "yes", "y", "○", "◯", "有", "要"}
+FALSE_VALUES = {"", "0", "false", "no", "n", "×", "無", "不要"}
+
+# 受け付ける文字コード（他システムの出力は Shift_JIS のことが多い）
+IMPORT_ENCODINGS = ["utf-8-sig", "cp932"]
+
+# 文字コードの確認で1回に読む大きさ（バイト）
+ENCODING_CHECK_CHUNK_SIZE = 64 * 1024
+
+
+class ImportRowError(ValueError):
+    """CSV の1行が解釈できない場合に送出される例外（メッセージのリストを持つ）"""
+
+    def __init__(self, messages):
+        self.messages = messages if isinstance(messages, list) else [messages]
+        super().__init__("; ".join(self.messages))
+
+
+class CsvImportSerializer(serializers.Serializer):
+    """CSV 一括取り込みのアップロードを検証するシリアライザー"""
+
+    file = serializers.FileField(help_text="CSVファイル（1行目は見出し）")
+    encoding = serializers.ChoiceField(
+        choices=IMPORT_ENCODINGS, default="utf-8-sig", help_text="文字コード"
+    )
+    batch_size = serializers.IntegerField(
+        min_value=1,
+        max_value=10000,
+        default=IMPORT_BATCH_SIZE,
+        help_text="1回の一括登録に含める行数",
+    )
+
+
+def check_encoding(fileobj, encoding="utf-8-sig"):
+    """
+    バイナリのファイルを最後まで encoding で復号できるか確かめ、先頭に戻す。
+
+    取り込みは一定行数毎にコミットするため、途中の行で復号に失敗すると
+    それまでのバッチだけが登録されてしまう。最初の書き込みの前に呼ぶこと。
+    ファイル全体は読み込まず、一定の大きさ毎に復号する。
+
+    Raises:
+        UnicodeDecodeError: 復号できないバイト列がある場合
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    fileobj.seek(0)
+    while True:
+        chunk = fileobj.read(ENCODING_CHECK_CHUNK_SIZE)
+        if not chunk:
+            break
+        decoder.decode(chunk)
+    decoder.decode(b"", final=True)
+    fileobj.seek(0)
+
+
+def open_csv_stream(fileobj, encoding="utf-8-sig"):
+    """
+    アップロードファイル・ファイルオブジェクトを1行ずつ読む DictReader にする。
+    バイナリの場合は TextIOWrapper で包み、ファイル全体を読み込まない。
+    """
+    if isinstance(fileobj, io.TextIOBase):
+        stream = fileobj
+    else:
+        raw = getattr(fileobj, "file", fileobj)
+        stream = io.TextIOWrapper(raw, encoding=encoding, newline="")
+    return csv.DictReader(stream)
+
+
+def pick(row, *keys):
+    """別名のいずれかの列の値（前後の空白を除く）を返す。列が無ければ空文字"""
+    for key in keys:
+        value = row.get(key)
+        if value is not None:
+            return value.strip()
+    return ""
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value.replace("/", "-"), "%Y-%m-%d").date()
+    except ValueError:
+        raise ImportRowError(f"日付の形式が不正です: {value}")
+
+
+def parse_time(value):
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%H:%M").time()
+    except ValueError:
+        raise ImportRowError(f"時刻の形式が不正です: {value}")
+
+
+def parse_bool(value):
+    lowered = value.lower()
+    if lowered in TRUE_VALUES:
+        return True
+    if lowered in FALSE_VALUES:
+        return False
+    raise ImportRowError(f"真偽値の形式が不正です: {value}")
+
+
+def resolve(value, by_id, by_name, label):
+    """
+    ID（数字）または名前を事前に読み込んだ辞書で ID に解決する。
+
+    Args:
+        by_id (set): 存在する ID の集合
+        by_name (dict): 名前 → ID のリスト（同名が複数あれば曖昧としてエラー）
+    """
+    if not value:
+        raise ImportRowError(f"{label}が指定されていません")
+    if value.isdigit():
+        if int(value) not in by_id:
+            raise ImportRowError(f"{label}が存在しません: {value}")
+        return int(value)
+    ids = by_name.get(value, [])
+    if not ids:
+        raise ImportRowError(f"{label}が存在しません: {value}")
+    if len(ids) > 1:
+        raise ImportRowError(f"同名の{label}が複数あります。IDで指定してください: {value}")
+    return ids[0]
+
+
+def parse_fields(**parsers):
+    """
+    列毎のパーサー（引数なしの関数）を全て実行し、値の辞書を返す。
+    1つでも失敗した場合は、全列分のエラーメッセージをまとめて ImportRowError を送出する。
+    """
+    values, messages = {}, []
+    for name, parser in parsers.items():
+        try:
+            values[name] = parser()
+        except ImportRowError as e:
+            messages.extend(e.messages)
+    if messages:
+        raise ImportRowError(messages)
+    return values
+
+
+def run_csv_import(reader, parse_row, write_batch, batch_size=IMPORT_BATCH_SIZE):
+    """
+    CSV を1行ずつ解釈し、batch_size 行毎に一括登録する。
+
+    解釈できない行はエラーとして記録して読み飛ばし、同じバッチの他の行は登録する。
+    バッチの書き込み自体が失敗した場合は、そのバッチの行をエラーとして記録して続行する。
+
+    Args:
+        reader (iterable): 行（dict）のイテレーター
+        parse_row (callable): 行 → 登録用の値。解釈できない場合は ImportRowError
+        write_batch (callable): 値のリスト → created / updated / unchanged の件数辞書
+        batch_size (int): 1回の一括登録に含める行数
+
+    Returns:
+        dict: rows / created / updated / unchanged / error_count / errors
+    """
+    result = {"rows": 0, "created": 0, "updated": 0, "unchanged": 0, "error_count": 0}
+    errors = []
+
+    def add_error(line, messages):
+        result["error_count"] += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"line": line, "errors": messages})
+
+    def flush(batch):
+        if not batch:
+            return
+        try:
+            summary = write_batch([value for _, value in batch])
+        except DatabaseError as e:
+            for line, _ in batch:
+                add_error(line, [f"登録に失敗しました: {e}"])
+            return
+        for key in ("created", "updated", "unchanged"):
+            result[key] += summary[key]
+
+    batch = []
+    # 1行目は見出しのため、データ行は2行目から数える
+    for line, row in enumerate(reader, start=2):
+        result["rows"] += 1
+        try:
+            batch.append((line, parse_row(row)))
+        except ImportRowError as e:
+            add_error(line, e.messages)
+            continue
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    flush(batch)
+
+    result["errors"] = errors
+    return result
@@ -1,4 +1,11 @@
-﻿from django.db import models
+﻿from django.db import IntegrityError, connection, models, transaction
+from django.db.models import F
+from django.dispatch import Signal
+
+# bulk_create や生の SQL など、保存シグナルを出さずに BaseNeedMeal を継承した
+# モデルの行を書き込んだ場合に送るシグナル（食事注文の同期に使う）。
+# sender=モデル、keys=(対象者ID, 日付) のリスト
+meal_needs_changed = Signal()
 
 
 class BaseModel(models.Model):
@@ -24,3 +31,72 @@ class BaseNeedMeal(models.Model):
         abstract = True
         verbose_name = "食事の要否設定"
         verbose_name_plural = "食事の要否設定"
+
+
+# 1回の INSERT ... ON CONFLICT に含める最大行数
+INCREMENT_BATCH_SIZE = 500
+
+
+def bulk_increment(model, unique_fields, increments):
+    """
+    集計行の値に差分を加算する。行が無ければ差分を初期値として作成する。
+
+    SQLite / PostgreSQL では INSERT ... ON CONFLICT DO UPDATE SET 列 = 列 + EXCLUDED.列 で
+    加算をデータベース側で行うため、同時に動いたトランザクションが同じ行（まだ無い行を含む）に
+    加算しても差分は失われない。
+    それ以外のデータベースでは F() で加算し、行が無ければ作成する（作成が衝突したら加算し直す）。
+
+    Args:
+        model: 集計モデル
+        unique_fields (list(str)): 行を特定するフィールド名（ユニーク制約と同じ並び）
+        increments (dict): unique_fields の値のタプル → {フィールド名: 差分}
+            （差分のフィールドはすべての行で同じにすること）
+    """
+    increments = list(increments.items())
+    if not increments:
+        return
+    fields = list(increments[0][1])
+
+    if connection.vendor not in ("sqlite", "postgresql"):
+        for key, deltas in increments:
+            lookup = dict(zip(unique_fields, key))
+            update = {field: F(field) + deltas[field] for field in fields}
+            with transaction.atomic():
+                if model.objects.filter(**lookup).update(**update):
+                    continue
+                try:
+                    with transaction.atomic():
+                        model.objects.create(**lookup, **deltas)
+                except IntegrityError:
+                    model.objects.filter(**lookup).update(**update)
+        return
+
+    qn = connection.ops.quote_name
+    opts = model._meta
+    table = qn(opts.db_table)
+    key_fields = [opts.get_field(name) for name in unique_fields]
+    value_fields = [opts.get_field(name) for name in fields]
+    key_cols = ", ".join(qn(field.column) for field in key_fields)
+    all_cols = ", ".join(qn(field.column) for field in key_fields + value_fields)
+    updates = ", ".join(
+        f"{qn(field.column)} = {table}.{qn(field.column)} + EXCLUDED.{qn(field.column)}"
+        for field in value_fields
+    )
+    placeholder = "(" + ", ".join(["%s"] * (len(key_fields) + len(value_fields))) + ")"
+
+    with connection.cursor() as cursor:
+        for i in range(0, len(increments), INCREMENT_BATCH_SIZE):
+            batch = increments[i : i + INCREMENT_BATCH_SIZE]
+            params = []
+            for key, deltas in batch:
+                params += [
+                    field.get_db_prep_value(value, connection)
+                    for field, value in zip(key_fields, key)
+                ]
+                params += [deltas[field] for field in fields]
+            cursor.execute(
+                f"INSERT INTO {table} ({all_cols}) VALUES "
+                + ", ".join([placeholder] * len(batch))
+                + f" ON CONFLICT ({key_cols}) DO UPDATE SET {updates}",
+                params,
+            )
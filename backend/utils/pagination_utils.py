@@ -0,0 +1,79 @@
+import base64
+from datetime import date
+
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+class InvalidPageParam(ValueError):
+    """limit / cursor パラメータが不正な場合に送出される例外"""
+
+
+def encode_cursor(obj):
+    """
+    (date, id) の組を URL に載せられる不透明なカーソル文字列に変換する。
+    """
+    raw = f"{obj.date.isoformat()}|{obj.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    カーソル文字列を (date, id) の組に戻す。
+
+    Raises:
+        InvalidPageParam: カーソルが壊れている場合
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        date_str, pk = raw.split("|")
+        return date.fromisoformat(date_str), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidPageParam("cursorが不正です")
+
+
+def parse_limit(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """
+    limit パラメータを 1〜maximum の整数として解釈する。
+    """
+    if value in (None, ""):
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        raise InvalidPageParam("limitは整数で指定してください")
+    if limit < 1:
+        raise InvalidPageParam("limitは1以上で指定してください")
+    return min(limit, maximum)
+
+
+def keyset_paginate(queryset, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    (date, id) 昇順のキーセットページネーションを行う。
+
+    OFFSET を使わず「前ページ最終行より後ろ」を WHERE で絞り込むため、
+    ページの取得コストは履歴の件数ではなくページサイズにのみ依存する。
+
+    Args:
+        queryset (QuerySet): date フィールドを持つモデルのクエリセット
+        cursor (str, optional): 前回レスポンスの next_cursor
+        limit (int): 1ページの件数
+
+    Returns:
+        tuple(list, str | None): (ページ内のオブジェクト, 次ページのカーソル)
+    """
+    queryset = queryset.order_by("date", "id")
+    if cursor:
+        last_date, last_id = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(date__gt=last_date) | Q(date=last_date, id__gt=last_id)
+        )
+
+    # 1件多く取得して次ページの有無を判定する
+    rows = list(queryset[: limit + 1])
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1])
+    return rows, None
@@ -0,0 +1,138 @@
+import threading
+import uuid
+
+from django.db import transaction
+
+from utils.change_stamp_utils import stamp_cache
+
+# 参照テーブル（モデルラベル → (コードフィールド, 名称フィールド)）
+REFERENCE_TABLES = {
+    "staff.ShiftType": ("code", "name"),
+    "staff.Role": ("name", "name"),
+    "staff.ShiftPeriod": ("start_date", "start_date"),
+    "meal.MealType": ("name", "display_name"),
+    "guest.VisitType": ("code", "name"),
+}
+
+VERSION_KEY = "refdata:{label}:version"
+
+
+class ReferenceSnapshot:
+    """
+    ある時点の参照テーブル全件と、ID・コード・名称による索引。
+
+    保持しているモデルインスタンスはプロセス内で共有されるため、
+    呼び出し側で変更してはいけない。
+    """
+
+    def __init__(self, version, objects, code_field, name_field):
+        self.version = version
+        self.objects = tuple(objects)
+        self.by_id = {obj.pk: obj for obj in self.objects}
+        self.by_code = {getattr(obj, code_field): obj for obj in self.objects}
+        self.by_name = {getattr(obj, name_field): obj for obj in self.objects}
+
+
+class ReferenceRegistry:
+    """
+    ShiftType・MealType・VisitType・Role など小さな参照テーブルの
+    プロセス内キャッシュ。
+
+    - 初回アクセス時に全件を1クエリで読み込む
+    - post_save / post_delete シグナルで invalidate() され、コミット後に
+      全プロセスで共有するキャッシュ（stamp_cache）上のバージョン番号を更新する
+    - 他ワーカーはアクセス時にバージョン番号を比較し、
+      変わっていれば読み込み直す
+    - 変更したトランザクションの中では、そのスレッドだけがテーブルを直接読み込み、
+      コミット前の行をプロセス内キャッシュには入れない
+    """
+
+    def __init__(self):
+        self._snapshots = {}
+        self._lock = threading.Lock()
+        # スレッド毎の、コミット待ちの変更があるモデルラベル
+        self._local = threading.local()
+
+    def _pending(self):
+        """
+        このスレッドのトランザクションで、コミット前の変更があるモデルラベルの集合を返す。
+
+        コミットされると invalidate() で登録した処理が取り除き、
+        ロールバックなどでトランザクションの外に出た場合はここで破棄する。
+        """
+        if not hasattr(self._local, "pending"):
+            self._local.pending = set()
+        if not transaction.get_connection().in_atomic_block:
+            self._local.pending.clear()
+        return self._local.pending
+
+    def snapshot(self, model):
+        """
+        最新の ReferenceSnapshot を返す。
+        ループ内で何度も参照する場合は、一度取得したスナップショットを使い回す。
+        """
+        label = model._meta.label
+        code_field, name_field = REFERENCE_TABLES[label]
+        key = VERSION_KEY.format(label=label)
+
+        if label in self._pending():
+            # コミット前の行を含むため、キャッシュせずに毎回読み込む
+            return ReferenceSnapshot(None, model._default_manager.all(), code_field, name_field)
+
+        version = stamp_cache.get(key)
+        current = self._snapshots.get(label)
+        if current is not None and version is not None and current.version == version:
+            return current
+
+        with self._lock:
+            if version is None:
+                version = uuid.uuid4().hex
+                if not stamp_cache.add(key, version, timeout=None):
+                    version = stamp_cache.get(key, version)
+            snapshot = ReferenceSnapshot(
+                version, model._default_manager.all(), code_field, name_field
+            )
+            self._snapshots[label] = snapshot
+        return snapshot
+
+    def get(self, model, pk):
+        """ID で取得（存在しなければ None）"""
+        return self.snapshot(model).by_id.get(pk)
+
+    def get_by_code(self, model, code):
+        """コードで取得（存在しなければ None）"""
+        return self.snapshot(model).by_code.get(code)
+
+    def get_by_name(self, model, name):
+        """名称で取得（存在しなければ None）"""
+        return self.snapshot(model).by_name.get(name)
+
+    def invalidate(self, model):
+        """
+        指定モデルのスナップショットを破棄し、バージョン番号を更新する。
+
+        コミット前に更新すると、トランザクション内で読み込み直した未コミットの行が
+        新しいバージョンでキャッシュされ、ロールバックされても残ってしまうため、
+        コミット後にだけ更新する（ロールバックされた場合は何もしない）。
+        コミットまでの間、同じトランザクションからの参照はテーブルを直接読み込み、変更後の行を返す。
+        """
+        label = model._meta.label
+        if label not in REFERENCE_TABLES:
+            return
+
+        def bump():
+            self._pending().discard(label)
+            self._snapshots.pop(label, None)
+            stamp_cache.set(VERSION_KEY.format(label=label), uuid.uuid4().hex, timeout=None)
+
+        if transaction.get_connection().in_atomic_block:
+            # コミットまでは、このスレッドだけがテーブルを直接読み込む
+            self._pending().add(label)
+        transaction.on_commit(bump)
+
+    def clear(self):
+        """プロセス内のスナップショットをすべて破棄する（テスト用）"""
+        self._snapshots.clear()
+
+
+reference_registry = ReferenceRegistry()
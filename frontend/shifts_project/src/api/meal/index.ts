@@ -3,6 +3,8 @@ import type {
     MealType,
     MealOrder,
     MealOrderCount,
+    MealOrderListParams,
+    MealOrderPage,
     MealOrderSubmitRequest
 } from "./type";
 
@@ -22,9 +24,9 @@ export const API = {
 export const reqMealTypeList = () =>
     request.get<MealType[]>(API.MEAL_TYPE_LIST);
 
-// 食事注文一覧取得
-export const reqMealOrderList = () =>
-    request.get<MealOrder[]>(API.MEAL_ORDER_LIST);
+// 食事注文一覧取得（results・件数 count・次ページ用の next_cursor を返す）
+export const reqMealOrderList = (params?: MealOrderListParams) =>
+    request.get<MealOrderPage>(API.MEAL_ORDER_LIST, { params });
 
 // 食事注文新規登録（ゲストまたはスタッフ）
 export const reqCreateMealOrder = (data: MealOrderSubmitRequest) =>
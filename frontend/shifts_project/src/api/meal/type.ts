@@ -34,3 +34,22 @@ export interface MealOrderCount {
     昼食: number;
     夕食: number;
 }
+
+// 食事注文一覧の絞り込み・ページング条件
+export interface MealOrderListParams {
+    date?: string;                  // date_from / date_to とは同時に指定できない
+    date_from?: string;
+    date_to?: string;
+    meal_type_id?: number;
+    kind?: "guest" | "staff";
+    ordered?: boolean;
+    cursor?: string;                // 前ページの next_cursor
+    limit?: number;                 // 1ページの件数（最大500）
+}
+
+// 食事注文一覧（カーソルページング）
+export interface MealOrderPage {
+    results: MealOrder[];
+    count: number;                  // 絞り込み後の全件数
+    next_cursor: string | null;     // 最終ページでは null
+}
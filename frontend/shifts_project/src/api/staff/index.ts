@@ -5,6 +5,8 @@ import type {
     Staff,
     StaffSubmitRequest,
     WorkSchedule,
+    WorkScheduleListParams,
+    WorkSchedulePage,
     WorkScheduleSubmitRequest,
 } from "./type";
 
@@ -39,9 +41,9 @@ export const reqCreateStaff = (data: StaffSubmitRequest) =>
 export const reqStaffDetail = (id: number) =>
     request.get<Staff>(`${API.STAFF_DETAIL}/${id}/`);
 
-// 勤務スケジュール一覧
-export const reqWorkScheduleList = () =>
-    request.get<WorkSchedule[]>(API.SCHEDULE_LIST);
+// 勤務スケジュール一覧（results と次ページ用の next_cursor を返す）
+export const reqWorkScheduleList = (params?: WorkScheduleListParams) =>
+    request.get<WorkSchedulePage>(API.SCHEDULE_LIST, { params });
 
 // 勤務スケジュール新規登録
 export const reqCreateWorkSchedule = (data: WorkScheduleSubmitRequest) =>
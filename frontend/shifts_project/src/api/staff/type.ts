@@ -56,3 +56,19 @@ export interface WorkScheduleSubmitRequest {
     needs_dinner?: boolean;
     meal_note?: string;
 }
+
+// 勤務スケジュール一覧の絞り込み・ページング条件
+export interface WorkScheduleListParams {
+    date_from?: string;
+    date_to?: string;
+    staff_id?: number;
+    shift_code?: string;
+    cursor?: string;      // 前ページの next_cursor
+    limit?: number;       // 1ページの件数（最大500）
+}
+
+// 勤務スケジュール一覧（カーソルページング）
+export interface WorkSchedulePage {
+    results: WorkSchedule[];
+    next_cursor: string | null;   // 最終ページでは null
+}
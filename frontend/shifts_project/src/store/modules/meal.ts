@@ -1,21 +1,30 @@
 ﻿import { defineStore } from "pinia";
-import { reqMealOrders } from "@/api/meal";
-import type { MealOrder } from "@/api/meal/type";
+import { reqMealOrderList } from "@/api/meal";
+import type { MealOrder, MealOrderListParams } from "@/api/meal/type";
 
 interface MealState {
     mealOrders: MealOrder[];
+    mealOrderCount: number;
+    nextCursor: string | null;
 }
 
 const useMealStore = defineStore("Meal", {
     state: (): MealState => ({
         mealOrders: [],
+        mealOrderCount: 0,
+        nextCursor: null,
     }),
     actions: {
-        // 食事注文一覧を取得
-        async fetchMealOrders() {
-            const res = await reqMealOrders();
+        // 食事注文一覧を取得（cursor を渡すと次ページを末尾に追加）
+        async fetchMealOrders(params: MealOrderListParams = {}) {
+            const res = await reqMealOrderList(params);
             if (res.code === 200) {
-                this.mealOrders = res.data;
+                const page = res.data;
+                this.mealOrders = params.cursor
+                    ? [...this.mealOrders, ...page.results]
+                    : page.results;
+                this.mealOrderCount = page.count;
+                this.nextCursor = page.next_cursor;
             } else {
                 return Promise.reject(new Error(res.message));
             }